@@ -1,4 +1,26 @@
+import os
 import shutil
+from pathlib import Path
+
 
 def is_installed(cmd: str) -> bool:
     return shutil.which(cmd) is not None
+
+
+def default_cache_dir() -> Path:
+    """Folder for ParsingTool's on-disk caches.
+
+    PARSINGTOOL_CACHE_DIR wins if set; otherwise we use the usual per-user
+    cache location (%LOCALAPPDATA% on Windows, ~/.cache elsewhere).
+    """
+    override = os.environ.get("PARSINGTOOL_CACHE_DIR")
+    if override:
+        return Path(override)
+
+    local_appdata = os.environ.get("LOCALAPPDATA")
+    if local_appdata:
+        return Path(local_appdata) / "ParsingTool" / "cache"
+
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "parsingtool"
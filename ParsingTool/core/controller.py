@@ -1,18 +1,214 @@
+from functools import partial
 from pathlib import Path
-from typing import Callable, Iterable, Optional
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional
 
 # --- PIPELINE IMPORTS ---
 # Note: These imports assume the current structure where pipelines are in ParsingTool.parsing
 # In Phase 4, these will be moved to ParsingTool.core.pipelines
-from ParsingTool.parsing.export_orders.pipeline import parse_export_pdf, run_batch as run_export_batch
+from ParsingTool.parsing.export_orders.pipeline import (
+    PARSER_MODULES as EXPORT_PARSER_MODULES,
+    parse_export_pdf,
+    run_batch as run_export_batch,
+)
 from ParsingTool.parsing.domestic_zapi import pipeline as domestic_pipeline
-from ParsingTool.parsing.packing_list.pipeline import run as run_packing_pipeline, run_batch as run_packing_batch
-from ParsingTool.parsing.qc import validate, write_report
+from ParsingTool.parsing.packing_list.pipeline import (
+    PARSER_MODULES as PI_PARSER_MODULES,
+    parse_pi_pdf,
+    run_batch as run_packing_batch,
+)
+from ParsingTool.parsing.qc import processing_failure, validate, write_report
+from ParsingTool.parsing.shared.archive import (
+    BatchInput,
+    batch_source,
+    is_zip_input,
+    list_batch_inputs,
+    output_stem,
+)
+from ParsingTool.parsing.shared.cancel import RunCancelled, RunToken
+from ParsingTool.parsing.shared.batch import (
+    DEFAULT_FILE_TIMEOUT,
+    FileResult,
+    failure_tag,
+    map_files,
+    map_files_tiered,
+    needs_ocr,
+    plan_cpu_budget,
+)
+from ParsingTool.parsing.shared.classify import Classification, classify_pdf, kind_from_name
+from ParsingTool.parsing.shared.csv_writer import write_csv
+from ParsingTool.parsing.shared.fingerprint import modules_fingerprint
+from ParsingTool.parsing.shared.jobs import JobQueue
 from ParsingTool.parsing.shared.pdf_utils import NoTextError
+from ParsingTool.parsing.shared.progress import (
+    FILE_FAILED,
+    FILE_FINISHED,
+    FILE_STARTED,
+    LOG,
+    RUN_FINISHED,
+    RUN_STARTED,
+    STAGE_STARTED,
+    CoalescingEmitter,
+    ProgressCallback,
+    ProgressEvent,
+)
+from ParsingTool.parsing.shared.schemas import BATCHES_COLUMNS, SSCC_COLUMNS
+
+PER_FILE_MODES = ("export", "domestic", "packinglist")
+
+# Route every PDF to the pipeline its first page points to
+AUTO_MODE = "auto"
+
+_KIND_TAGS = {"export": "EXPORT", "domestic": "DOMESTIC", "packinglist": "PI"}
+
+
+_PARSER_MODULES = {
+    "export": EXPORT_PARSER_MODULES,
+    "domestic": domestic_pipeline.PARSER_MODULES,
+    "packinglist": PI_PARSER_MODULES,
+}
+
+
+class UnknownDocumentError(ValueError):
+    """Auto mode couldn't tell which pipeline a PDF belongs to."""
+
+
+def _files_job_version(mode: str, use_ocr: bool) -> str:
+    """Parser version of a per-file job: a job left by other parser code
+    (or classifier code, in auto mode) is parsed again, not resumed."""
+    kinds = PER_FILE_MODES if mode == AUTO_MODE else (mode,)
+    modules = {__name__, *(m for kind in kinds for m in _PARSER_MODULES[kind])}
+    if mode == AUTO_MODE:
+        modules.add(classify_pdf.__module__)
+    return f"{mode}-{modules_fingerprint(modules)}-ocr{int(use_ocr)}"
+
+
+def _classify_file(p: BatchInput, *, use_ocr: bool) -> Classification:
+    """Classify one input by its first page (module-level for the workers)."""
+    return classify_pdf(batch_source(p), name=p.name, use_ocr=use_ocr)
+
+
+def _process_file(
+    p: BatchInput,
+    *,
+    mode: str,
+    outdir: Path,
+    debug: bool,
+    use_ocr: bool,
+    run_qc: bool,
+    max_ocr_workers: int,
+) -> Dict[str, Any]:
+    """Parse one PDF in per-file mode and write its CSV(s).
+
+    Module-level so a worker process can run it. Returns the log message,
+    the key rows (to decide whether the file needs OCR) and the QC result.
+    In auto mode the pipeline is chosen from the first page's content.
+    """
+    source = batch_source(p)
+    stem = output_stem(p)
+    qc = None
+    if mode == AUTO_MODE:
+        found = classify_pdf(source, name=p.name, use_ocr=use_ocr)
+        if found.kind is None:
+            if found.blank and not use_ocr:
+                # A scan: the OCR pass will have another look
+                raise NoTextError(f"No extractable text on the first page of {p.name}")
+            raise UnknownDocumentError("could not tell the document type from its first page")
+        mode, label = found.kind, f"[OK][{_KIND_TAGS[found.kind]}]"
+    elif mode == "export" and kind_from_name(p.name) == "packinglist":
+        # Auto-route PI / ZAPI files to the PI pipeline
+        mode, label = "packinglist", "[OK][PI]"
+    else:
+        label = "[OK]"
+
+    if mode == "export":
+        df = parse_export_pdf(source, use_ocr=use_ocr, debug=debug, max_ocr_workers=max_ocr_workers)
+        out_csv = outdir / f"{stem}.csv"
+        df.to_csv(out_csv, index=False, encoding="utf-8-sig")
+        if run_qc:
+            qc = validate(df, p.name)
+        message = f"{label} {p.name} -> {out_csv.name} ({len(df)} rows)"
+        rows = df.fillna("").to_dict("records")
+
+    elif mode == "domestic":
+        batches_csv = outdir / f"{stem}_batches.csv"
+        sscc_csv = outdir / f"{stem}_sscc.csv"
+        rows, sscc_rows = domestic_pipeline.parse_domestic_pdf(
+            source, use_ocr=use_ocr, debug=debug, max_ocr_workers=max_ocr_workers
+        )
+        write_csv(str(batches_csv), rows, BATCHES_COLUMNS)
+        write_csv(str(sscc_csv), sscc_rows, SSCC_COLUMNS)
+        message = f"{label} {p.name} -> {batches_csv.name}, {sscc_csv.name}"
+
+    else:
+        df = parse_pi_pdf(source, use_ocr=use_ocr, debug=debug, max_ocr_workers=max_ocr_workers)
+        out_csv = outdir / f"{stem}_packing.csv"
+        df.to_csv(out_csv, index=False)
+        message = f"{label} {p.name} -> {out_csv.name}"
+        rows = df.fillna("").to_dict("records")
+
+    return {"message": message, "rows": rows, "row_count": len(rows), "qc": qc, "ocr": use_ocr}
+
 
 class ProcessingController:
-    def __init__(self, log_callback: Callable[[str], None]):
-        self.log = log_callback
+    def __init__(
+        self,
+        log_callback: Callable[[str], None],
+        max_ocr_workers: int = 1,
+        workers: int = 1,
+        incremental: bool = False,
+        duplicates: str = "fanout",
+        two_phase: bool = True,
+        timeout: Optional[float] = DEFAULT_FILE_TIMEOUT,
+        resume: bool = True,
+        on_progress: Optional[ProgressCallback] = None,
+        progress_interval: float = 0.25,
+    ):
+        """
+        Args:
+            log_callback: Receives one human-readable message per event.
+            max_ocr_workers: Processes used to OCR the pages of one PDF in parallel.
+            workers: Processes used to parse PDFs in parallel. With OCR on,
+                up to half of them OCR the files that need it (see
+                shared.batch.plan_cpu_budget).
+            incremental: In combine mode, skip PDFs unchanged since the last run.
+            duplicates: In combine mode, identical PDFs are parsed once; their
+                rows are repeated per file name ("fanout"), written once
+                ("collapse"), or every copy is parsed ("off").
+            two_phase: In combine mode with OCR, parse every PDF without OCR
+                first and only OCR the ones missing text or key fields.
+            timeout: Seconds one PDF may take (per pass) before its worker is
+                killed and the file reported as a timeout; None for no limit.
+            resume: Keep per-file progress in a job table in the output
+                folder, so re-running an interrupted batch only processes
+                the files it didn't finish.
+            on_progress: Receives (events, snapshot) batches at most every
+                `progress_interval` seconds: ProgressEvents for every file
+                and log line, and a ProgressSnapshot with throughput and
+                ETA (see parsing.shared.progress). Called from a timer
+                thread. With it, log lines arrive as "log" events instead
+                of through log_callback.
+        """
+        self.log_callback = log_callback
+        self.max_ocr_workers = max_ocr_workers
+        self.workers = workers
+        self.incremental = incremental
+        self.duplicates = duplicates
+        self.two_phase = two_phase
+        self.timeout = timeout
+        self.resume = resume
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self._events: Optional[CoalescingEmitter] = None
+
+    def log(self, message: str) -> None:
+        if self._events is not None:
+            self._events.emit(ProgressEvent(LOG, message=message))
+        else:
+            self.log_callback(message)
+
+    def _emit(self, event: ProgressEvent) -> None:
+        if self._events is not None:
+            self._events.emit(event)
 
     def run(
         self,
@@ -23,53 +219,42 @@ class ProcessingController:
         use_ocr: bool,
         run_qc: bool,
         combine: bool,
-        folder_path: Optional[str]
+        folder_path: Optional[str],
+        token: Optional[RunToken] = None,
     ) -> None:
         """Process a list of PDFs and write their CSV outputs.
 
         Args:
-            pdfs: Iterable of Path objects for input PDFs.
+            pdfs: Iterable of input PDFs (Paths, or ZipMembers from
+                shared.archive.list_batch_inputs for a .zip).
             outdir: Path to output directory.
-            mode: One of "export", "domestic", "packinglist".
+            mode: One of "export", "domestic", "packinglist", or "auto" to
+                route each PDF by its content (see parsing.shared.classify).
             debug: Whether to enable debug logging.
             use_ocr: Whether to enable OCR fallback.
             run_qc: Whether to run QC (export mode only).
             combine: whether to combine outputs.
-            folder_path: original folder path string.
+            folder_path: original folder (or .zip archive) path string.
+            token: Optional RunToken to pause or cancel the run from another
+                thread (see parsing.shared.cancel). A cancelled run stops
+                between pages; files already written are kept.
         """
+        if self.on_progress is not None:
+            self._events = CoalescingEmitter(self.on_progress, interval=self.progress_interval)
+            self._events.start()
+        self._emit(ProgressEvent(RUN_STARTED, name=mode))
         try:
             self.log(f"--- Starting {mode.upper()} mode on {len(pdfs)} file(s) ---")
-            qc_results = []
-
-            # If user asked to combine and gave us a folder, use the batch pipelines
+            # If user asked to combine and gave us a folder (or a ZIP of PDFs),
+            # use the batch pipelines
             folder = Path(folder_path) if folder_path else None
-            if combine and folder is not None and folder.is_dir():
+            if combine and folder is not None and (folder.is_dir() or is_zip_input(folder)):
                 self.log("Combine mode enabled: creating combined CSV(s) from folder.")
 
-                if mode == "export":
-                    run_export_batch(folder, outdir, use_ocr=use_ocr, debug=debug)
-                    combined = outdir / "export_combined.csv"
-                    self.log(f"[COMBINED] Wrote {combined.name}")
-
-                elif mode == "domestic":
-                    domestic_pipeline.run_batch(
-                        folder, outdir, use_ocr=use_ocr, debug=debug
-                    )
-                    self.log(
-                        "[COMBINED] Wrote domestic_batches_combined.csv "
-                        "and domestic_sscc_combined.csv"
-                    )
-
-                elif mode == "packinglist":
-                    run_packing_batch(
-                        folder,
-                        outdir,
-                        use_ocr=use_ocr,
-                        debug=debug,
-                    )
-                    combined = outdir / "pi_combined.csv"
-                    self.log(f"[COMBINED] Wrote {combined.name}")
-
+                if mode == AUTO_MODE:
+                    self._run_auto_combined(folder, outdir, debug, use_ocr, token)
+                elif mode in PER_FILE_MODES:
+                    self._run_combined(mode, folder, outdir, debug, use_ocr, token)
                 else:
                     self.log(f"[WARN] Combine is not supported for mode: {mode}")
 
@@ -77,78 +262,190 @@ class ProcessingController:
                 return
 
             # Normal per-file processing
-            for p in pdfs:
-                try:
-                    if mode == "export":
-                        name_upper = p.name.upper()
-
-                        # Auto-route PI / ZAPI files to the PI pipeline
-                        if name_upper.endswith("_PI.PDF") or name_upper.endswith("_ZAPI.PDF"):
-                            out_csv = outdir / f"{p.stem}_packing.csv"
-                            run_packing_pipeline(
-                            input_pdf=str(p),
-                            out=str(out_csv),
-                            use_ocr=use_ocr,
-                            debug=debug,
-                        )
-                            self.log(f"[OK][PI] {p.name} -> {out_csv.name}")
-
-                        else:
-                            # Normal export pipeline
-                            df = parse_export_pdf(
-                                str(p), use_ocr=use_ocr, debug=debug
-                            )
-                            out_csv = outdir / f"{p.stem}.csv"
-                            df.to_csv(out_csv, index=False, encoding="utf-8-sig")
-                            self.log(
-                                f"[OK] {p.name} -> {out_csv.name} "
-                                f"({len(df)} rows)"
-                            )
-
-                            if run_qc:
-                                qc_results.append(validate(df, p.name))
-
-                    elif mode == "domestic":
-                        batches_csv = outdir / f"{p.stem}_batches.csv"
-                        sscc_csv = outdir / f"{p.stem}_sscc.csv"
-
-                        domestic_pipeline.run(
-                            input_pdf=str(p),
-                            out_batches=str(batches_csv),
-                            out_sscc=str(sscc_csv),
-                            use_ocr=use_ocr,
-                            debug=debug,
-                        )
-                        self.log(
-                            f"[OK] {p.name} -> "
-                            f"{batches_csv.name}, {sscc_csv.name}"
-                        )
-
-                    elif mode == "packinglist":
-                        out_csv = outdir / f"{p.stem}_packing.csv"
-                        run_packing_pipeline(
-                            input_pdf=str(p),
-                            out=str(out_csv),
-                            use_ocr=use_ocr,
-                            debug=debug,
-                        )
-                        self.log(f"[OK] {p.name} -> {out_csv.name}")
-
-                    else:
-                        self.log(f"[WARN] Unknown mode: {mode}")
-
-                except NoTextError as e:
-                    self.log(f"[WARN] {p.name}: no extractable text ({e})")
-                except Exception as e:
-                    self.log(f"[ERROR] {p.name}: {e}")
+            if mode not in PER_FILE_MODES and mode != AUTO_MODE:
+                self.log(f"[WARN] Unknown mode: {mode}")
+                self.log("--- Completed ---")
+                return
+
+            qc_results = self._run_files(list(pdfs), outdir, mode, debug, use_ocr, run_qc, token)
 
             # QC report for export
-            if mode == "export" and run_qc and qc_results:
+            if mode in ("export", AUTO_MODE) and run_qc and qc_results:
                 report_path = outdir / "qc_report.md"
                 write_report(qc_results, report_path)
                 self.log(f"[QC] Wrote report: {report_path.name}")
 
             self.log("--- Completed ---")
 
+        except RunCancelled:
+            self.log("[CANCELLED] Stopped. Files finished so far were kept.")
         except Exception as e:
             self.log(f"[FATAL] {e}")
+        finally:
+            self._emit(ProgressEvent(RUN_FINISHED, name=mode))
+            if self._events is not None:
+                self._events.close()
+                self._events = None
+
+    def _run_combined(
+        self,
+        mode: str,
+        folder: Path,
+        outdir: Path,
+        debug: bool,
+        use_ocr: bool,
+        token: Optional[RunToken],
+        files: Optional[List[BatchInput]] = None,
+    ) -> None:
+        """Combine mode for one pipeline: its combined CSV(s) in `outdir`."""
+        runner, written = {
+            "export": (run_export_batch, "export_combined.csv"),
+            "domestic": (
+                domestic_pipeline.run_batch,
+                "domestic_batches_combined.csv and domestic_sscc_combined.csv",
+            ),
+            "packinglist": (run_packing_batch, "pi_combined.csv"),
+        }[mode]
+        runner(
+            folder,
+            outdir,
+            use_ocr=use_ocr,
+            debug=debug,
+            max_ocr_workers=self.max_ocr_workers,
+            workers=self.workers,
+            incremental=self.incremental,
+            duplicates=self.duplicates,
+            two_phase=self.two_phase,
+            timeout=self.timeout,
+            resume=self.resume,
+            progress=self._emit,
+            token=token,
+            files=files,
+        )
+        self.log(f"[COMBINED] Wrote {written}")
+
+    def _run_auto_combined(
+        self,
+        folder: Path,
+        outdir: Path,
+        debug: bool,
+        use_ocr: bool,
+        token: Optional[RunToken],
+    ) -> None:
+        """Combine mode over a mixed folder: classify every PDF by its first
+        page on the worker pool, then run each pipeline on its share of the
+        files."""
+        routed: Dict[str, List[BatchInput]] = {kind: [] for kind in PER_FILE_MODES}
+        classified = map_files(
+            partial(_classify_file, use_ocr=use_ocr),
+            list_batch_inputs(folder),
+            workers=self.workers,
+            timeout=self.timeout,
+            token=token,
+        )
+        try:
+            for res in classified:
+                p = res.path
+                if not res.ok:
+                    self.log(f"[{failure_tag(res)}] {p.name}: {res.error}")
+                elif res.value.kind is not None:
+                    routed[res.value.kind].append(p)
+                elif res.value.blank:
+                    self.log(f"[SKIP] {p.name}: no text on the first page (turn on OCR)")
+                else:
+                    self.log(f"[SKIP] {p.name}: could not tell the document type")
+        finally:
+            classified.close()
+
+        self.log(
+            "[AUTO] " + ", ".join(f"{len(files)} {_KIND_TAGS[kind]}" for kind, files in routed.items())
+        )
+        for kind, files in routed.items():
+            if files:
+                self._run_combined(kind, folder, outdir, debug, use_ocr, token, files)
+
+    def _run_files(
+        self,
+        pdfs: List[BatchInput],
+        outdir: Path,
+        mode: str,
+        debug: bool,
+        use_ocr: bool,
+        run_qc: bool,
+        token: Optional[RunToken] = None,
+    ) -> List[Dict[str, Any]]:
+        """Per-file mode: one CSV (or two) per PDF. Returns the QC results.
+
+        Text-layer files are parsed on a large pool; with OCR on, only files
+        that come back without text or key fields go to a smaller OCR pool,
+        so they never hold up the quick ones. Results are logged in input
+        order.
+        """
+        jobs = JobQueue(outdir / f"{mode}_files.jobs.sqlite") if self.resume else None
+        results: Optional[Generator[FileResult, None, None]] = None
+        try:
+            finished = jobs.plan(pdfs, _files_job_version(mode, use_ocr)) if jobs is not None else set()
+            if finished:
+                self.log(f"Resuming: {len(finished)} file(s) done in an earlier run.")
+            todo = [p for p in pdfs if p.name not in finished]
+            self._emit(ProgressEvent(STAGE_STARTED, stage="parse", total=len(pdfs)))
+            if jobs is not None:
+                jobs.start(p.name for p in todo)
+
+            budget = plan_cpu_budget(
+                self.workers, max_ocr_workers=self.max_ocr_workers, use_ocr=use_ocr
+            )
+            job = partial(_process_file, mode=mode, outdir=outdir, debug=debug, run_qc=run_qc)
+            results = map_files_tiered(
+                partial(job, use_ocr=False, max_ocr_workers=1),
+                partial(job, use_ocr=True, max_ocr_workers=budget.ocr_pages_per_file),
+                todo,
+                escalate=(lambda res: needs_ocr(res, "rows")) if use_ocr else (lambda res: False),
+                workers=budget.parse_workers,
+                slow_workers=budget.ocr_workers,
+                timeout=self.timeout,
+                token=token,
+            )
+
+            qc_results: List[Dict[str, Any]] = []
+            for p in pdfs:
+                if p.name in finished:
+                    res = FileResult(p, **jobs.stored(p.name))
+                    stage = "resumed"
+                else:
+                    self._emit(ProgressEvent(FILE_STARTED, p.name, "parse"))
+                    res = next(results)
+                    stage = "ocr" if res.ok and res.value["ocr"] else "parse"
+                    if jobs is not None:
+                        value = None
+                        if res.ok:
+                            value = {k: res.value[k] for k in ("message", "row_count", "qc")}
+                        jobs.finish(p.name, value, error=res.error,
+                                    error_type=res.error_type, seconds=res.seconds)
+                if res.ok:
+                    self._emit(ProgressEvent(FILE_FINISHED, p.name, stage,
+                                             rows=res.value.get("row_count", 0), seconds=res.seconds))
+                else:
+                    self._emit(ProgressEvent(FILE_FAILED, p.name, stage, seconds=res.seconds,
+                                             error=res.error, error_type=res.error_type))
+
+                if res.ok:
+                    self.log(res.value["message"])
+                    if res.value["qc"] is not None:
+                        qc_results.append(res.value["qc"])
+                elif res.error_type == "NoTextError":
+                    self.log(f"[WARN] {p.name}: no extractable text ({res.error})")
+                else:
+                    tag = failure_tag(res)
+                    self.log(f"[{tag}] {p.name}: {res.error}")
+                    if run_qc and tag != "ERROR":
+                        qc_results.append(processing_failure(p.name, res.error, tag.lower()))
+
+            if jobs is not None:
+                jobs.complete()
+            return qc_results
+        finally:
+            if results is not None:
+                results.close()  # shuts the worker pools down straight away
+            if jobs is not None:
+                jobs.close()
@@ -1,7 +1,17 @@
 import argparse, sys
-from .domestic_zapi.pipeline import run as run_domestic
-from .export_orders.pipeline import run as run_export
-from .packing_list.pipeline import run as run_packing_list
+from pathlib import Path
+from .domestic_zapi.pipeline import run as run_domestic, run_corpus_batch as reparse_domestic
+from .export_orders.pipeline import run as run_export, run_corpus_batch as reparse_export
+from .packing_list.pipeline import run as run_packing_list, run_corpus_batch as reparse_packing_list
+from .shared.archive import list_batch_inputs
+from .shared.batch import DEFAULT_FILE_TIMEOUT
+from .shared.corpus import build_corpus
+
+REPARSE_PIPELINES = {
+    "export": reparse_export,
+    "domestic": reparse_domestic,
+    "packinglist": reparse_packing_list,
+}
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(prog="parsingtool", description="Parsing Tool CLI")
@@ -13,6 +23,8 @@ def build_parser() -> argparse.ArgumentParser:
     p_dom.add_argument("--out-sscc", required=True)
     p_dom.add_argument("--ocr", action="store_true", help="Enable OCR fallback")
     p_dom.add_argument("--debug", action="store_true", help="Enable debug logging")
+    p_dom.add_argument("--ocr-workers", dest="max_ocr_workers", type=int, default=1,
+                       help="Processes used to OCR the pages of one PDF in parallel (default: 1)")
 
     p_exp = sub.add_parser("export", help="Parse Export PDF into CSV (+ optional QC report)")
 
@@ -21,12 +33,38 @@ def build_parser() -> argparse.ArgumentParser:
     p_exp.add_argument("--ocr", action="store_true", help="Enable OCR fallback")
     p_exp.add_argument("--debug", action="store_true", help="Enable debug logging")
     p_exp.add_argument("--qc", action="store_true", help="Generate QC report")
+    p_exp.add_argument("--ocr-workers", dest="max_ocr_workers", type=int, default=1,
+                       help="Processes used to OCR the pages of one PDF in parallel (default: 1)")
 
     p_pl = sub.add_parser("packinglist", help="Parse Packing List (_PI.pdf)")
     p_pl.add_argument("input_pdf")
     p_pl.add_argument("--out", required=True)
     p_pl.add_argument("--ocr", action="store_true")
     p_pl.add_argument("--debug", action="store_true")
+    p_pl.add_argument("--ocr-workers", dest="max_ocr_workers", type=int, default=1,
+                      help="Processes used to OCR the pages of one PDF in parallel (default: 1)")
+
+    p_cor = sub.add_parser("corpus", help="Extract the text of a folder or .zip of PDFs once into a corpus file")
+    p_cor.add_argument("input", help="Folder of PDFs, or a .zip of PDFs")
+    p_cor.add_argument("--out", required=True, help="Corpus file to write (e.g. corpus.jsonl.gz)")
+    p_cor.add_argument("--ocr", action="store_true", help="Enable OCR fallback")
+    p_cor.add_argument("--debug", action="store_true", help="Enable debug logging")
+    p_cor.add_argument("--workers", type=int, default=1,
+                       help="Processes used to extract PDFs in parallel (default: 1)")
+    p_cor.add_argument("--ocr-workers", dest="max_ocr_workers", type=int, default=1,
+                       help="Processes used to OCR the pages of one PDF in parallel (default: 1)")
+    p_cor.add_argument("--timeout", type=float, default=DEFAULT_FILE_TIMEOUT,
+                       help="Seconds one PDF may take before it is skipped as a timeout "
+                            f"(default: {DEFAULT_FILE_TIMEOUT:g}; 0 for no limit)")
+
+    p_rep = sub.add_parser("reparse", help="Re-run the parsers over a text corpus (no PDF reading or OCR)")
+    p_rep.add_argument("corpus", help="Corpus file written by the corpus command")
+    p_rep.add_argument("--out-dir", required=True, help="Folder for the combined CSVs")
+    p_rep.add_argument("--pipelines", default=",".join(REPARSE_PIPELINES),
+                       help="Comma-separated pipelines to run (default: all)")
+    p_rep.add_argument("--debug", action="store_true", help="Enable debug logging")
+    p_rep.add_argument("--workers", type=int, default=1,
+                       help="Processes used to parse documents in parallel (default: 1)")
     return p
 
 
@@ -52,6 +90,7 @@ def main() -> None:
             out_sscc=args.out_sscc,
             use_ocr=args.ocr,
             debug=args.debug,
+            max_ocr_workers=args.max_ocr_workers,
         )
         return
 
@@ -62,6 +101,7 @@ def main() -> None:
             use_ocr=args.ocr,
             debug=args.debug,
             generate_qc=args.qc,
+            max_ocr_workers=args.max_ocr_workers,
         )
         return
     
@@ -71,9 +111,34 @@ def main() -> None:
             out=args.out,
             use_ocr=args.ocr,
             debug=args.debug,
+            max_ocr_workers=args.max_ocr_workers,
+        )
+        return
+
+    if args.command == "corpus":
+        inputs = list_batch_inputs(Path(args.input))
+        build_corpus(
+            inputs,
+            Path(args.out),
+            use_ocr=args.ocr,
+            debug=args.debug,
+            max_ocr_workers=args.max_ocr_workers,
+            workers=args.workers,
+            timeout=args.timeout or None,
         )
         return
 
+    if args.command == "reparse":
+        names = [n.strip() for n in args.pipelines.split(",") if n.strip()]
+        unknown = [n for n in names if n not in REPARSE_PIPELINES]
+        if unknown:
+            parser.error(f"unknown pipeline(s): {', '.join(unknown)}")
+        out_dir = Path(args.out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name in names:
+            REPARSE_PIPELINES[name](Path(args.corpus), out_dir, debug=args.debug, workers=args.workers)
+        return
+
     parser.print_help()
     sys.exit(0)
 
@@ -1,16 +1,43 @@
 from __future__ import annotations
 import re
-from typing import List, Dict
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Deque, Iterable, List, Dict, Optional
 
 from pathlib import Path          
-import pandas as pd 
 
-from ..shared.pdf_utils import extract_text
+from ..shared.archive import BatchInput, batch_source, list_batch_inputs
+from ..shared.batch import (
+    CombinedOutput,
+    ocr_workers_per_file,
+    plan_cpu_budget,
+    run_combined_batch,
+    run_two_phase_batch,
+)
+from ..shared.cancel import RunToken
+from ..shared.corpus import CorpusDoc, read_corpus
+from ..shared.fingerprint import modules_fingerprint
+from ..shared.jobs import JobQueue
+from ..shared.manifest import Manifest
+from ..shared.progress import ProgressEvent
+from ..shared.pdf_utils import PdfSource, extract_text, pdf_source_name
+from ..shared.result_cache import cached_json, text_parser_fingerprint
+from ..shared.product_tokens import DOMESTIC_GRADE_MATCHER
 from ..shared.text_utils import lines, find_first, take_around
 from ..shared.date_utils import to_ddmmyyyy
 from ..shared.csv_writer import write_csv
 from ..shared.schemas import BATCHES_COLUMNS, SSCC_COLUMNS
 
+# Modules whose code decides this pipeline's output (see shared/fingerprint.py)
+PARSER_MODULES = (
+    __name__,
+    "ParsingTool.parsing.shared.text_utils",
+    "ParsingTool.parsing.shared.date_utils",
+    "ParsingTool.parsing.shared.product_tokens",
+    "ParsingTool.parsing.shared.schemas",
+    "ParsingTool.parsing.shared.pdf_utils",
+)
+
 # -----------------------------
 # Header label patterns (kept readable & forgiving)
 # -----------------------------
@@ -108,53 +135,63 @@ def _parse_headers(text: str) -> Dict[str, str]:
 # Batch blocks + SSCC collection
 # -----------------------------
 
-def _parse_batches_and_sscc(text: str) -> List[dict]:
-    """Return a list of dict blocks with: Batch_Number, sscc_list, product_lines."""
-    ls = lines(text)
-    blocks: List[dict] = []
+# A batch's SSCCs and product lines are taken from the lines after it, up to
+# the next batch line or this many lines on (whichever comes first).
+BATCH_WINDOW = 60
 
-    for idx, ln in enumerate(ls):
-        m = BATCH_RE.search(ln)
-        if not m:
-            continue
-        batch = m.group(1)
+GROSS_WEIGHT_RE = re.compile(r"Gross\s*weight", re.IGNORECASE)
+SSCC_LABEL_RE = re.compile(r"\s*SSCC\b", re.IGNORECASE)
+PRODUCT_WORD_RE = re.compile(
+    r"\b(?:Alm|Almonds|Kern|NON VAR|Variety|Grade|Packaging)\b", re.IGNORECASE
+)
 
-        # Collect subsequent lines until next batch or a reasonable window
-        ssccs: List[str] = []
-        product_lines: List[str] = []
 
-        for j in range(idx + 1, min(idx + 60, len(ls))):
-            nxt = ls[j]
+def _is_product_line(ln: str) -> bool:
+    """True for lines that *look* like actual product descriptions."""
+    # Summary / header lines and SSCC label lines are not product descriptions
+    if GROSS_WEIGHT_RE.search(ln) or SSCC_LABEL_RE.match(ln):
+        return False
+    # Robust match: Size, Pack, or explicit product keywords/labels
+    return bool(SIZE_RE.search(ln) or PACK_RE.search(ln) or PRODUCT_WORD_RE.search(ln))
 
-            # Stop when we reach the next batch
-            if BATCH_RE.search(nxt):
-                break
 
-            # Collect SSCC codes (may appear with or without an "SSCC:" label)
-            for mss in SSCC_RE.finditer(nxt):
-                ssccs.append(mss.group(1))
+def _parse_batches_and_sscc(text: str) -> List[dict]:
+    """Return a list of dict blocks with: Batch_Number, sscc_list, product_lines.
 
-            # Skip lines that are clearly summary / header lines, not product lines
-            if re.search(r"Gross\s*weight", nxt, flags=re.IGNORECASE):
-                continue
+    One forward pass over the lines: a batch line closes the open block and
+    starts a new one; any other line inside the open block's window adds
+    its SSCCs (with or without an "SSCC:" label) and, if it looks like one,
+    its product line.
+    """
+    blocks: List[dict] = []
+    ssccs: List[str] = []
+    product_lines: Deque[str] = deque(maxlen=4)  # last few are usually closest to batch
+    window_end = -1  # no open block yet
 
-            # Skip obvious SSCC label lines – they are not product descriptions.
-            if re.match(r"\s*SSCC\b", nxt, flags=re.IGNORECASE):
-                continue
+    def close_block() -> None:
+        blocks[-1]["product_lines"] = list(product_lines)
 
-            # Keep lines that *look* like actual product descriptions.
-            # Robust match: Size, Pack, or explicit product keywords/labels
-            if (SIZE_RE.search(nxt) or 
-                PACK_RE.search(nxt) or 
-                re.search(r"\b(?:Alm|Almonds|Kern|NON VAR|Variety|Grade|Packaging)\b", nxt, re.IGNORECASE)):
-                product_lines.append(nxt)
+    for idx, ln in enumerate(lines(text)):
+        m = BATCH_RE.search(ln)
+        if m:
+            if blocks:
+                close_block()
+            ssccs = []
+            product_lines = deque(maxlen=4)
+            blocks.append({"Batch_Number": m.group(1), "sscc_list": ssccs, "product_lines": []})
+            window_end = idx + BATCH_WINDOW
+            continue
+
+        if idx >= window_end:
+            continue
 
-        blocks.append({
-            "Batch_Number": batch,
-            "sscc_list": ssccs,
-            "product_lines": product_lines[-4:],  # last few are usually closest to batch
-        })
+        for mss in SSCC_RE.finditer(ln):
+            ssccs.append(mss.group(1))
+        if _is_product_line(ln):
+            product_lines.append(ln)
 
+    if blocks:
+        close_block()
     return blocks
 
 
@@ -199,21 +236,8 @@ def _parse_product_fields(product_lines: List[str]) -> dict:
         packaging = f"{num}{unit} {norm_word}".strip()
 
     # Grade (prefer known tokens; fallback to 2–4 uppercase letters)
-    grade = ""
     # Try explicit patterns first (case-insensitive)
-    grade_patterns = [
-        (r"\bSSR\b", "SSR"),
-        (r"\bSUPR\b", "Supr"),   # normalise to 'Supr'
-        (r"\bSupr\b", "Supr"),
-        # XNo1 forms: XNO1, X No1, X No.1, Xno1
-        (r"\bX\s*NO\.?\s*1\b", "XNo1"),
-        (r"\bXNO1\b", "XNo1"),
-        (r"\bXno1\b", "XNo1"),
-    ]
-    for pat, norm in grade_patterns:
-        if re.search(pat, txt, flags=re.IGNORECASE):
-            grade = norm
-            break
+    grade = DOMESTIC_GRADE_MATCHER.find(txt)
     if not grade:
         mg = GRADE_TOKEN_RE.search(txt)
         if mg:
@@ -243,12 +267,13 @@ def _parse_product_fields(product_lines: List[str]) -> dict:
     }
 
 def parse_domestic_pdf(
-    pdf_path: str | Path,
+    pdf_path: PdfSource,
     use_ocr: bool = False,
     debug: bool = False,
+    max_ocr_workers: int = 1,
 ) -> tuple[list[Dict[str, str]], list[Dict[str, str]]]:
     """
-    Parse a single domestic PDF and return:
+    Parse a single domestic PDF (path, bytes or binary file object) and return:
       - batch_rows: list of dicts for the batches CSV
       - sscc_rows: list of dicts for the SSCC CSV
     """
@@ -258,20 +283,49 @@ def parse_domestic_pdf(
         kwargs["use_ocr"] = True
     if debug:
         kwargs["debug"] = True
+    if max_ocr_workers > 1:
+        kwargs["max_ocr_workers"] = max_ocr_workers
+
+    text = extract_text(pdf_path, **kwargs)
+    name = pdf_source_name(pdf_path)
+
+    # 2) Rows
+    return _cached_domestic_rows(text, name, debug)
 
-    text = extract_text(str(pdf_path), **kwargs)
+def parse_domestic_pages(
+    pages: Iterable[str], name: str = "", debug: bool = False
+) -> tuple[list[Dict[str, str]], list[Dict[str, str]]]:
+    """Parse a domestic PDF from its already-extracted pages (e.g. a text corpus)."""
+    return _cached_domestic_rows("\n".join(pages), name, debug)
 
-    # 2) Headers
+def _cached_domestic_rows(
+    text: str, name: str, debug: bool
+) -> tuple[list[Dict[str, str]], list[Dict[str, str]]]:
+    """_domestic_rows, straight from the result cache when this text was parsed before."""
+    batch_rows, sscc_rows = cached_json(
+        "domestic",
+        text_parser_fingerprint(PARSER_MODULES),
+        text,
+        lambda t: _domestic_rows(t, name, debug),
+        debug=debug,
+    )
+    return batch_rows, sscc_rows
+
+def _domestic_rows(
+    text: str, name: str = "", debug: bool = False
+) -> tuple[list[Dict[str, str]], list[Dict[str, str]]]:
+    """(batch_rows, sscc_rows) of a domestic PDF's text."""
+    # 1) Headers
     H = _parse_headers(text)
     if debug and not H.get("Delivery Number"):
-        print(f"[WARN] {pdf_path}: Could not find 'Delivery Number' using regex.")
+        print(f"[WARN] {name}: Could not find 'Delivery Number' using regex.")
 
-    # 3) Batches & SSCC blocks
+    # 2) Batches & SSCC blocks
     blocks = _parse_batches_and_sscc(text)
     if debug and not blocks:
-        print(f"[WARN] {pdf_path}: No batches found.")
+        print(f"[WARN] {name}: No batches found.")
 
-    # 4) Build rows
+    # 3) Build rows
     batch_rows: List[Dict[str, str]] = []
     sscc_rows: List[Dict[str, str]] = []
 
@@ -346,11 +400,12 @@ def parse_domestic_pdf(
 
 def run(
     *,
-    input_pdf: str,
+    input_pdf: PdfSource,
     out_batches: str,
     out_sscc: str,
     use_ocr: bool = False,
     debug: bool = False,
+    max_ocr_workers: int = 1,
 ) -> None:
     """
     Single-file entrypoint (kept for compatibility).
@@ -361,66 +416,185 @@ def run(
         input_pdf,
         use_ocr=use_ocr,
         debug=debug,
+        max_ocr_workers=max_ocr_workers,
     )
 
     write_csv(out_batches, batch_rows, BATCHES_COLUMNS)
     write_csv(out_sscc, sscc_rows, SSCC_COLUMNS)
 
+def parser_version(use_ocr: bool = False) -> str:
+    """Identifies the code + options that produced a set of domestic rows."""
+    return f"{modules_fingerprint(PARSER_MODULES)}-ocr{int(use_ocr)}"
+
+def _parse_batch_file(
+    pdf: BatchInput,
+    *,
+    use_ocr: bool,
+    debug: bool,
+    max_ocr_workers: int,
+) -> Dict[str, List[Dict[str, str]]]:
+    """Parse one PDF for run_batch (module-level so worker processes can run it)."""
+    batch_rows, sscc_rows = parse_domestic_pdf(
+        batch_source(pdf),
+        use_ocr=use_ocr,
+        debug=debug,
+        max_ocr_workers=max_ocr_workers,
+    )
+
+    return _batch_result(batch_rows, sscc_rows, pdf.name)
+
+def _parse_corpus_doc(doc: CorpusDoc, *, debug: bool) -> Dict[str, List[Dict[str, str]]]:
+    """Like _parse_batch_file, for a document of a text corpus."""
+    batch_rows, sscc_rows = parse_domestic_pages(doc.pages, doc.name, debug)
+    return _batch_result(batch_rows, sscc_rows, doc.name)
+
+def _batch_result(
+    batch_rows: List[Dict[str, str]], sscc_rows: List[Dict[str, str]], name: str
+) -> Dict[str, List[Dict[str, str]]]:
+    # Tag each row with the source file name
+    for row in batch_rows:
+        row["Source_File"] = name
+    for row in sscc_rows:
+        row["Source_File"] = name
+
+    return {"batches": batch_rows, "sscc": sscc_rows}
+
+def _combined_outputs(output_dir: Path) -> List[CombinedOutput]:
+    return [
+        CombinedOutput(
+            "batches",
+            output_dir / "domestic_batches_combined.csv",
+            BATCHES_COLUMNS + ["Source_File"],
+            "combined batches CSV",
+        ),
+        CombinedOutput(
+            "sscc",
+            output_dir / "domestic_sscc_combined.csv",
+            SSCC_COLUMNS + ["Source_File"],
+            "combined SSCC CSV",
+        ),
+    ]
+
 def run_batch(
     input_dir: Path,
     output_dir: Path,
     *,
     use_ocr: bool = False,
     debug: bool = False,
+    max_ocr_workers: int = 1,
+    workers: int = 1,
+    incremental: bool = False,
+    duplicates: str = "fanout",
+    two_phase: bool = True,
+    timeout: Optional[float] = None,
+    resume: bool = False,
+    progress: Optional[Callable[[ProgressEvent], None]] = None,
+    token: Optional[RunToken] = None,
+    files: Optional[List[BatchInput]] = None,
 ) -> None:
     """
-    Batch-process domestic PDFs in `input_dir` and write two combined CSVs
-    to `output_dir`:
+    Batch-process domestic PDFs in `input_dir` (a folder, or a .zip whose
+    PDF members are read in memory) and write two combined CSVs to
+    `output_dir`:
 
       - domestic_batches_combined.csv
       - domestic_sscc_combined.csv
-    """
-    batches_out = output_dir / "domestic_batches_combined.csv"
-    sscc_out = output_dir / "domestic_sscc_combined.csv"
 
-    pdf_files = sorted(input_dir.glob("*.pdf"))
+    Rows are streamed to the CSVs as each file finishes (in sorted file
+    order, even with `workers` > 1 on a process pool), so memory stays flat
+    and an interrupted run leaves its rows so far in `<csv>.partial`.
+
+    With `incremental=True` a manifest next to the CSVs remembers what was
+    parsed; unchanged PDFs are skipped and their previous rows reused.
+
+    PDFs with identical content are parsed once; `duplicates` decides
+    whether their rows are repeated per file name ("fanout"), written for
+    the first name only ("collapse"), or whether every copy is parsed
+    ("off").
+
+    With `use_ocr` and `two_phase`, every file is first parsed without OCR
+    and written straight away; only files with no text or empty key fields
+    are then OCR'd on a separate pool and their rows replaced.
+
+    With a `timeout` (seconds), each file is parsed in a supervised worker;
+    a file that runs longer is killed, reported as a TIMEOUT and left out,
+    and the rest of the batch carries on.
+
+    With `resume=True`, progress is kept in a job table next to the CSV
+    (see shared/jobs.py): re-running after a crash or power cut only
+    parses the files the interrupted run didn't finish.
+
+    `progress` receives a ProgressEvent per file (see shared/progress.py).
+    Cancelling `token` (shared/cancel.py) stops the run between pages and
+    keeps what was written so far.
+
+    `files` limits the run to those inputs of `input_dir` (e.g. the ones
+    shared/classify.py routed to this pipeline); by default all its PDFs.
+    """
+    pdf_files = list_batch_inputs(input_dir) if files is None else list(files)
     print(f"[DOMESTIC] Found {len(pdf_files)} PDFs in {input_dir}")
 
-    all_batch_rows: list[Dict[str, str]] = []
-    all_sscc_rows: list[Dict[str, str]] = []
+    manifest = None
+    if incremental:
+        manifest = Manifest.load(output_dir / "domestic_combined.manifest.json")
+    jobs = JobQueue(output_dir / "domestic_combined.jobs.sqlite") if resume else None
 
-    for pdf in pdf_files:
-        try:
-            batch_rows, sscc_rows = parse_domestic_pdf(
-                pdf,
-                use_ocr=use_ocr,
-                debug=debug,
+    parse_one = partial(
+        _parse_batch_file,
+        use_ocr=use_ocr,
+        debug=debug,
+        max_ocr_workers=ocr_workers_per_file(max_ocr_workers, workers),
+    )
+    options: Dict[str, Any] = dict(
+        manifest=manifest,
+        duplicates=duplicates,
+        timeout=timeout,
+        jobs=jobs,
+        progress=progress,
+        token=token,
+        parser_version=parser_version(use_ocr),
+    )
+    try:
+        if use_ocr and two_phase:
+            # Text parsing and OCR run side by side; split the cores between them
+            budget = plan_cpu_budget(workers, max_ocr_workers=max_ocr_workers)
+            run_two_phase_batch(
+                "DOMESTIC",
+                pdf_files,
+                partial(parse_one, use_ocr=False, max_ocr_workers=1),
+                partial(parse_one, max_ocr_workers=budget.ocr_pages_per_file),
+                _combined_outputs(output_dir),
+                workers=budget.parse_workers,
+                ocr_workers=budget.ocr_workers,
+                **options,
             )
+        else:
+            run_combined_batch(
+                "DOMESTIC", pdf_files, parse_one, _combined_outputs(output_dir), workers=workers, **options
+            )
+    finally:
+        if jobs is not None:
+            jobs.close()
 
-            # Tag each row with the source file name
-            for row in batch_rows:
-                row["Source_File"] = pdf.name
-            for row in sscc_rows:
-                row["Source_File"] = pdf.name
-
-            all_batch_rows.extend(batch_rows)
-            all_sscc_rows.extend(sscc_rows)
-        except Exception as e:
-            print(f"[DOMESTIC] ERROR processing {pdf.name}: {e}")
-
-    if all_batch_rows:
-        batches_df = pd.DataFrame(all_batch_rows)
-        # Optional: enforce column order, plus Source_File
-        batches_df = batches_df.reindex(columns=BATCHES_COLUMNS + ["Source_File"])
-        batches_df.to_csv(batches_out, index=False)
-        print(f"[DOMESTIC] Wrote combined batches CSV: {batches_out}")
-    else:
-        print("[DOMESTIC] No batch rows collected.")
-
-    if all_sscc_rows:
-        sscc_df = pd.DataFrame(all_sscc_rows)
-        sscc_df = sscc_df.reindex(columns=SSCC_COLUMNS + ["Source_File"])
-        sscc_df.to_csv(sscc_out, index=False)
-        print(f"[DOMESTIC] Wrote combined SSCC CSV: {sscc_out}")
-    else:
-        print("[DOMESTIC] No SSCC rows collected.")
+def run_corpus_batch(
+    corpus_path: Path,
+    output_dir: Path,
+    *,
+    debug: bool = False,
+    workers: int = 1,
+) -> None:
+    """
+    Re-parse every document of a text corpus (see shared/corpus.py) into the
+    two combined domestic CSVs in `output_dir`, without opening a single PDF.
+    """
+    docs = read_corpus(corpus_path)
+    print(f"[DOMESTIC] Re-parsing {len(docs)} document(s) from {corpus_path}")
+
+    run_combined_batch(
+        "DOMESTIC",
+        docs,
+        partial(_parse_corpus_doc, debug=debug),
+        _combined_outputs(output_dir),
+        workers=workers,
+        duplicates="off",
+    )
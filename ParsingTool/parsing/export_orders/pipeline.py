@@ -7,12 +7,32 @@ This version includes:
 """
 
 from __future__ import annotations
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import os
 import re
 import pandas as pd
-from ..shared.pdf_utils import extract_text
-from ..shared.export_patterns import EXPORT_FIELD_PATTERNS
+from ...common.system import default_cache_dir
+from ..shared.archive import BatchInput, batch_source, list_batch_inputs
+from ..shared.batch import (
+    CombinedOutput,
+    ocr_workers_per_file,
+    plan_cpu_budget,
+    run_combined_batch,
+    run_two_phase_batch,
+)
+from ..shared.cancel import RunToken
+from ..shared.corpus import CorpusDoc, read_corpus
+from ..shared.fingerprint import modules_fingerprint
+from ..shared.jobs import JobQueue
+from ..shared.manifest import Manifest
+from ..shared.progress import ProgressEvent
+from ..shared.memo import LruMemo, read_table
+from ..shared.pdf_utils import PdfSource, extract_text, pdf_source_name, select_pages
+from ..shared.result_cache import cached_frame, text_parser_fingerprint
+from ..shared.product_tokens import EXPORT_GRADE_MATCHER, KNOWN_GRADES, pluck_special_grade
+from ..shared.export_patterns import EXPORT_FIELD_EXTRACTOR, EXPORT_FIELD_PATTERNS, FieldExtractor
 from ..qc import EXPECTED_COLUMNS
 
 # --- Configuration ---
@@ -20,15 +40,35 @@ from ..qc import EXPECTED_COLUMNS
 FIELD_PATTERNS = EXPORT_FIELD_PATTERNS
 FLAGS = re.IGNORECASE | re.MULTILINE
 
-KNOWN_GRADES = [
-    "SSR", "Supr", "XNo1", "XNo.1", "X No 1", "X No.1", 
-    "Premium", "Supreme", "Select", "Std", "Standard",
-    "Mfr", "Manufacturing", "H&S", "Rejects", "Mixed",
-    "Carm", "Nonpareil" 
-]
-
-def _find_line(pattern: str, text: str) -> str:
-    match = re.search(pattern, text, FLAGS)
+# Modules whose code decides this pipeline's output (see shared/fingerprint.py)
+PARSER_MODULES = (
+    __name__,
+    "ParsingTool.parsing.shared.export_patterns",
+    "ParsingTool.parsing.shared.product_tokens",
+    "ParsingTool.parsing.shared.schemas",
+    "ParsingTool.parsing.shared.pdf_utils",
+)
+
+# Product line tokens (compiled once at import)
+SIZE_RE = re.compile(r"\b(\d{2}\s*/\s*\d{2})\b")
+PACK_RE = re.compile(r"\b(\d+(?:[.,]\d+)?)\s*(lb|kg|g|oz|T|b)\b\s*([a-zA-Z]*)", re.IGNORECASE)
+BULK_BAGS_RE = re.compile(r"\bBulk Bags\b", re.IGNORECASE)
+MATERIAL_CODE_RE = re.compile(r"^\s*\d+[\s/]+")
+TARIFF_CODE_RE = re.compile(r"\b\d{2,}\.\d+\.\d+\b")
+LONG_NUMBER_RE = re.compile(r"\b\d{3,}\b")
+LONE_X_RE = re.compile(r"\bX\b", re.IGNORECASE)
+WHITESPACE_RE = re.compile(r"\s+")
+
+# First-match overrides applied after the standard fields, found in one go
+OVERRIDE_EXTRACTOR = FieldExtractor({
+    "SSCC Qty": r"\b(\d+(?:[.,]\d+)?)\s+PAL\b",
+    # Packer, capturing line(s) until we hit a stop word or double newline
+    "3rd Party Storage": r"Packer\s*[:\s]*\s*([^\n]+(?:(?:\n(?!Consignee|Notify|Delivery|Sale)[^\n]+))?)",
+    "Pallet": r"loaded on\s+([A-Za-z ]+pallets)",
+    "Fumigation": r"(\d+\s+days\s+Fumigation[^\n]*)",
+}, FLAGS)
+
+def _match_value(match: re.Match | None) -> str:
     if match:
         val = match.group(1).strip()
         if val.lower() in ["sale", "date", "delivery", "booking", "quantity", "description"]:
@@ -36,21 +76,24 @@ def _find_line(pattern: str, text: str) -> str:
         return val
     return ""
 
-def parse_product_line(line: str) -> Dict[str, str]:
+def _find_line(pattern: str, text: str) -> str:
+    return _match_value(re.search(pattern, text, FLAGS))
+
+def _parse_product_line(line: str) -> Dict[str, str]:
     """Smarter parsing: Pluck out known tokens, leave the rest as Variety."""
     row = {"Variety": "", "Grade": "", "Size": "N/A", "Packaging": ""}
     
     # 1. Remove leading material codes immediately
-    remainder = re.sub(r"^\s*\d+[\s/]+", "", line.strip())
+    remainder = MATERIAL_CODE_RE.sub("", line.strip())
 
     # 2. PLUCK SIZE
-    size_match = re.search(r"\b(\d{2}\s*/\s*\d{2})\b", remainder)
+    size_match = SIZE_RE.search(remainder)
     if size_match:
         row["Size"] = size_match.group(1).replace(" ", "")
         remainder = remainder.replace(size_match.group(0), " ")
 
     # 3. PLUCK PACKAGING
-    pack_match = re.search(r"\b(\d+(?:[.,]\d+)?)\s*(lb|kg|g|oz|T|b)\b\s*([a-zA-Z]*)", remainder, re.IGNORECASE)
+    pack_match = PACK_RE.search(remainder)
     if pack_match:
         full_pack = pack_match.group(0).strip()
         if "50b" in full_pack.lower() and "ctn" in full_pack.lower():
@@ -59,89 +102,267 @@ def parse_product_line(line: str) -> Dict[str, str]:
         remainder = remainder.replace(pack_match.group(0), " ")
     elif "bulk bags" in remainder.lower():
         row["Packaging"] = "Bulk Bags"
-        remainder = re.sub(r"\bBulk Bags\b", " ", remainder, flags=re.IGNORECASE)
-
-        # 3.5 SPECIAL CASE: Splits & Broken is a Grade
-    splits_pattern = re.compile(r"splits\s*&\s*broken|splits&broken", re.IGNORECASE)
-    if splits_pattern.search(remainder):
-        # Set the grade
-        row["Grade"] = "Splits & Broken"
-        # Remove that phrase from the remainder so Variety is cleaner
-        remainder = splits_pattern.sub(" ", remainder)
-
-        # 3.6 SPECIAL CASE: Mfg Gr is also a Grade
-    mfg_pattern = re.compile(r"\bmfg\s*gr\b", re.IGNORECASE)
-    if mfg_pattern.search(remainder):
-        row["Grade"] = "Mfg Gr"
-        remainder = mfg_pattern.sub(" ", remainder)
-
-        # 3.7 SPECIAL CASE: Satake is a Grade (H&S Satake)
-    satake_pattern = re.compile(r"\bsatake\b", re.IGNORECASE)
-    if satake_pattern.search(remainder):
-        row["Grade"] = "H&S Satake"
-        remainder = satake_pattern.sub(" ", remainder)
-
-    # 3.8 SPECIAL CASE: Helius is a Grade (H&S Helius)
-    helius_pattern = re.compile(r"\bhelius\b", re.IGNORECASE)
-    if helius_pattern.search(remainder):
-        row["Grade"] = "H&S Helius"
-        remainder = helius_pattern.sub(" ", remainder)
+        remainder = BULK_BAGS_RE.sub(" ", remainder)
 
+    # 3.5 SPECIAL CASES: Splits & Broken, Mfg Gr, Satake (H&S Satake) and
+    # Helius (H&S Helius) are grades; remove them so Variety is cleaner
+    row["Grade"], remainder = pluck_special_grade(remainder)
 
     # 4. PLUCK GRADE
     if not row["Grade"]:
-        for grade in sorted(KNOWN_GRADES, key=len, reverse=True):
-            pattern = r"\b" + re.escape(grade) + r"\b"
-            if re.search(pattern, remainder, re.IGNORECASE):
-                row["Grade"] = grade
-                remainder = re.sub(pattern, " ", remainder, flags=re.IGNORECASE)
-                break
+        row["Grade"], remainder = EXPORT_GRADE_MATCHER.pluck(remainder)
 
     # 5. CLEANUP VARIETY
-    remainder = re.sub(r"\b\d{2,}\.\d+\.\d+\b", " ", remainder)
-    remainder = re.sub(r"\b\d{3,}\b", " ", remainder) 
-    remainder = re.sub(r"\bX\b", " ", remainder, flags=re.IGNORECASE)
+    remainder = TARIFF_CODE_RE.sub(" ", remainder)
+    remainder = LONG_NUMBER_RE.sub(" ", remainder)
+    remainder = LONE_X_RE.sub(" ", remainder)
 
-    cleaned_var = re.sub(r"\s+", " ", remainder).strip(" ,.-")
+    cleaned_var = WHITESPACE_RE.sub(" ", remainder).strip(" ,.-")
     row["Variety"] = cleaned_var.title() if cleaned_var else ""
     
     return row
 
+PRODUCT_FIELDS = ["Variety", "Grade", "Size", "Packaging"]
+
+# SIZE_RE / PACK_RE with the whole match as group 0, for Series.str.extract
+SIZE_MATCH_RE = re.compile(f"({SIZE_RE.pattern})", SIZE_RE.flags)
+PACK_MATCH_RE = re.compile(f"({PACK_RE.pattern})", PACK_RE.flags)
+
+def _drop_each(texts: pd.Series, found: pd.Series) -> pd.Series:
+    """`texts` with every occurrence of its row's `found` text blanked out
+    (str.replace with a per-row literal has no Series.str form)."""
+    return pd.Series(
+        [t.replace(f, " ") if f else t for t, f in zip(texts, found)], index=texts.index, dtype=object
+    )
+
+def _parse_product_frame(lines: pd.Series) -> pd.DataFrame:
+    """_parse_product_line over a Series of strings, step for step.
+
+    Regex plucks and clean-ups run as Series.str operations; grade
+    plucking goes through the token matchers one line at a time.
+    """
+    remainder = lines.str.strip().str.replace(MATERIAL_CODE_RE, "", regex=True)
+
+    size_text = remainder.str.extract(SIZE_MATCH_RE, expand=True)[0].fillna("")
+    size = size_text.str.replace(" ", "", regex=False).where(size_text != "", "N/A")
+    remainder = _drop_each(remainder, size_text)
+
+    pack_text = remainder.str.extract(PACK_MATCH_RE, expand=True)[0].fillna("")
+    packaging = pack_text.str.strip()
+    lowered = packaging.str.lower()
+    fix_50b = lowered.str.contains("50b", regex=False) & lowered.str.contains("ctn", regex=False)
+    packaging = packaging.where(~fix_50b, packaging.str.replace("50b", "50lb", regex=False))
+    remainder = _drop_each(remainder, pack_text)
+    bulk = (pack_text == "") & remainder.str.lower().str.contains("bulk bags", regex=False)
+    packaging = packaging.where(~bulk, "Bulk Bags")
+    remainder = remainder.where(~bulk, remainder.str.replace(BULK_BAGS_RE, " ", regex=True))
+
+    grades, rest = [], []
+    for text in remainder:
+        grade, text = pluck_special_grade(text)
+        if not grade:
+            grade, text = EXPORT_GRADE_MATCHER.pluck(text)
+        grades.append(grade)
+        rest.append(text)
+    remainder = pd.Series(rest, index=lines.index, dtype=object)
+
+    for pattern in (TARIFF_CODE_RE, LONG_NUMBER_RE, LONE_X_RE):
+        remainder = remainder.str.replace(pattern, " ", regex=True)
+    variety = remainder.str.replace(WHITESPACE_RE, " ", regex=True).str.strip(" ,.-").str.title()
+
+    return pd.DataFrame(
+        {"Variety": variety, "Grade": grades, "Size": size, "Packaging": packaging},
+        index=lines.index,
+        columns=PRODUCT_FIELDS,
+    )
+
+# The same descriptions repeat across thousands of documents. Results only
+# depend on the stripped line, so that's the key.
+PRODUCT_LINE_MEMO = LruMemo(_parse_product_line, maxsize=4096, key=str.strip)
+
+# Code that decides parse_product_line's output; stamps the persisted table
+PRODUCT_LINE_MODULES = (__name__, "ParsingTool.parsing.shared.product_tokens")
+
+def parse_product_line(line: str) -> Dict[str, str]:
+    """Split a product description into Variety / Grade / Size / Packaging.
+
+    Memoised (see PRODUCT_LINE_MEMO); returns a fresh dict every call.
+    """
+    return dict(PRODUCT_LINE_MEMO(line))
+
+def parse_product_lines(lines: pd.Series) -> pd.DataFrame:
+    """Batch form of parse_product_line: one row per line, same index.
+
+    The lines are stripped and de-duplicated; distinct lines the memo
+    doesn't know yet are parsed in one vectorised step and added to it.
+    Missing values parse like an empty line.
+    """
+    keys = lines.fillna("").astype(str).str.strip()
+    codes, uniques = pd.factorize(keys)
+    known = {k: PRODUCT_LINE_MEMO(k) for k in uniques if k in PRODUCT_LINE_MEMO}
+    todo = [k for k in uniques if k not in known]
+    if todo:
+        fresh = dict(zip(todo, _parse_product_frame(pd.Series(todo, dtype=object)).to_dict("records")))
+        PRODUCT_LINE_MEMO.fill(fresh)
+        known.update(fresh)
+    parsed = pd.DataFrame([known[k] for k in uniques], columns=PRODUCT_FIELDS)
+    out = parsed.take(codes)
+    out.index = lines.index
+    return out
+
+def product_table_path() -> Path | None:
+    """Where batch runs persist the product-line table (None if caching is off)."""
+    if os.environ.get("PARSINGTOOL_NO_CACHE"):
+        return None
+    return default_cache_dir() / "product_lines.json"
+
+def warm_product_lines(table: Path | None) -> None:
+    """Load the persisted product-line table into this process (once)."""
+    if table is not None:
+        PRODUCT_LINE_MEMO.load(table, version=modules_fingerprint(PRODUCT_LINE_MODULES))
+
+def prepare_product_table(table: Path | None) -> None:
+    """Parent side of a batch run: make sure workers start from a warm table.
+
+    If the table was written by an older version of the parser, its lines
+    (the descriptions seen in earlier runs) are re-parsed here in one batch
+    step and saved, instead of every worker re-parsing them separately.
+    """
+    if table is None:
+        return
+    raw = read_table(table)
+    if raw and raw.get("entries") and raw.get("version") != modules_fingerprint(PRODUCT_LINE_MODULES):
+        parse_product_lines(pd.Series(list(raw["entries"]), dtype=object))
+        save_product_lines(table)
+    warm_product_lines(table)
+
+def prime_product_lines(lines: Iterable[str], table: Path | None) -> None:
+    """Parent side of a batch run whose texts are known up front: parse
+    their candidate product lines in one batch step before the workers
+    start (they fork from, or load the saved table of, this process)."""
+    found = pd.Series([line for line in lines if line], dtype=object)
+    if found.empty:
+        return
+    parse_product_lines(found)
+    save_product_lines(table)
+
+def learn_product_lines(result: Dict[str, Any]) -> None:
+    """Fold a batch worker's newly parsed product lines into this process."""
+    PRODUCT_LINE_MEMO.update(result.get("product_lines", {}))
+
+def save_product_lines(table: Path | None) -> None:
+    if table is None:
+        return
+    try:
+        PRODUCT_LINE_MEMO.save(table, version=modules_fingerprint(PRODUCT_LINE_MODULES))
+    except OSError as e:
+        print(f"[WARN] Could not save product-line table {table}: {e}")
+
+# --- Early stop while reading pages ---
+#
+# Headers and the batch table sit on the first page(s); terms and
+# conditions or appendices follow. Reading stops at a page that opens with
+# one of these headings, or once every export column is filled and the
+# last page read had no batch lines (so the batch table has ended).
+STOP_MARKER_RE = re.compile(
+    r"^\s*(?:(?:general\s+)?terms\s+(?:and|&)\s+conditions|conditions\s+of\s+(?:sale|contract)|appendix|annexure)\b",
+    re.IGNORECASE,
+)
+BATCH_LINE_RE = re.compile(r"Batch\s*:\s*[A-Z0-9]+", FLAGS)
+# Checking "all filled" re-parses the text so far; past this many pages a
+# document that still has gaps is simply read to the end.
+EARLY_STOP_MAX_PAGES = 3
+
+def is_stop_page(page_text: str) -> bool:
+    """True when a page opens with a terms / appendix heading."""
+    head = [ln for ln in page_text.splitlines() if ln.strip()][:3]
+    return any(STOP_MARKER_RE.match(ln) for ln in head)
+
+def _read_enough(pages: List[str]) -> bool:
+    if len(pages) > EARLY_STOP_MAX_PAGES or BATCH_LINE_RE.search(pages[-1]):
+        return False
+    text = "\n".join(pages)
+    # A header can fill every field before the batch table starts; its
+    # rows are the point, so keep reading until one batch line is in
+    if not BATCH_LINE_RE.search(text):
+        return False
+    fields = _export_fields(text)
+    return all(fields.get(c) for c in EXPECTED_COLUMNS)
+
 def parse_export_pdf(
-    pdf_path: Path | str,
+    pdf_path: PdfSource,
     debug: bool = False,
     use_ocr: bool = False,
+    max_ocr_workers: int = 1,
+    early_stop: bool = True,
 ) -> pd.DataFrame:
-    pdf_path = Path(pdf_path)
+    """Parse one export order PDF into one row per batch.
+
+    `pdf_path` may also be the PDF's bytes or a binary file object.
+    With `early_stop`, pages after a terms/appendix heading are never read,
+    and reading stops as soon as every column is filled (see above).
+
+    Rows already parsed from the same text by the same parser code come
+    from the result cache (shared/result_cache.py).
+    """
+    name = pdf_source_name(pdf_path)
+    gates: Dict[str, Any] = {"stop_at": is_stop_page, "until": _read_enough} if early_stop else {}
     try:
-        text = extract_text(str(pdf_path), debug=debug, use_ocr=use_ocr)
+        text = extract_text(
+            pdf_path, debug=debug, use_ocr=use_ocr, max_ocr_workers=max_ocr_workers, **gates
+        )
     except TypeError:
-        text = extract_text(str(pdf_path))
+        text = extract_text(pdf_path)
 
+    return _export_frame(text, name, debug)
+
+def parse_export_pages(
+    pages: Iterable[str],
+    name: str = "",
+    debug: bool = False,
+    early_stop: bool = True,
+) -> pd.DataFrame:
+    """Parse an export order from its already-extracted pages (e.g. a text
+    corpus), reading the same pages parse_export_pdf would."""
+    if early_stop:
+        pages = select_pages(pages, stop_at=is_stop_page, until=_read_enough, debug=debug)
+    return _export_frame("\n".join(pages), name, debug)
+
+def _export_frame(text: str, name: str, debug: bool) -> pd.DataFrame:
+    return cached_frame(
+        "export",
+        text_parser_fingerprint(PARSER_MODULES),
+        text,
+        lambda t: _export_rows(t, _export_fields(t, name, debug), name, debug),
+        debug=debug,
+    )
+
+def _export_fields(text: str, name: str = "", debug: bool = False) -> Dict[str, str]:
+    """Header and product fields of an export order."""
     fields = {}
     
     # 1. Standard Fields
-    for field, pattern in FIELD_PATTERNS.items():
-        val = _find_line(pattern, text)
+    for field, match in EXPORT_FIELD_EXTRACTOR.first_matches(text).items():
+        val = _match_value(match)
         if field in ["Delivery Number", "Sale Order Number", "OLAM Ref Number", "Batch Number"]:
             if val and not any(c.isdigit() for c in val):
                 val = ""
         fields[field] = val
     
     if debug and not fields.get("Delivery Number"):
-        print(f"[WARN] {pdf_path.name}: Could not find 'Delivery Number' using regex.")
+        print(f"[WARN] {name}: Could not find 'Delivery Number' using regex.")
 
     # 2. OVERRIDES & FIXES
+    overrides = OVERRIDE_EXTRACTOR.first_matches(text)
     
     # SSCC Qty
-    m = re.search(r"\b(\d+(?:[.,]\d+)?)\s+PAL\b", text, FLAGS)
+    m = overrides["SSCC Qty"]
     if m:
         fields["SSCC Qty"] = f"{m.group(1).strip()} PAL"
 
     # --- 3rd Party Storage (Packer) Fix ---
     packer_val = ""
-    # Regex: Look for Packer, capture line(s) until we hit a stop word or double newline
-    m = re.search(r"Packer\s*[:\s]*\s*([^\n]+(?:(?:\n(?!Consignee|Notify|Delivery|Sale)[^\n]+))?)", text, FLAGS)
+    m = overrides["3rd Party Storage"]
     if m:
         raw = m.group(1)
         # Aggressive Stop List: Now includes OLAM, Ref, Booking to prevent capturing headers
@@ -164,17 +385,33 @@ def parse_export_pdf(
     fields["3rd Party Storage"] = packer_val
 
     # Pallet
-    m = re.search(r"loaded on\s+([A-Za-z ]+pallets)", text, FLAGS)
+    m = overrides["Pallet"]
     if m: fields["Pallet"] = m.group(1).strip()
 
     # Fumigation
-    m = re.search(r"(\d+\s+days\s+Fumigation[^\n]*)", text, FLAGS)
+    m = overrides["Fumigation"]
     if m: fields["Fumigation"] = m.group(1).strip()
     else:
         matches = re.findall(r"[^\n]*Fumigation[^\n]*", text, FLAGS)
         if matches: fields["Fumigation"] = matches[-1].strip()
 
     # 3. PRODUCT DESCRIPTION
+    candidate_line = product_candidate_line(text)
+
+    # Parse what we found
+    product_info = {"Variety": "", "Grade": "", "Size": "", "Packaging": ""}
+    if candidate_line:
+        product_info = parse_product_line(candidate_line)
+        fields.update(product_info)
+    
+    # Final Scrub: If Variety is still garbage, wipe it.
+    if re.match(r"^[\d\s\.,/]+[A-Za-z]{0,2}$", fields.get("Variety", "")):
+        fields["Variety"] = ""
+
+    return fields
+
+def product_candidate_line(text: str) -> str:
+    """The line of an export order that holds its product description."""
     candidate_line = ""
     
     # Strategy A: Explicit Product
@@ -197,16 +434,10 @@ def parse_export_pdf(
         if not re.search(r"[A-Za-z]{3,}", clean_check):
             candidate_line = ""
 
-    # Parse what we found
-    product_info = {"Variety": "", "Grade": "", "Size": "", "Packaging": ""}
-    if candidate_line:
-        product_info = parse_product_line(candidate_line)
-        fields.update(product_info)
-    
-    # Final Scrub: If Variety is still garbage, wipe it.
-    if re.match(r"^[\d\s\.,/]+[A-Za-z]{0,2}$", fields.get("Variety", "")):
-        fields["Variety"] = ""
+    return candidate_line
 
+def _export_rows(text: str, fields: Dict[str, str], name: str, debug: bool) -> pd.DataFrame:
+    """One row per unique batch (or a single row when there are none)."""
     # 4. BATCH ROWS
     bag_counts = re.findall(r"(\d[\d\.,]*)\s+BAGS\b", text, FLAGS)
     pal_counts = re.findall(r"\b(\d+(?:[.,]\d+)?)\s+PAL\b", text, FLAGS)
@@ -244,7 +475,7 @@ def parse_export_pdf(
             rows.append([row.get(c, "") for c in EXPECTED_COLUMNS])
     else:
         if debug:
-            print(f"[WARN] {pdf_path.name}: No batches found.")
+            print(f"[WARN] {name}: No batches found.")
         rows.append([fields.get(c, "") for c in EXPECTED_COLUMNS])
 
     df = pd.DataFrame(rows, columns=EXPECTED_COLUMNS)
@@ -257,8 +488,11 @@ def run(
     use_ocr: bool = False,
     debug: bool = False,
     generate_qc: bool = False,
+    max_ocr_workers: int = 1,
 ) -> None:
-    df = parse_export_pdf(input_pdf, use_ocr=use_ocr, debug=debug)
+    df = parse_export_pdf(
+        input_pdf, use_ocr=use_ocr, debug=debug, max_ocr_workers=max_ocr_workers
+    )
     df.to_csv(out, index=False)
 
     if generate_qc:
@@ -275,35 +509,178 @@ def run(
         if debug:
             print(f"[QC] Report written to {report_path}")
 
+def parser_version(use_ocr: bool = False) -> str:
+    """Identifies the code + options that produced a set of export rows."""
+    return f"{modules_fingerprint(PARSER_MODULES)}-ocr{int(use_ocr)}"
+
+def _parse_batch_file(
+    pdf: BatchInput,
+    *,
+    use_ocr: bool,
+    debug: bool,
+    max_ocr_workers: int,
+    product_table: Path | None = None,
+) -> Dict[str, Any]:
+    """Parse one PDF for run_batch (module-level so worker processes can run it).
+
+    Besides the rows, hands back the product lines this process parsed for
+    the first time so the parent can persist them.
+    """
+    warm_product_lines(product_table)
+    df = parse_export_pdf(
+        batch_source(pdf), use_ocr=use_ocr, debug=debug, max_ocr_workers=max_ocr_workers
+    )
+    return _batch_result(df, pdf.name)
+
+def _parse_corpus_doc(
+    doc: CorpusDoc, *, debug: bool, product_table: Path | None = None
+) -> Dict[str, Any]:
+    """Like _parse_batch_file, for a document of a text corpus."""
+    warm_product_lines(product_table)
+    return _batch_result(parse_export_pages(doc.pages, doc.name, debug), doc.name)
+
+def _leading_text(doc: CorpusDoc) -> str:
+    """A corpus document's text up to its terms / appendix pages."""
+    return "\n".join(select_pages(doc.pages, stop_at=is_stop_page))
+
+def _batch_result(df: pd.DataFrame, name: str) -> Dict[str, Any]:
+    df["Source_File"] = name
+    return {
+        "rows": df.fillna("").to_dict("records"),
+        "product_lines": PRODUCT_LINE_MEMO.take_new(),
+    }
+
+def _combined_outputs(output_dir: Path) -> List[CombinedOutput]:
+    return [CombinedOutput("rows", output_dir / "export_combined.csv", EXPECTED_COLUMNS + ["Source_File"])]
+
 def run_batch(
     input_dir: Path,
     output_dir: Path,
     *,
     use_ocr: bool = False,
     debug: bool = False,
+    max_ocr_workers: int = 1,
+    workers: int = 1,
+    incremental: bool = False,
+    duplicates: str = "fanout",
+    two_phase: bool = True,
+    timeout: Optional[float] = None,
+    resume: bool = False,
+    progress: Optional[Callable[[ProgressEvent], None]] = None,
+    token: Optional[RunToken] = None,
+    files: Optional[List[BatchInput]] = None,
 ) -> None:
     """
     Batch-process all export PDFs in `input_dir` and write a single combined CSV
-    to `output_dir/export_combined.csv`.
-    """
-    out_file = output_dir / "export_combined.csv"
+    to `output_dir/export_combined.csv`. `input_dir` may also be a .zip: its
+    PDF members are read in memory and Source_File is the member name.
 
-    pdf_files = sorted(input_dir.glob("*.pdf"))
-    print(f"[EXPORT] Found {len(pdf_files)} PDFs in {input_dir}")
+    Rows are streamed to the CSV as each file finishes (in sorted file order,
+    even with `workers` > 1 on a process pool), so memory stays flat and an
+    interrupted run leaves its rows so far in `<csv>.partial`.
 
-    all_dfs: list[pd.DataFrame] = []
-    for pdf in pdf_files:
-        try:
-            df = parse_export_pdf(str(pdf), use_ocr=use_ocr, debug=debug)
-            df["Source_File"] = pdf.name
-            all_dfs.append(df)
-        except Exception as e:
-            print(f"[EXPORT] ERROR processing {pdf.name}: {e}")
-
-    if not all_dfs:
-        print("[EXPORT] No data collected.")
-        return
+    With `incremental=True` a manifest next to the CSV remembers what was
+    parsed; unchanged PDFs are skipped and their previous rows reused.
+
+    PDFs with identical content are parsed once; `duplicates` decides
+    whether their rows are repeated per file name ("fanout"), written for
+    the first name only ("collapse"), or whether every copy is parsed
+    ("off").
+
+    With `use_ocr` and `two_phase`, every file is first parsed without OCR
+    and written straight away; only files with no text or empty key fields
+    are then OCR'd on a separate pool and their rows replaced.
+
+    With a `timeout` (seconds), each file is parsed in a supervised worker;
+    a file that runs longer is killed, reported as a TIMEOUT and left out,
+    and the rest of the batch carries on.
+
+    With `resume=True`, progress is kept in a job table next to the CSV
+    (see shared/jobs.py): re-running after a crash or power cut only
+    parses the files the interrupted run didn't finish.
+
+    `progress` receives a ProgressEvent per file (see shared/progress.py).
+    Cancelling `token` (shared/cancel.py) stops the run between pages and
+    keeps what was written so far.
+
+    `files` limits the run to those inputs of `input_dir` (e.g. the ones
+    shared/classify.py routed to this pipeline); by default all its PDFs.
+    """
+    pdf_files = list_batch_inputs(input_dir) if files is None else list(files)
+    print(f"[EXPORT] Found {len(pdf_files)} PDFs in {input_dir}")
 
-    combined = pd.concat(all_dfs, ignore_index=True)
-    combined.to_csv(out_file, index=False)
-    print(f"[EXPORT] Wrote combined CSV: {out_file}")
+    manifest = None
+    if incremental:
+        manifest = Manifest.load(output_dir / "export_combined.manifest.json")
+    jobs = JobQueue(output_dir / "export_combined.jobs.sqlite") if resume else None
+
+    # Workers start from the product lines earlier runs already parsed
+    table = product_table_path()
+    prepare_product_table(table)
+    parse_one = partial(
+        _parse_batch_file,
+        use_ocr=use_ocr,
+        debug=debug,
+        max_ocr_workers=ocr_workers_per_file(max_ocr_workers, workers),
+        product_table=table,
+    )
+    options: Dict[str, Any] = dict(
+        manifest=manifest,
+        duplicates=duplicates,
+        timeout=timeout,
+        jobs=jobs,
+        progress=progress,
+        token=token,
+        parser_version=parser_version(use_ocr),
+        on_result=learn_product_lines,
+    )
+    try:
+        if use_ocr and two_phase:
+            # Text parsing and OCR run side by side; split the cores between them
+            budget = plan_cpu_budget(workers, max_ocr_workers=max_ocr_workers)
+            run_two_phase_batch(
+                "EXPORT",
+                pdf_files,
+                partial(parse_one, use_ocr=False, max_ocr_workers=1),
+                partial(parse_one, max_ocr_workers=budget.ocr_pages_per_file),
+                _combined_outputs(output_dir),
+                workers=budget.parse_workers,
+                ocr_workers=budget.ocr_workers,
+                **options,
+            )
+        else:
+            run_combined_batch(
+                "EXPORT", pdf_files, parse_one, _combined_outputs(output_dir), workers=workers, **options
+            )
+    finally:
+        if jobs is not None:
+            jobs.close()
+    save_product_lines(table)
+
+def run_corpus_batch(
+    corpus_path: Path,
+    output_dir: Path,
+    *,
+    debug: bool = False,
+    workers: int = 1,
+) -> None:
+    """
+    Re-parse every document of a text corpus (see shared/corpus.py) into
+    `output_dir/export_combined.csv`, without opening a single PDF.
+    """
+    docs = read_corpus(corpus_path)
+    print(f"[EXPORT] Re-parsing {len(docs)} document(s) from {corpus_path}")
+
+    table = product_table_path()
+    prepare_product_table(table)
+    prime_product_lines((product_candidate_line(_leading_text(doc)) for doc in docs), table)
+    run_combined_batch(
+        "EXPORT",
+        docs,
+        partial(_parse_corpus_doc, debug=debug, product_table=table),
+        _combined_outputs(output_dir),
+        workers=workers,
+        duplicates="off",
+        on_result=learn_product_lines,
+    )
+    save_product_lines(table)
@@ -15,6 +15,11 @@ from ParsingTool.core.controller import ProcessingController
 # --- NEW MODULE IMPORTS ---
 from ParsingTool.interfaces.gui import theme
 from ParsingTool.common.system import is_installed
+from ParsingTool.parsing.shared.archive import is_zip_input, list_batch_inputs
+from ParsingTool.parsing.shared.batch import default_batch_workers
+from ParsingTool.parsing.shared.cancel import RunToken
+from ParsingTool.parsing.shared.progress import LOG, format_progress
+from ParsingTool.parsing.shared.ocr import default_ocr_workers
 
 
 
@@ -91,7 +96,7 @@ def run_gui() -> None:
 
     # Buttons
     def browse_file() -> None:
-        p = filedialog.askopenfilename(filetypes=[("PDF files", "*.pdf")])
+        p = filedialog.askopenfilename(filetypes=[("PDF files", "*.pdf"), ("ZIP archives", "*.zip")])
         if p:
             file_entry.delete(0, tk.END)
             file_entry.insert(0, p)
@@ -162,6 +167,16 @@ def run_gui() -> None:
         font=theme.FONT_CHECK,
     ).pack(side="left", padx=20)
 
+    tk.Radiobutton(
+        step2,
+        text="Auto (mixed folder)",
+        variable=mode_var,
+        value="auto",
+        bg=theme.BG_PANEL,
+        fg=theme.FG_TEXT,
+        font=theme.FONT_CHECK,
+    ).pack(side="left", padx=20)
+
     # -------------------------------------------------------------------
     # STEP 3: OPTIONS (LabelFrame - "Advanced")
     # -------------------------------------------------------------------
@@ -219,8 +234,11 @@ def run_gui() -> None:
     # -------------------------------------------------------------------
     # LOG & ACTION
     # -------------------------------------------------------------------
+    action_frame = tk.Frame(main_frame, bg=theme.BG_MAIN)
+    action_frame.grid(row=3, column=0, pady=10)
+
     process_btn = tk.Button(
-        main_frame,
+        action_frame,
         text="PROCESS FILES",
         font=("Ubuntu", 12, "bold"),
         bg=theme.BUTTON_BG,
@@ -228,7 +246,20 @@ def run_gui() -> None:
         height=2,
         width=20,
     )
-    process_btn.grid(row=3, column=0, pady=10)
+    process_btn.pack(side="left", padx=5)
+
+    pause_btn = tk.Button(
+        action_frame, text="PAUSE", font=theme.FONT_BUTTON, width=10, state=tk.DISABLED
+    )
+    pause_btn.pack(side="left", padx=5)
+
+    cancel_btn = tk.Button(
+        action_frame, text="CANCEL", font=theme.FONT_BUTTON, width=10, state=tk.DISABLED
+    )
+    cancel_btn.pack(side="left", padx=5)
+
+    # The token of the run in progress (None when idle)
+    current_run = {"token": None}
 
     log_label = tk.Label(
         main_frame, text="Processing Log:", bg=theme.BG_MAIN, fg=theme.FG_TEXT, font=theme.FONT_LABEL
@@ -248,21 +279,70 @@ def run_gui() -> None:
 
         root.after(0, _insert)
 
+    def show_progress(events, snapshot) -> None:
+        # One UI update per batch of events (a few per second at most)
+        lines = [e.message for e in events if e.kind == LOG]
+        title = "Processing Log:"
+        if snapshot.total:
+            title += f"  {format_progress(snapshot)}"
+
+        def _update() -> None:
+            if lines:
+                log_box.insert(tk.END, "\n".join(lines) + "\n")
+                log_box.see(tk.END)
+            log_label.config(text=title)
+
+        root.after(0, _update)
+
     # -------------------------------------------------------------------
     # LOGIC
     # -------------------------------------------------------------------
     def run_processing_thread(
-        pdfs, outdir, mode, debug, use_ocr, run_qc, combine, folder_path
+        pdfs, outdir, mode, debug, use_ocr, run_qc, combine, folder_path, token
     ) -> None:
-        controller = ProcessingController(log)
-        controller.run(
-            pdfs, outdir, mode, debug, use_ocr, run_qc, combine, folder_path
-        )
-        
-        # Re-enable button
-        root.after(
-            0, lambda: process_btn.config(state=tk.NORMAL, text="PROCESS FILES")
+        controller = ProcessingController(
+            log,
+            max_ocr_workers=default_ocr_workers(),
+            workers=default_batch_workers(),
+            on_progress=show_progress,
         )
+        try:
+            controller.run(
+                pdfs, outdir, mode, debug, use_ocr, run_qc, combine, folder_path,
+                token=token,
+            )
+        finally:
+            token.close()
+
+        def _idle() -> None:
+            current_run["token"] = None
+            process_btn.config(state=tk.NORMAL, text="PROCESS FILES")
+            pause_btn.config(state=tk.DISABLED, text="PAUSE")
+            cancel_btn.config(state=tk.DISABLED)
+
+        root.after(0, _idle)
+
+    def toggle_pause() -> None:
+        token = current_run["token"]
+        if token is None:
+            return
+        if token.paused:
+            token.resume()
+            pause_btn.config(text="PAUSE")
+            log("Resumed.")
+        else:
+            token.pause()
+            pause_btn.config(text="RESUME")
+            log("Pausing after the current page...")
+
+    def cancel_run() -> None:
+        token = current_run["token"]
+        if token is None:
+            return
+        token.cancel()
+        pause_btn.config(state=tk.DISABLED)
+        cancel_btn.config(state=tk.DISABLED)
+        log("Cancelling after the current page...")
 
     def start_process() -> None:
         outdir = Path(output_entry.get().strip() or ".")
@@ -270,10 +350,14 @@ def run_gui() -> None:
         folder_path = folder_entry.get().strip()
 
         pdfs = []
-        if file_path:
+        if file_path and is_zip_input(Path(file_path)):
+            # A ZIP of PDFs is processed like a folder
+            folder_path = file_path
+            pdfs = list_batch_inputs(Path(file_path))
+        elif file_path:
             pdfs = [Path(file_path)]
         elif folder_path:
-            pdfs = sorted(Path(folder_path).glob("*.pdf"))
+            pdfs = list_batch_inputs(Path(folder_path))
 
         if not pdfs:
             messagebox.showerror("Error", "Please select a file or folder first.")
@@ -281,6 +365,10 @@ def run_gui() -> None:
 
         outdir.mkdir(parents=True, exist_ok=True)
         process_btn.config(state=tk.DISABLED, text="Running...")
+        token = RunToken()
+        current_run["token"] = token
+        pause_btn.config(state=tk.NORMAL, text="PAUSE")
+        cancel_btn.config(state=tk.NORMAL)
 
         mode = mode_var.get()
         t = threading.Thread(
@@ -294,12 +382,15 @@ def run_gui() -> None:
                 qc_var.get(),
                 combine_var.get(),
                 folder_path,
+                token,
             ),
             daemon=True,
         )
         t.start()
 
     process_btn.config(command=start_process)
+    pause_btn.config(command=toggle_pause)
+    cancel_btn.config(command=cancel_run)
 
     # -------------------------------------------------------------------
     # STATUS BAR
@@ -329,30 +420,28 @@ def run_gui() -> None:
     )
     ocr_status_lbl.grid(row=0, column=1)
 
-    popp_lbl = tk.Label(
+    render_lbl = tk.Label(
         status,
-        text="POPPLER UTILS",
+        text="PYMUPDF RENDER",
         bg=theme.BG_STATUS,
         fg=theme.FG_MUTED,
         font=theme.FONT_STATUS_SIDE,
     )
-    popp_lbl.grid(row=0, column=2, sticky="e", padx=10)
+    render_lbl.grid(row=0, column=2, sticky="e", padx=10)
 
     def update_ocr_status() -> None:
         tess_ok = is_installed("tesseract")
-        popp_ok = is_installed("pdftoppm")
 
         if tess_ok:
             tess_lbl.config(text="✓  TESSERACT", fg=theme.FG_OK, font=theme.FONT_STATUS_SIDE)
         else:
             tess_lbl.config(text="✗  TESSERACT", fg=theme.FG_ERROR, font=theme.FONT_STATUS_SIDE)
 
-        if popp_ok:
-            popp_lbl.config(text="POPPLER  ✓", fg=theme.FG_OK, font=theme.FONT_STATUS_SIDE)
-        else:
-            popp_lbl.config(text="POPPLER  ✗", fg=theme.FG_ERROR, font=theme.FONT_STATUS_SIDE)
+        # Pages are rendered for OCR by PyMuPDF (a core dependency), so
+        # Tesseract is the only external tool OCR needs.
+        render_lbl.config(text="PYMUPDF RENDER  ✓", fg=theme.FG_OK, font=theme.FONT_STATUS_SIDE)
 
-        if tess_ok and popp_ok:
+        if tess_ok:
             ocr_status_lbl.config(
                 text="OCR  READY", fg=theme.FG_OK, font=theme.FONT_STATUS_MAIN
             )
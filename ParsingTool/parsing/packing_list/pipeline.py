@@ -4,24 +4,61 @@ Specialised for '_PI.pdf' files which explicitly list PAL quantities
 and have a cleaner 'Packer' layout than ZAPI files.
 """
 from __future__ import annotations
+from functools import partial
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 import re
 import pandas as pd
 
-from ..shared.pdf_utils import extract_text
-from ..shared.export_patterns import EXPORT_FIELD_PATTERNS
+from ..shared.archive import BatchInput, batch_source, list_batch_inputs
+from ..shared.batch import (
+    CombinedOutput,
+    ocr_workers_per_file,
+    plan_cpu_budget,
+    run_combined_batch,
+    run_two_phase_batch,
+)
+from ..shared.cancel import RunToken
+from ..shared.corpus import CorpusDoc, read_corpus
+from ..shared.fingerprint import modules_fingerprint
+from ..shared.jobs import JobQueue
+from ..shared.manifest import Manifest
+from ..shared.progress import ProgressEvent
+from ..shared.pdf_utils import PdfSource, extract_text, pdf_source_name, select_pages
+from ..shared.result_cache import cached_frame, text_parser_fingerprint
+from ..shared.export_patterns import EXPORT_FIELD_EXTRACTOR, EXPORT_FIELD_PATTERNS
 from ..qc import EXPECTED_COLUMNS
-from ..export_orders.pipeline import parse_product_line
+from ..export_orders.pipeline import (
+    EARLY_STOP_MAX_PAGES,
+    PRODUCT_LINE_MEMO,
+    is_stop_page,
+    learn_product_lines,
+    parse_product_line,
+    prepare_product_table,
+    prime_product_lines,
+    product_table_path,
+    save_product_lines,
+    warm_product_lines,
+)
 
 
 # Reuse your shared patterns
 FIELD_PATTERNS = EXPORT_FIELD_PATTERNS
 FLAGS = re.IGNORECASE | re.MULTILINE
 
-def _find_line(pattern: str, text: str) -> str:
-    """Helper to find a single value using a regex pattern."""
-    match = re.search(pattern, text, FLAGS)
+# Modules whose code decides this pipeline's output (see shared/fingerprint.py)
+PARSER_MODULES = (
+    __name__,
+    "ParsingTool.parsing.export_orders.pipeline",  # parse_product_line
+    "ParsingTool.parsing.shared.export_patterns",
+    "ParsingTool.parsing.shared.product_tokens",
+    "ParsingTool.parsing.shared.schemas",
+    "ParsingTool.parsing.shared.pdf_utils",
+)
+
+def _match_value(match: re.Match | None) -> str:
+    """Value of a pattern match, minus header words the regex grabbed by mistake."""
     if match:
         val = match.group(1).strip()
         # Filter out common header noise if the regex grabs the label itself
@@ -30,19 +67,68 @@ def _find_line(pattern: str, text: str) -> str:
         return val
     return ""
 
+def _find_line(pattern: str, text: str) -> str:
+    """Helper to find a single value using a regex pattern."""
+    return _match_value(re.search(pattern, text, FLAGS))
+
+def _read_enough(pages: List[str]) -> bool:
+    """Stop reading once every column is filled (checked on the first pages only)."""
+    if len(pages) > EARLY_STOP_MAX_PAGES:
+        return False
+    fields = _pi_fields("\n".join(pages))
+    return all(fields.get(c) for c in EXPECTED_COLUMNS)
+
 def parse_pi_pdf(
-    pdf_path: Path | str,
+    pdf_path: PdfSource,
     debug: bool = False,
     use_ocr: bool = False,
+    max_ocr_workers: int = 1,
+    early_stop: bool = True,
+) -> pd.DataFrame:
+    """Parse one PI PDF (path, bytes or binary file object) into a single row.
+
+    With `early_stop`, pages after a terms/appendix heading are never read,
+    and reading stops as soon as every column is filled. Rows parsed before
+    from the same text by the same code come from the result cache.
+    """
+    gates: Dict[str, Any] = {"stop_at": is_stop_page, "until": _read_enough} if early_stop else {}
+    text = extract_text(
+        pdf_path, debug=debug, use_ocr=use_ocr, max_ocr_workers=max_ocr_workers, **gates
+    )
+
+    return _pi_frame(text, debug)
+
+def parse_pi_pages(
+    pages: Iterable[str],
+    name: str = "",
+    debug: bool = False,
+    early_stop: bool = True,
 ) -> pd.DataFrame:
-    pdf_path = Path(pdf_path)
-    text = extract_text(str(pdf_path), debug=debug, use_ocr=use_ocr)
+    """Parse a PI from its already-extracted pages (e.g. a text corpus),
+    reading the same pages parse_pi_pdf would."""
+    if early_stop:
+        pages = select_pages(pages, stop_at=is_stop_page, until=_read_enough, debug=debug)
+    return _pi_frame("\n".join(pages), debug)
+
+def _pi_frame(text: str, debug: bool = False) -> pd.DataFrame:
+    return cached_frame(
+        "pi", text_parser_fingerprint(PARSER_MODULES), text, _pi_rows, debug=debug
+    )
 
+def _pi_rows(text: str) -> pd.DataFrame:
+    fields = _pi_fields(text)
+
+    # 5. Build Row(s) and return DataFrame
+    row = [fields.get(c, "") for c in EXPECTED_COLUMNS]
+    return pd.DataFrame([row], columns=EXPECTED_COLUMNS)
+
+def _pi_fields(text: str) -> Dict[str, str]:
     fields: dict[str, str] = {}
 
     # 1. Standard Fields (Headers) using shared patterns
-    for field, pattern in FIELD_PATTERNS.items():
-        fields[field] = _find_line(pattern, text)
+    for field, match in EXPORT_FIELD_EXTRACTOR.first_matches(text).items():
+        fields[field] = _match_value(match)
+    shared_destination = fields["Destination"]
 
     # 2. PI-Specific: Explicit Pallet Count (e.g. "22.000 PAL")
     pal_match = re.search(r"\b(\d+(?:[.,]\d+)?)\s+PAL\b", text, FLAGS)
@@ -76,11 +162,9 @@ def parse_pi_pdf(
             else:
                 # 3) Last resort: use export's Destination pattern,
                 #    but ignore lines that are actually "Shipping Line"
-                dest_pat = EXPORT_FIELD_PATTERNS.get("Destination")
-                if dest_pat:
-                    dest_val = _find_line(dest_pat, text)
-                    if dest_val and not dest_val.strip().startswith("Shipping Line"):
-                        fields["Destination"] = dest_val.strip()
+                dest_val = shared_destination
+                if dest_val and not dest_val.strip().startswith("Shipping Line"):
+                    fields["Destination"] = dest_val.strip()
 
     # Pallet – e.g. "PLASTIC export pallets", "fibre export pallets"
     m = re.search(r"loaded on\s+([A-Za-z ]+pallets?)", text, FLAGS)
@@ -103,12 +187,9 @@ def parse_pi_pdf(
             fields["Fumigation"] = matches[-1].strip()
 
     # 4. Product Description – reuse export product parser
-    # Find the first line that looks like a product description
-    desc_match = re.search(
-        r"^.*(?:Almonds|Alm|Kern|Inshell).*$", text, FLAGS | re.MULTILINE
-    )
-    if desc_match:
-        parsed = parse_product_line(desc_match.group(0))
+    desc_line = _product_candidate_line(text)
+    if desc_line:
+        parsed = parse_product_line(desc_line)
         # Copy the parsed fields into our fields dict
         for key in ("Variety", "Grade", "Size", "Packaging"):
             if parsed.get(key):
@@ -122,21 +203,69 @@ def parse_pi_pdf(
         if value:
             fields["Destination"] = value
 
-    # 5. Build Row(s) and return DataFrame
-    row = [fields.get(c, "") for c in EXPECTED_COLUMNS]
-    return pd.DataFrame([row], columns=EXPECTED_COLUMNS)
+    return fields
+
+def _product_candidate_line(text: str) -> str:
+    """The first line that looks like a product description ("" if none)."""
+    desc_match = re.search(
+        r"^.*(?:Almonds|Alm|Kern|Inshell).*$", text, FLAGS | re.MULTILINE
+    )
+    return desc_match.group(0) if desc_match else ""
 
 def run(
     *,
-    input_pdf: str,
+    input_pdf: PdfSource,
     out: str,
     use_ocr: bool = False,
     debug: bool = False,
+    max_ocr_workers: int = 1,
 ) -> None:
-    df = parse_pi_pdf(input_pdf, use_ocr=use_ocr, debug=debug)
+    df = parse_pi_pdf(
+        input_pdf, use_ocr=use_ocr, debug=debug, max_ocr_workers=max_ocr_workers
+    )
     df.to_csv(out, index=False)
     if debug:
-        print(f"Processed PI: {input_pdf}")
+        print(f"Processed PI: {pdf_source_name(input_pdf)}")
+
+def parser_version(use_ocr: bool = False) -> str:
+    """Identifies the code + options that produced a set of PI rows."""
+    return f"{modules_fingerprint(PARSER_MODULES)}-ocr{int(use_ocr)}"
+
+def _parse_batch_file(
+    pdf: BatchInput,
+    *,
+    use_ocr: bool,
+    debug: bool,
+    max_ocr_workers: int,
+    product_table: Path | None = None,
+) -> Dict[str, Any]:
+    """Parse one PDF for run_batch (module-level so worker processes can run it).
+
+    Besides the rows, hands back the product lines this process parsed for
+    the first time so the parent can persist them.
+    """
+    warm_product_lines(product_table)
+    df = parse_pi_pdf(
+        batch_source(pdf), use_ocr=use_ocr, debug=debug, max_ocr_workers=max_ocr_workers
+    )
+    return _batch_result(df, pdf.name)
+
+def _parse_corpus_doc(
+    doc: CorpusDoc, *, debug: bool, product_table: Path | None = None
+) -> Dict[str, Any]:
+    """Like _parse_batch_file, for a document of a text corpus."""
+    warm_product_lines(product_table)
+    return _batch_result(parse_pi_pages(doc.pages, doc.name, debug), doc.name)
+
+def _batch_result(df: pd.DataFrame, name: str) -> Dict[str, Any]:
+    df["Source_File"] = name
+    return {
+        "rows": df.fillna("").to_dict("records"),
+        "product_lines": PRODUCT_LINE_MEMO.take_new(),
+    }
+
+def _combined_outputs(output_dir: Path) -> List[CombinedOutput]:
+    return [CombinedOutput("rows", output_dir / "pi_combined.csv", EXPECTED_COLUMNS + ["Source_File"])]
 
 def run_batch(
     input_dir: Path,
@@ -144,41 +273,145 @@ def run_batch(
     *,
     use_ocr: bool = False,
     debug: bool = False,
+    max_ocr_workers: int = 1,
+    workers: int = 1,
+    incremental: bool = False,
+    duplicates: str = "fanout",
+    two_phase: bool = True,
+    timeout: Optional[float] = None,
+    resume: bool = False,
+    progress: Optional[Callable[[ProgressEvent], None]] = None,
+    token: Optional[RunToken] = None,
+    files: Optional[List[BatchInput]] = None,
 ) -> None:
     """
-    Batch-process PI / packing list PDFs in `input_dir` and write
-    a single combined CSV to `output_dir/pi_combined.csv`.
-    """
-    out_file = output_dir / "pi_combined.csv"
+    Batch-process PI / packing list PDFs in `input_dir` (a folder, or a .zip
+    whose PDF members are read in memory) and write a single combined CSV
+    to `output_dir/pi_combined.csv`.
+
+    Rows are streamed to the CSV as each file finishes (in sorted file order,
+    even with `workers` > 1 on a process pool), so memory stays flat and an
+    interrupted run leaves its rows so far in `<csv>.partial`.
+
+    With `incremental=True` a manifest next to the CSV remembers what was
+    parsed; unchanged PDFs are skipped and their previous rows reused.
+
+    PDFs with identical content are parsed once; `duplicates` decides
+    whether their rows are repeated per file name ("fanout"), written for
+    the first name only ("collapse"), or whether every copy is parsed
+    ("off").
+
+    With `use_ocr` and `two_phase`, every file is first parsed without OCR
+    and written straight away; only files with no text or empty key fields
+    are then OCR'd on a separate pool and their rows replaced.
+
+    With a `timeout` (seconds), each file is parsed in a supervised worker;
+    a file that runs longer is killed, reported as a TIMEOUT and left out,
+    and the rest of the batch carries on.
+
+    With `resume=True`, progress is kept in a job table next to the CSV
+    (see shared/jobs.py): re-running after a crash or power cut only
+    parses the files the interrupted run didn't finish.
 
-    pdf_files = sorted(input_dir.glob("*.pdf"))
+    `progress` receives a ProgressEvent per file (see shared/progress.py).
+    Cancelling `token` (shared/cancel.py) stops the run between pages and
+    keeps what was written so far.
+
+    `files` limits the run to those inputs of `input_dir` (e.g. the ones
+    shared/classify.py routed to this pipeline); by default all its PDFs.
+    """
+    pdf_files = list_batch_inputs(input_dir) if files is None else list(files)
     print(f"[PI] Found {len(pdf_files)} PDFs in {input_dir}")
 
-    all_dfs: list[pd.DataFrame] = []
-    for pdf in pdf_files:
-        try:
-            # Note: parse_pi_pdf signature: (pdf_path, debug=False, use_ocr=False)
-            df = parse_pi_pdf(pdf, use_ocr=use_ocr, debug=debug)
-            df["Source_File"] = pdf.name
-            all_dfs.append(df)
-        except Exception as e:
-            print(f"[PI] ERROR processing {pdf.name}: {e}")
+    manifest = None
+    if incremental:
+        manifest = Manifest.load(output_dir / "pi_combined.manifest.json")
+    jobs = JobQueue(output_dir / "pi_combined.jobs.sqlite") if resume else None
 
-    if not all_dfs:
-        print("[PI] No data collected.")
-        return
+    # Workers start from the product lines earlier runs already parsed
+    table = product_table_path()
+    prepare_product_table(table)
+    parse_one = partial(
+        _parse_batch_file,
+        use_ocr=use_ocr,
+        debug=debug,
+        max_ocr_workers=ocr_workers_per_file(max_ocr_workers, workers),
+        product_table=table,
+    )
+    options: Dict[str, Any] = dict(
+        manifest=manifest,
+        duplicates=duplicates,
+        timeout=timeout,
+        jobs=jobs,
+        progress=progress,
+        token=token,
+        parser_version=parser_version(use_ocr),
+        on_result=learn_product_lines,
+    )
+    try:
+        if use_ocr and two_phase:
+            # Text parsing and OCR run side by side; split the cores between them
+            budget = plan_cpu_budget(workers, max_ocr_workers=max_ocr_workers)
+            run_two_phase_batch(
+                "PI",
+                pdf_files,
+                partial(parse_one, use_ocr=False, max_ocr_workers=1),
+                partial(parse_one, max_ocr_workers=budget.ocr_pages_per_file),
+                _combined_outputs(output_dir),
+                workers=budget.parse_workers,
+                ocr_workers=budget.ocr_workers,
+                **options,
+            )
+        else:
+            run_combined_batch(
+                "PI", pdf_files, parse_one, _combined_outputs(output_dir), workers=workers, **options
+            )
+    finally:
+        if jobs is not None:
+            jobs.close()
+    save_product_lines(table)
 
-    combined = pd.concat(all_dfs, ignore_index=True)
-    combined.to_csv(out_file, index=False)
-    print(f"[PI] Wrote combined CSV: {out_file}")
+def run_corpus_batch(
+    corpus_path: Path,
+    output_dir: Path,
+    *,
+    debug: bool = False,
+    workers: int = 1,
+) -> None:
+    """
+    Re-parse every document of a text corpus (see shared/corpus.py) into
+    `output_dir/pi_combined.csv`, without opening a single PDF.
+    """
+    docs = read_corpus(corpus_path)
+    print(f"[PI] Re-parsing {len(docs)} document(s) from {corpus_path}")
+
+    table = product_table_path()
+    prepare_product_table(table)
+    prime_product_lines(
+        (_product_candidate_line("\n".join(select_pages(d.pages, stop_at=is_stop_page))) for d in docs),
+        table,
+    )
+    run_combined_batch(
+        "PI",
+        docs,
+        partial(_parse_corpus_doc, debug=debug, product_table=table),
+        _combined_outputs(output_dir),
+        workers=workers,
+        duplicates="off",
+        on_result=learn_product_lines,
+    )
+    save_product_lines(table)
 
 def parse_packing_list_pdf(
-    pdf_path: Path | str,
+    pdf_path: PdfSource,
     use_ocr: bool = False,
     debug: bool = False,
+    max_ocr_workers: int = 1,
 ) -> pd.DataFrame:
     """
     Compatibility wrapper so the batch runner can call the PI parser
     as `parse_packing_list_pdf(...)`.
     """
-    return parse_pi_pdf(pdf_path, debug=debug, use_ocr=use_ocr)
+    return parse_pi_pdf(
+        pdf_path, debug=debug, use_ocr=use_ocr, max_ocr_workers=max_ocr_workers
+    )
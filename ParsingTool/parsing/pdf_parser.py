@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-from pathlib import Path
 import re
 from typing import Any, Dict
 
 import pandas as pd
 
 from .qc import EXPECTED_COLUMNS
-from .shared.pdf_utils import extract_text
+from .shared.pdf_utils import PdfSource, extract_text
 from .shared.export_patterns import EXPORT_FIELD_PATTERNS
 
 # Backwards-compat alias: other modules may still refer to FIELD_PATTERNS
@@ -34,7 +33,7 @@ def _parse_fields(text: str) -> Dict[str, Any]:
 
 
 def parse_pdf(
-    pdf_path: Path | str,
+    pdf_path: PdfSource,
     debug: bool = False,
     use_ocr: bool = False,
 ) -> pd.DataFrame:
@@ -50,10 +49,8 @@ def parse_pdf(
     You can improve the regex patterns over time as you see real-world
     documents that do not quite match.
     """
-    pdf_path = Path(pdf_path)
-
-    # Call extract_text directly
-    text = extract_text(str(pdf_path), debug=debug, use_ocr=use_ocr)
+    # Call extract_text directly (it also takes PDF bytes / file objects)
+    text = extract_text(pdf_path, debug=debug, use_ocr=use_ocr)
 
     # Turn the raw text into a dict of field -> value.
     fields = _parse_fields(text)
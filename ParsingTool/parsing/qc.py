@@ -101,6 +101,21 @@ def validate(df: pd.DataFrame, source_name: str) -> Dict[str, Any]:
     return report
 
 
+def processing_failure(source_name: str, error: str, kind: str = "error") -> Dict[str, Any]:
+    """QC entry for a PDF that produced no rows, e.g. because it timed out.
+
+    `kind` is a short label for the report ("timeout", "crash", ...).
+    """
+    return {
+        "source": source_name,
+        "failure": kind,
+        "error": error,
+        "missing_columns": [],
+        "invalid_grades": [],
+        "invalid_sizes": [],
+    }
+
+
 def write_report(reports: List[Dict[str, Any]], out_path: Path) -> None:
     """GUI helper: write one Markdown QC report for many PDFs.
 
@@ -122,6 +137,10 @@ def write_report(reports: List[Dict[str, Any]], out_path: Path) -> None:
         src = rep.get("source", "<unknown source>")
         lines.append(f"## {src}")
 
+        if rep.get("failure"):
+            lines.append(f"### Not processed ({rep['failure']})")
+            lines.append(f"- {rep.get('error', '')}")
+
         missing = rep.get("missing_columns", [])
         bad_grades = rep.get("invalid_grades", [])
         bad_sizes = rep.get("invalid_sizes", [])
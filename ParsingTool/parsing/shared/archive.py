@@ -0,0 +1,141 @@
+"""Batch inputs: a folder of PDFs, or the PDFs inside a ZIP archive.
+
+Suppliers send ZIPs of hundreds of PDFs. Rather than unpacking them to
+disk, a batch run lists the archive's PDF members as ``ZipMember`` items
+and each worker reads its member straight into memory and parses the
+bytes.
+
+A ``ZipMember`` only holds the archive path and the member name, so it is
+cheap to send to a worker process, and it looks enough like a ``Path``
+(``name``, ``stem``, ``stat()``, ``read_bytes()``) for the batch driver
+and the incremental manifest to treat both kinds of input the same way.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from types import SimpleNamespace
+from typing import List, Tuple, Union
+
+from .pdf_utils import PdfSource
+
+
+@dataclass(frozen=True, order=True)
+class ZipMember:
+    """One PDF inside a ZIP archive; `name` is the member name (Source_File)."""
+
+    archive: Path
+    name: str
+
+    @property
+    def stem(self) -> str:
+        return PurePosixPath(self.name).stem
+
+    def _info(self) -> zipfile.ZipInfo:
+        return _open_archive(*_archive_stamp(self.archive)).getinfo(self.name)
+
+    def stat(self) -> SimpleNamespace:
+        """Size and modification time of the member, like Path.stat()."""
+        info = self._info()
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        return SimpleNamespace(st_size=info.file_size, st_mtime=mtime)
+
+    def read_bytes(self) -> bytes:
+        return _open_archive(*_archive_stamp(self.archive)).read(self.name)
+
+    def __str__(self) -> str:
+        return f"{self.archive}::{self.name}"
+
+
+BatchInput = Union[Path, ZipMember]
+
+
+def _archive_stamp(archive: Path) -> Tuple[str, int, int]:
+    st = archive.stat()
+    return str(archive), st.st_size, st.st_mtime_ns
+
+
+# Archives kept open by this process, least recently used first
+_MAX_OPEN_ARCHIVES = 4
+_open_archives: "OrderedDict[Tuple[str, int, int], zipfile.ZipFile]" = OrderedDict()
+_open_pid = 0
+_open_lock = threading.Lock()
+
+
+def _open_archive(path: str, size: int, mtime_ns: int) -> zipfile.ZipFile:
+    """Keep recently used archives open so each member read doesn't parse
+    the central directory again. Size and mtime are part of the key, so a
+    replaced archive is opened afresh; archives pushed out are closed.
+
+    Handles are per process: a worker forked from a parent that had the
+    archive open would share the parent's file offset and read garbage
+    ("Bad magic number for file header"), so it opens its own.
+    """
+    global _open_pid
+    key = (path, size, mtime_ns)
+    with _open_lock:
+        if _open_pid != os.getpid():
+            # Inherited through fork: drop (don't close) the parent's handles
+            _open_archives.clear()
+            _open_pid = os.getpid()
+        zf = _open_archives.pop(key, None)
+        if zf is None:
+            zf = zipfile.ZipFile(path)
+            while len(_open_archives) >= _MAX_OPEN_ARCHIVES:
+                _open_archives.popitem(last=False)[1].close()
+        _open_archives[key] = zf
+        return zf
+
+
+def is_zip_input(path: Path) -> bool:
+    return path.suffix.lower() == ".zip" and path.is_file()
+
+
+def list_zip_pdfs(archive: Path) -> List[ZipMember]:
+    """Every PDF member of `archive` (any folder depth), sorted by name.
+
+    macOS resource-fork entries (__MACOSX/) are skipped.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        names = [
+            info.filename
+            for info in zf.infolist()
+            if not info.is_dir()
+            and info.filename.lower().endswith(".pdf")
+            and not info.filename.startswith("__MACOSX/")
+        ]
+    return sorted(ZipMember(archive, name) for name in names)
+
+
+def list_batch_inputs(input_path: Path) -> List[BatchInput]:
+    """The PDFs a batch run should process: a ZIP's PDF members, or the
+    *.pdf files directly inside a folder."""
+    if is_zip_input(input_path):
+        return list(list_zip_pdfs(input_path))
+    return sorted(input_path.glob("*.pdf"))
+
+
+def output_stem(item: BatchInput) -> str:
+    """File-name stem for the per-file outputs of a batch input.
+
+    A ZIP member's folders are kept ("orders/123.pdf" -> "orders__123"),
+    so members with the same name in different folders don't overwrite
+    each other's CSVs.
+    """
+    if isinstance(item, ZipMember):
+        return "__".join(PurePosixPath(item.name).with_suffix("").parts)
+    return item.stem
+
+
+def batch_source(item: BatchInput) -> PdfSource:
+    """What to hand a parse_* function for one batch input: the member's
+    bytes for a ZIP member (read in the worker), the path otherwise."""
+    if isinstance(item, ZipMember):
+        return item.read_bytes()
+    return str(item)
@@ -0,0 +1,702 @@
+"""Shared batch executor used by every pipeline's ``run_batch``.
+
+``map_files`` runs a per-file parse function over a list of inputs, either
+in this process (workers=1, the default) or on a process pool, and always
+yields the results in the *same order as the inputs*. That keeps combined
+CSVs deterministic no matter which worker finishes first.
+
+Errors are caught per file and returned alongside the result, so one bad
+PDF never stops the batch. With a `timeout`, files run on a SupervisedPool
+(see supervisor.py): a file that hangs or crashes its worker is recorded
+as a timeout / crash and its worker replaced.
+
+``run_combined_batch`` is the loop around it that every pipeline shares:
+it streams each file's rows straight into the combined CSV(s) as soon as
+the file is done, so memory stays flat however big the folder is. It also
+hashes the inputs first so a PDF that arrived twice under different names
+is only parsed once.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .cancel import RunToken, using_token
+from .csv_writer import CsvStreamWriter
+from .jobs import JobQueue
+from .manifest import Manifest, PreviousRows, file_sha256, plan_incremental
+from .ocr import limit_ocr_threads
+from .progress import FILE_FAILED, FILE_FINISHED, FILE_STARTED, STAGE_STARTED, ProgressEvent
+from .supervisor import FileTimeoutError, SupervisedPool, WorkerCrashedError
+
+
+@dataclass
+class FileResult:
+    """Outcome of parsing one input file."""
+
+    path: Any
+    value: Any = None
+    error: Optional[str] = None
+    error_type: Optional[str] = None  # exception class name, e.g. "NoTextError"
+    seconds: Optional[float] = None  # wall-clock time in the worker
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# Wall-clock budget of one file in the CLI and GUI (seconds). Generous: an
+# OCR'd scan takes tens of seconds, a hung one never finishes.
+DEFAULT_FILE_TIMEOUT = 300.0
+
+
+def default_batch_workers() -> int:
+    """A sensible pool size for batch runs: every core but one."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def ocr_workers_per_file(max_ocr_workers: int, workers: int) -> int:
+    """Split the OCR budget across batch workers so we don't oversubscribe.
+
+    With 8 batch workers each OCR'ing with 8 processes we'd have 64 Tesseract
+    processes fighting for 8 cores; instead each file gets its share.
+    """
+    if workers <= 1:
+        return max_ocr_workers
+    return max(1, max_ocr_workers // workers)
+
+
+@dataclass(frozen=True)
+class CpuBudget:
+    """How a run's cores are split between text parsing and OCR.
+
+    parse_workers + ocr_workers * ocr_pages_per_file never exceeds the
+    budget (except that each side always gets at least one process).
+    """
+
+    parse_workers: int
+    ocr_workers: int  # files OCR'd at the same time
+    ocr_pages_per_file: int  # Tesseract processes per OCR'd file
+
+
+def plan_cpu_budget(cores: int, *, max_ocr_workers: int = 1, use_ocr: bool = True) -> CpuBudget:
+    """Split `cores` between a large pool for text-layer parsing (files take
+    milliseconds) and a bounded pool for OCR (files take tens of seconds).
+
+    OCR gets at most half of the cores; within that, each OCR'd file uses
+    up to `max_ocr_workers` processes for its pages.
+    """
+    cores = max(1, cores)
+    if not use_ocr:
+        return CpuBudget(parse_workers=cores, ocr_workers=0, ocr_pages_per_file=1)
+    ocr_total = max(1, cores // 2)
+    pages = max(1, min(max_ocr_workers, ocr_total))
+    files = max(1, ocr_total // pages)
+    return CpuBudget(
+        parse_workers=max(1, cores - files * pages),
+        ocr_workers=files,
+        ocr_pages_per_file=pages,
+    )
+
+
+_Outcome = Tuple[Any, Optional[str], Optional[str], Optional[float]]
+
+
+def _call(func: Callable[[Any], Any], path: Any, token: Optional[RunToken] = None) -> _Outcome:
+    """Run func(path), timing it, and turn any exception into (error string,
+    class name): returns (value, error, error_type, seconds).
+
+    `token` is installed for the page loops to check; RunCancelled is not
+    an Exception and propagates.
+    """
+    started = time.perf_counter()
+    try:
+        with using_token(token):
+            value = func(path)
+    except Exception as e:
+        return None, str(e), type(e).__name__, time.perf_counter() - started
+    return value, None, None, time.perf_counter() - started
+
+
+def _outcome(future: Future) -> _Outcome:
+    """The _call tuple of a finished future, timeouts and crashes included."""
+    try:
+        return future.result()
+    except (FileTimeoutError, WorkerCrashedError) as e:
+        return None, str(e), type(e).__name__, None
+
+
+def map_files(
+    func: Callable[[Any], Any],
+    paths: Sequence[Any],
+    *,
+    workers: int = 1,
+    timeout: Optional[float] = None,
+    token: Optional[RunToken] = None,
+) -> Iterator[FileResult]:
+    """Apply ``func`` to every path and yield a FileResult per path, in order.
+
+    With workers > 1 or a `timeout`, ``func`` must be picklable (a
+    module-level function or a functools.partial of one) because it runs
+    in a worker process. A file that runs past `timeout` seconds, or whose
+    worker crashes, gets error_type "FileTimeoutError" / "WorkerCrashedError".
+
+    With a `token`, a paused run waits and a cancelled one raises
+    RunCancelled between files (and, in the workers, between pages); queued
+    files are dropped and the pool is shut down.
+    """
+    check = token.check if token is not None else (lambda: None)
+    if timeout is not None:
+        pool = SupervisedPool(workers, timeout=timeout)
+        try:
+            futures = [pool.submit(_call, func, path, token) for path in paths]
+            for path, future in zip(paths, futures):
+                res = FileResult(path, *_outcome(future))
+                check()
+                yield res
+        finally:
+            pool.shutdown(cancel_futures=True)
+        return
+
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            check()
+            yield FileResult(path, *_call(func, path, token))
+        return
+
+    # Hand out small chunks so thousands of quick files don't pay one
+    # round-trip each, while slow files still spread across workers.
+    chunksize = max(1, min(16, len(paths) // (workers * 4)))
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=limit_ocr_threads)
+    try:
+        outcomes = executor.map(partial(_call, func, token=token), paths, chunksize=chunksize)
+        for path, outcome in zip(paths, outcomes):
+            check()
+            yield FileResult(path, *outcome)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def failure_tag(res: FileResult) -> str:
+    """Log tag for a failed file: TIMEOUT, CRASH or ERROR."""
+    if res.error_type == FileTimeoutError.__name__:
+        return "TIMEOUT"
+    if res.error_type == WorkerCrashedError.__name__:
+        return "CRASH"
+    return "ERROR"
+
+
+def map_files_tiered(
+    fast: Callable[[Any], Any],
+    slow: Callable[[Any], Any],
+    paths: Sequence[Any],
+    *,
+    escalate: Callable[[FileResult], bool],
+    workers: int = 1,
+    slow_workers: int = 1,
+    timeout: Optional[float] = None,
+    token: Optional[RunToken] = None,
+) -> Iterator[FileResult]:
+    """map_files with a second, bounded pool for the expensive cases.
+
+    Every path goes through ``fast`` on a pool of `workers`. A result for
+    which ``escalate(result)`` is true is re-run through ``slow`` on its
+    own pool of `slow_workers` processes, started as soon as it's known,
+    so slow files never hold up the fast ones. Results still come back in
+    input order (the slow result replaces the fast one). `timeout` applies
+    to each run of ``fast`` and of ``slow``, and `token` to both pools, as
+    in map_files.
+    """
+    queue: Deque[Any] = deque()  # FileResults, or (path, Future) while OCR runs
+    pool: Optional[SupervisedPool] = None
+
+    def ready() -> Iterator[FileResult]:
+        while queue:
+            head = queue[0]
+            if isinstance(head, FileResult):
+                yield queue.popleft()
+            elif head[1].done():
+                queue.popleft()
+                yield FileResult(head[0], *_outcome(head[1]))
+            else:
+                return
+
+    try:
+        for res in map_files(fast, paths, workers=workers, timeout=timeout, token=token):
+            if escalate(res):
+                if pool is None:
+                    pool = SupervisedPool(slow_workers, timeout=timeout)
+                queue.append((res.path, pool.submit(_call, slow, res.path, token)))
+            else:
+                queue.append(res)
+            yield from ready()
+
+        while queue:
+            head = queue.popleft()
+            if isinstance(head, FileResult):
+                yield head
+            else:
+                res = FileResult(head[0], *_outcome(head[1]))
+                if token is not None:
+                    token.check()
+                yield res
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+# ---------------------------------------------------------------------------
+# Duplicate inputs
+# ---------------------------------------------------------------------------
+
+# What to do with a file whose content is identical to an earlier file's:
+#   "fanout"   - parse it once, write the rows again under each file name
+#   "collapse" - parse it once, write rows for the first file name only
+#   "off"      - don't look for duplicates, parse every file
+DUPLICATE_MODES = ("fanout", "collapse", "off")
+
+
+def find_duplicates(
+    files: Sequence[Any],
+    *,
+    workers: int = 1,
+    token: Optional[RunToken] = None,
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Hash `files` and pair every later copy with the first file that has
+    the same content.
+
+    With workers > 1 the files are read and hashed in worker processes, as
+    in map_files, and only the digests are compared here: the parent
+    doesn't decompress a whole archive on its own before parsing starts,
+    and opens no archive handle the parse workers could inherit.
+
+    Returns ({duplicate name: original file}, {name: sha256}). Files that
+    can't be read are left alone; parsing them will report the error.
+    """
+    first: Dict[str, Any] = {}
+    duplicates: Dict[str, Any] = {}
+    digests: Dict[str, str] = {}
+    for res in map_files(file_sha256, files, workers=workers, token=token):
+        if not res.ok:
+            continue
+        f, digest = res.path, res.value
+        digests[f.name] = digest
+        if digest in first:
+            duplicates[f.name] = first[digest]
+        else:
+            first[digest] = f
+    return duplicates, digests
+
+
+def _renamed(rows: List[dict], name: str) -> List[dict]:
+    """A copy of `rows` attributed to another source file."""
+    return [{**row, "Source_File": name} if "Source_File" in row else dict(row) for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# Combined-CSV driver
+# ---------------------------------------------------------------------------
+
+@dataclass
+class CombinedOutput:
+    """One combined CSV written by a batch run.
+
+    `key` names the output in the per-file result dict and in the manifest,
+    `columns` is the fixed header (taken from the schema, never inferred).
+    """
+
+    key: str
+    path: Path
+    columns: List[str]
+    description: str = "combined CSV"
+
+
+def run_combined_batch(
+    label: str,
+    pdf_files: Sequence[Path],
+    parse_one: Callable[[Path], Dict[str, List[dict]]],
+    outputs: Sequence[CombinedOutput],
+    *,
+    workers: int = 1,
+    manifest: Optional[Manifest] = None,
+    parser_version: str = "",
+    on_result: Optional[Callable[[Any], None]] = None,
+    duplicates: str = "fanout",
+    on_file: Optional[Callable[[Any, FileResult], None]] = None,
+    timeout: Optional[float] = None,
+    jobs: Optional[JobQueue] = None,
+    progress: Optional[Callable[[ProgressEvent], None]] = None,
+    token: Optional[RunToken] = None,
+) -> None:
+    """Parse `pdf_files` and stream their rows into the combined `outputs`.
+
+    `parse_one(pdf)` returns ``{output key: [row dict, ...]}``. Rows are
+    appended to ``<output>.partial`` in sorted file order as each file
+    finishes; the finished file replaces the old combined CSV at the end.
+    If the run dies half-way, the .partial file holds every row so far.
+
+    With a `manifest`, unchanged files are skipped and their rows streamed
+    over from the previous combined CSVs.
+
+    `on_result(value)` is called in this process for every file parsed
+    successfully (e.g. to collect side data returned by workers).
+
+    Files with identical content are parsed once and reported; see
+    DUPLICATE_MODES for what `duplicates` does with their rows.
+
+    `on_file(pdf, result)` is called for every file that wasn't reused, in
+    order, failed or not; a duplicate gets its original's FileResult.
+
+    With a `timeout`, a file that runs longer (or crashes its worker) is
+    reported and skipped while the rest of the batch carries on.
+
+    With `jobs`, every file's result is committed to the job table as it
+    is written; files an interrupted earlier run already finished are not
+    parsed again, their stored rows are written instead.
+
+    `progress(event)` receives a ProgressEvent per file (see progress.py).
+
+    Cancelling `token` stops the run with RunCancelled; like any other
+    interruption, the rows so far stay in the .partial files.
+    """
+    if duplicates not in DUPLICATE_MODES:
+        raise ValueError(f"duplicates must be one of {DUPLICATE_MODES}, got {duplicates!r}")
+    pdf_files = sorted(pdf_files)
+    report = progress or (lambda event: None)
+    report(ProgressEvent(STAGE_STARTED, stage="parse", total=len(pdf_files)))
+    todo: Sequence[Path] = pdf_files
+    reusable: set = set()
+    previous: Dict[str, PreviousRows] = {}
+    if manifest is not None:
+        todo, reusable = plan_incremental(
+            list(pdf_files), manifest, parser_version, {o.key: o.path for o in outputs}
+        )
+        print(f"[{label}] Incremental: {len(reusable)} unchanged, {len(todo)} to parse")
+        if reusable:
+            order = [p.name for p in pdf_files]
+            previous = {o.key: PreviousRows(o.path, order) for o in outputs}
+
+    finished: set = set()
+    if jobs is not None:
+        finished = jobs.plan(todo, parser_version)
+        if finished:
+            print(f"[{label}] Resuming: {len(finished)} file(s) done in an earlier run, "
+                  f"{len(todo) - len(finished)} to go")
+        todo = [p for p in todo if p.name not in finished]
+
+    copies: Dict[str, Any] = {}
+    digests: Dict[str, str] = {}
+    if duplicates != "off":
+        copies, digests = find_duplicates(todo, workers=workers, token=token)
+        for name, original in copies.items():
+            print(f"[{label}] Duplicate: {name} has the same content as {original.name}")
+        if copies:
+            action = "rows repeated" if duplicates == "fanout" else "rows written once"
+            print(f"[{label}] {len(copies)} duplicate file(s) parsed once ({action})")
+    # Results of originals, kept until their copies (later in sorted order) are written
+    copies_left = Counter(original.name for original in copies.values())
+    kept: Dict[str, FileResult] = {}
+
+    writers = {o.key: CsvStreamWriter(o.path, o.columns) for o in outputs}
+    to_parse = [p for p in todo if p.name not in copies]
+    if jobs is not None:
+        jobs.start(p.name for p in todo)
+    results = map_files(parse_one, to_parse, workers=workers, timeout=timeout, token=token)
+
+    try:
+        for pdf in pdf_files:
+            if pdf.name in reusable:
+                reused = {o.key: previous[o.key].take(pdf.name) for o in outputs}
+                for o in outputs:
+                    writers[o.key].write_rows(reused[o.key])
+                report(_file_event(pdf, "reused", FileResult(pdf, reused), outputs))
+                continue
+
+            if pdf.name in finished:
+                res = FileResult(pdf, **jobs.stored(pdf.name))
+                _write_value(writers, outputs, res.value, pdf, manifest, parser_version)
+                report(_file_event(pdf, "resumed", res, outputs))
+                continue
+
+            if pdf.name in copies:
+                original = copies[pdf.name].name
+                res = kept[original]
+                copies_left[original] -= 1
+                if not copies_left[original]:
+                    del kept[original]
+            else:
+                report(ProgressEvent(FILE_STARTED, pdf.name, "parse"))
+                res = next(results)
+                if copies_left[pdf.name]:
+                    kept[pdf.name] = res
+            if not res.ok:
+                print(f"[{label}] {failure_tag(res)} processing {pdf.name}: {res.error}")
+                if manifest is not None:
+                    manifest.forget(pdf.name)
+                if jobs is not None:
+                    jobs.finish(pdf.name, error=res.error, error_type=res.error_type,
+                                seconds=res.seconds)
+                if on_file is not None:
+                    on_file(pdf, res)
+                report(_file_event(pdf, "parse", res, outputs))
+                continue
+
+            if pdf.name in copies:
+                if duplicates == "fanout":
+                    value = {o.key: _renamed(res.value.get(o.key, []), pdf.name) for o in outputs}
+                else:
+                    value = {}
+            else:
+                value = res.value
+                if on_result is not None:
+                    on_result(value)
+            _write_value(writers, outputs, value, pdf, manifest, parser_version,
+                         sha256=digests.get(pdf.name))
+            if jobs is not None:
+                jobs.finish(pdf.name, {o.key: value.get(o.key, []) for o in outputs},
+                            seconds=res.seconds)
+            if on_file is not None:
+                on_file(pdf, res)
+            report(_file_event(pdf, "parse", FileResult(pdf, value, seconds=res.seconds), outputs))
+    except BaseException:
+        # Keep what we have in the .partial files; don't replace the old CSVs
+        for w in writers.values():
+            w.abort()
+        raise
+    finally:
+        results.close()
+        for prev in previous.values():
+            prev.close()
+
+    # The old CSVs must be fully read before they are replaced
+    for o in outputs:
+        if writers[o.key].close():
+            print(f"[{label}] Wrote {o.description}: {o.path}")
+        else:
+            print(f"[{label}] No rows collected for {o.path.name}.")
+
+    if manifest is not None:
+        manifest.prune(p.name for p in pdf_files)
+        manifest.save()
+    if jobs is not None:
+        jobs.complete()
+
+
+def _file_event(
+    pdf: Any, stage: str, res: FileResult, outputs: Sequence[CombinedOutput]
+) -> ProgressEvent:
+    """FILE_FINISHED (rows of the first output) or FILE_FAILED for `res`."""
+    if not res.ok:
+        return ProgressEvent(
+            FILE_FAILED, pdf.name, stage, seconds=res.seconds,
+            error=res.error, error_type=res.error_type,
+        )
+    rows = len(res.value.get(outputs[0].key, []))
+    return ProgressEvent(FILE_FINISHED, pdf.name, stage, rows=rows, seconds=res.seconds)
+
+
+def _write_value(
+    writers: Dict[str, CsvStreamWriter],
+    outputs: Sequence[CombinedOutput],
+    value: Dict[str, List[dict]],
+    pdf: Any,
+    manifest: Optional[Manifest],
+    parser_version: str,
+    *,
+    sha256: Optional[str] = None,
+) -> None:
+    """Stream one file's rows into the combined CSVs and note it in the manifest."""
+    for o in outputs:
+        writers[o.key].write_rows(value.get(o.key, []))
+    if manifest is not None:
+        counts = {o.key: len(value.get(o.key, [])) for o in outputs}
+        manifest.record(pdf, parser_version, counts, sha256=sha256)
+
+
+# ---------------------------------------------------------------------------
+# Two-phase batches: text first, OCR only where it's needed
+# ---------------------------------------------------------------------------
+
+# A parsed file is sent for OCR when any of its rows lacks one of these
+OCR_KEY_FIELDS = ("Delivery Number", "Variety")
+
+
+def needs_ocr(res: FileResult, key: str, fields: Sequence[str] = OCR_KEY_FIELDS) -> bool:
+    """True when a no-OCR result is worth OCR'ing: the file had no text at
+    all, or output `key` has no rows or a row missing one of `fields`."""
+    if not res.ok:
+        return res.error_type == "NoTextError"
+    rows = res.value.get(key, [])
+    return not rows or any(not row.get(f) for row in rows for f in fields)
+
+
+def replace_rows(
+    outputs: Sequence[CombinedOutput],
+    order: List[str],
+    replacements: Dict[str, Dict[str, List[dict]]],
+) -> None:
+    """Swap the rows of some files in finished combined CSVs.
+
+    `replacements` maps a Source_File name to its new per-output rows;
+    `order` is the file order the CSVs were written in, so files that had
+    no rows before are slotted in at their place.
+    """
+    position = {name: i for i, name in enumerate(order)}
+    for o in outputs:
+        pending = sorted(replacements, key=lambda name: position.get(name, len(order)))
+        writer = CsvStreamWriter(o.path, o.columns)
+        old = open(o.path, newline="", encoding="utf-8") if o.path.exists() else None
+        try:
+            reader = csv.DictReader(old) if old is not None else iter(())
+            for src, rows in groupby(reader, key=lambda row: row.get("Source_File", "")):
+                pos = position.get(src, len(order))
+                while pending and position.get(pending[0], len(order)) <= pos:
+                    writer.write_rows(replacements[pending.pop(0)].get(o.key, []))
+                if src not in replacements:
+                    writer.write_rows(list(rows))
+            for name in pending:
+                writer.write_rows(replacements[name].get(o.key, []))
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            if old is not None:
+                old.close()
+        writer.close()
+
+
+def run_two_phase_batch(
+    label: str,
+    pdf_files: Sequence[Any],
+    parse_fast: Callable[[Any], Dict[str, List[dict]]],
+    parse_ocr: Callable[[Any], Dict[str, List[dict]]],
+    outputs: Sequence[CombinedOutput],
+    *,
+    workers: int = 1,
+    ocr_workers: int = 1,
+    manifest: Optional[Manifest] = None,
+    parser_version: str = "",
+    on_result: Optional[Callable[[Any], None]] = None,
+    duplicates: str = "fanout",
+    timeout: Optional[float] = None,
+    jobs: Optional[JobQueue] = None,
+    progress: Optional[Callable[[ProgressEvent], None]] = None,
+    token: Optional[RunToken] = None,
+) -> None:
+    """run_combined_batch with `parse_fast` (no OCR), then OCR the files
+    that need it (see needs_ocr) and replace their rows.
+
+    Every file is parsed from its text layer first and the combined CSVs
+    are written straight away. Files that come back without text or key
+    fields are handed to a separate pool of `ocr_workers` processes as
+    soon as they are found, so OCR runs alongside the fast pass instead
+    of stalling it. When the OCR pass is done their rows are swapped in.
+    `timeout` is the budget of each pass over a file (see map_files).
+    With `jobs`, a file waiting for OCR stays "running" in the job table
+    until its OCR result is stored, so a resumed run parses it again; the
+    `manifest` leaves it out until then for the same reason.
+    Each escalated file adds one file to the "ocr" stage of `progress`.
+    If `token` is cancelled during the OCR pass, the CSVs from the text
+    pass are left as they are.
+    """
+    pdf_files = sorted(pdf_files)
+    key = outputs[0].key
+    escalated: Dict[str, Tuple[Any, Future]] = {}
+    copies: Dict[str, List[Any]] = {}
+    pool: Optional[SupervisedPool] = None
+    report = progress or (lambda event: None)
+
+    def escalate(pdf: Any, res: FileResult) -> None:
+        nonlocal pool
+        if not needs_ocr(res, key):
+            return
+        if res.path.name != pdf.name:
+            # A duplicate: it gets its original's OCR result
+            if duplicates == "fanout":
+                copies.setdefault(res.path.name, []).append(pdf)
+                if manifest is not None:
+                    manifest.forget(pdf.name)
+                if jobs is not None:
+                    jobs.reopen(pdf.name)
+            return
+        if pool is None:
+            pool = SupervisedPool(ocr_workers, timeout=timeout)
+        escalated[pdf.name] = (pdf, pool.submit(_call, parse_ocr, pdf, token))
+        report(ProgressEvent(STAGE_STARTED, stage="ocr", total=1))
+        # Not done until its OCR rows are recorded: if the OCR pass never
+        # finishes, the next incremental run parses it again
+        if manifest is not None:
+            manifest.forget(pdf.name)
+        if jobs is not None:
+            jobs.reopen(pdf.name)
+
+    try:
+        run_combined_batch(
+            label,
+            pdf_files,
+            parse_fast,
+            outputs,
+            workers=workers,
+            manifest=manifest,
+            parser_version=parser_version,
+            on_result=on_result,
+            duplicates=duplicates,
+            on_file=escalate,
+            timeout=timeout,
+            jobs=jobs,
+            progress=progress,
+            token=token,
+        )
+        if not escalated:
+            return
+
+        print(f"[{label}] OCR pass: {len(escalated)} file(s) without text or key fields")
+        replacements: Dict[str, Dict[str, List[dict]]] = {}
+        for name, (pdf, future) in escalated.items():
+            res = FileResult(pdf, *_outcome(future))
+            if token is not None:
+                token.check()
+            report(_file_event(pdf, "ocr", res, outputs))
+            if not res.ok:
+                print(f"[{label}] {failure_tag(res)} OCR'ing {name}: {res.error}")
+                if jobs is not None:
+                    # Its rows from the text pass stay in the CSV
+                    for target in [pdf] + copies.get(name, []):
+                        jobs.settle(target.name)
+                continue
+            value = res.value
+            if on_result is not None:
+                on_result(value)
+            replacements[name] = value
+            targets = [(pdf, value)]
+            for copy in copies.get(name, []):
+                renamed = {o.key: _renamed(value.get(o.key, []), copy.name) for o in outputs}
+                replacements[copy.name] = renamed
+                targets.append((copy, renamed))
+            for target, rows in targets:
+                if manifest is not None:
+                    counts = {o.key: len(rows.get(o.key, [])) for o in outputs}
+                    manifest.record(target, parser_version, counts)
+                if jobs is not None:
+                    jobs.finish(target.name, {o.key: rows.get(o.key, []) for o in outputs},
+                                seconds=res.seconds)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    replace_rows(outputs, [p.name for p in pdf_files], replacements)
+    print(f"[{label}] Replaced the rows of {len(replacements)} file(s) with their OCR results")
+    if manifest is not None:
+        manifest.save()
+    if jobs is not None:
+        jobs.complete()
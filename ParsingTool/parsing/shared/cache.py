@@ -0,0 +1,161 @@
+"""Small content-addressed on-disk cache.
+
+Each entry is one file under ``root``, named after its key (a hex digest),
+and sharded into two-character sub-folders so a cache of tens of thousands
+of PDFs doesn't end up as one huge directory.
+
+- Writes go to a temp file and are then moved into place, so several worker
+  processes can share the same cache folder safely.
+- Reading an entry bumps its mtime; when the folder grows past ``max_bytes``
+  the least recently used entries are deleted first.
+- A ``VERSION`` file stamps the folder. If it doesn't match the version the
+  code expects, every entry is thrown away (the cache invalidates itself).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# 512 MB is plenty for the extracted text of several thousand PDFs
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_VERSION_FILE = "VERSION"
+_ENTRY_SUFFIX = ".bin"
+
+
+def sha256_bytes(data: bytes) -> str:
+    """Return the hex SHA-256 digest of ``data``."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(*parts: object) -> str:
+    """Combine several key parts into one stable hex digest."""
+    joined = "\x1f".join(str(p) for p in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """A size-capped, LRU-evicted key -> bytes store on disk."""
+
+    def __init__(
+        self,
+        root: Path | str,
+        *,
+        version: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.root = Path(root)
+        self.version = str(version)
+        self.max_bytes = max_bytes
+        # Running estimate of the folder size. It's only exact within this
+        # process; when it crosses the cap we re-measure the real folder.
+        self._approx_bytes: Optional[int] = None
+        self._check_version()
+
+    # -------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached bytes for ``key``, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key`` and evict old entries if needed."""
+        path = self._entry_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            # A cache that can't be written to should never break parsing
+            return
+
+        if self._approx_bytes is None:
+            self._approx_bytes = self._measure()
+        else:
+            self._approx_bytes += len(data)
+
+        if self._approx_bytes > self.max_bytes:
+            self._evict()
+
+    def clear(self) -> None:
+        """Delete every entry (the version stamp is kept)."""
+        for child in self.root.iterdir() if self.root.exists() else []:
+            if child.is_dir():
+                shutil.rmtree(child, ignore_errors=True)
+        self._approx_bytes = 0
+
+    # -------------------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------------------
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{_ENTRY_SUFFIX}"
+
+    def _check_version(self) -> None:
+        stamp = self.root / _VERSION_FILE
+        try:
+            current = stamp.read_text(encoding="utf-8").strip()
+        except OSError:
+            current = None
+
+        if current == self.version:
+            return
+
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            if current is not None:
+                self.clear()
+            stamp.write_text(self.version, encoding="utf-8")
+        except OSError:
+            pass
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """Return (mtime, size, path) for every entry on disk."""
+        found: List[Tuple[float, int, Path]] = []
+        if not self.root.exists():
+            return found
+        for path in self.root.glob(f"*/*{_ENTRY_SUFFIX}"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue  # removed by another process
+            found.append((st.st_mtime, st.st_size, path))
+        return found
+
+    def _measure(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until we're under 90% of the cap."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+        self._approx_bytes = total
@@ -0,0 +1,113 @@
+"""Cooperative cancel / pause for long batch runs.
+
+A ``RunToken`` is created by whoever starts the run (the GUI, a script)
+and handed to the batch executors. Work checks it at safe points, between
+files and between the pages of a PDF (text and OCR alike):
+
+* after ``cancel()`` the next check raises ``RunCancelled``; the batch
+  stops, worker pools are shut down and whatever was already written
+  (per-file CSVs, the combined ``.partial`` files, the job table) is kept;
+* after ``pause()`` the next check blocks until ``resume()`` or
+  ``cancel()``.
+
+Files are parsed in worker processes, so the flags are two marker files in
+a private temporary folder: the token pickles as a path, and checking it
+is a couple of ``stat`` calls. The executors install the token for the
+duration of each task (``using_token``) so the page loops in pdf_utils and
+ocr can call ``check_cancelled()`` without every parse function having to
+pass it along.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# How often a paused check looks at the flags again (seconds)
+PAUSE_POLL = 0.2
+
+
+class RunCancelled(BaseException):
+    """The run was cancelled through its RunToken.
+
+    A BaseException (like KeyboardInterrupt), so the ``except Exception``
+    blocks that turn a bad PDF into a per-file error let it through.
+    """
+
+
+class RunToken:
+    """Cancel and pause flags shared with worker processes."""
+
+    def __init__(self) -> None:
+        self.path = tempfile.mkdtemp(prefix="parsingtool-run-")
+
+    def _flag(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def cancel(self) -> None:
+        open(self._flag("cancel"), "w").close()
+
+    def pause(self) -> None:
+        open(self._flag("pause"), "w").close()
+
+    def resume(self) -> None:
+        try:
+            os.unlink(self._flag("pause"))
+        except FileNotFoundError:
+            pass
+
+    @property
+    def cancelled(self) -> bool:
+        return os.path.exists(self._flag("cancel"))
+
+    @property
+    def paused(self) -> bool:
+        return os.path.exists(self._flag("pause"))
+
+    def check(self) -> None:
+        """Wait while paused; raise RunCancelled once cancelled."""
+        while self.paused and not self.cancelled:
+            time.sleep(PAUSE_POLL)
+        if self.cancelled:
+            raise RunCancelled("run cancelled")
+
+    def close(self) -> None:
+        """Remove the flag folder (once the run and its workers are done)."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> "RunToken":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+_current: Optional[RunToken] = None
+
+
+def current_token() -> Optional[RunToken]:
+    return _current
+
+
+@contextmanager
+def using_token(token: Optional[RunToken]) -> Iterator[None]:
+    """Make `token` the one check_cancelled() looks at (None: keep the current)."""
+    global _current
+    if token is None:
+        yield
+        return
+    previous, _current = _current, token
+    try:
+        yield
+    finally:
+        _current = previous
+
+
+def check_cancelled() -> None:
+    """Checkpoint for page loops: wait while paused, raise if cancelled."""
+    if _current is not None:
+        _current.check()
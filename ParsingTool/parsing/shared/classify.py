@@ -0,0 +1,132 @@
+"""Tell export orders, domestic ZAPIs and PIs apart by their content.
+
+The controller used to pick the PI pipeline from the file name alone
+(``..._PI.pdf`` / ``..._ZAPI.pdf``) and trust the mode the user chose for
+everything else, so a misnamed file went through the wrong pipeline and
+came out as empty rows. ``classify_pdf`` looks at the first page instead
+(from the text cache when the document was read before) and scores the
+label phrases each layout prints in its header:
+
+    domestic     Picking request, Customer Delivery Date, Plant/Storage location
+    export       Export Order, Sale Order No., Vessel ETD, OLAM Ref No.
+    packinglist  Packing Instruction, Packer, "loaded on ... pallets", "22 PAL"
+
+The page is lowercased once and every anchor starts with a literal word,
+so the regex engine jumps between candidates with a plain substring
+search: classifying a page takes microseconds, the cost is in opening
+the PDF.
+
+A page that doesn't clearly point one way (too few anchors, or a tie)
+falls back to the file name, then to None.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from .pdf_utils import PdfSource, first_page_text, pdf_source_name
+
+DOC_KINDS = ("export", "domestic", "packinglist")
+
+# (pattern, weight) per kind. Export orders and PIs share most header
+# fields (the PI pipeline reuses the export patterns), so only the labels
+# one of them prints and the other doesn't count.
+ANCHORS: Dict[str, Tuple[Tuple[str, int], ...]] = {
+    "domestic": (
+        (r"picking\s*request", 3),
+        (r"customer\s*delivery\s*date", 3),
+        (r"plant\s*/\s*storage\s*location", 3),
+        (r"olam\s*reference", 2),
+        (r"gross\s*weight\s*[0-9.,]+\s*kg\b", 1),
+    ),
+    "export": (
+        (r"export\s+order", 3),
+        (r"sale\s*order\s*(?:no|number)", 2),
+        (r"vessel\s*etd", 2),
+        (r"olam\s*ref\s*(?:no|number)", 2),
+        (r"3rd\s*party\s*storage", 2),
+        (r"container\s*size", 1),
+    ),
+    "packinglist": (
+        (r"packing\s+instruction", 3),
+        (r"loaded\s+on\s+[a-z ]*pallets?", 2),
+        (r"hand\s+stacked", 2),
+        (r"packer\b", 2),
+        (r"pal\b(?<=\d pal)", 1),  # "22.000 PAL"
+        (r"shipping\s+line", 1),
+    ),
+}
+
+# A page needs this much evidence before its content decides
+MIN_SCORE = 3
+
+# File-name suffixes the controller has always routed to the PI pipeline
+NAME_HINTS: Dict[str, Tuple[str, ...]] = {
+    "packinglist": ("_PI.PDF", "_ZAPI.PDF"),
+}
+
+# Lowercase patterns, run without IGNORECASE: it would switch off the
+# literal-prefix search that makes a miss cost a couple of microseconds
+_COMPILED = [
+    (kind, re.compile(pattern), weight)
+    for kind in DOC_KINDS
+    for pattern, weight in ANCHORS[kind]
+]
+
+
+@dataclass(frozen=True)
+class Classification:
+    kind: Optional[str]  # one of DOC_KINDS, or None when unsure
+    by: str = ""  # "content" or "name"
+    scores: Dict[str, int] = field(default_factory=dict)
+    blank: bool = False  # the first page had no text (a scan, without OCR)
+
+
+def classify_text(text: str) -> Classification:
+    """Classify a document from (the first page of) its text.
+
+    Each anchor counts once, however often it appears. The best-scoring
+    kind wins if it reaches MIN_SCORE and beats the runner-up.
+    """
+    lowered = text.lower()
+    scores = dict.fromkeys(DOC_KINDS, 0)
+    for kind, pattern, weight in _COMPILED:
+        if pattern.search(lowered):
+            scores[kind] += weight
+
+    ranked = sorted(scores.values(), reverse=True)
+    best = max(DOC_KINDS, key=scores.__getitem__)
+    if ranked[0] < MIN_SCORE or ranked[0] == ranked[1]:
+        return Classification(None, scores=scores)
+    return Classification(best, "content", scores)
+
+
+def kind_from_name(name: str) -> Optional[str]:
+    """The kind a file name's suffix points to, if any."""
+    upper = name.upper()
+    for kind, suffixes in NAME_HINTS.items():
+        if upper.endswith(suffixes):
+            return kind
+    return None
+
+
+def classify_pdf(
+    source: PdfSource,
+    *,
+    name: Optional[str] = None,
+    use_ocr: bool = False,
+    use_cache: bool = True,
+) -> Classification:
+    """Classify a PDF (path, bytes or binary file object) by its first page.
+
+    `name` is the file name for the fallback hint (defaults to the source's
+    name). With `use_ocr`, a scanned first page is OCR'd on its own.
+    """
+    text = first_page_text(source, use_ocr=use_ocr, use_cache=use_cache)
+    result = classify_text(text)
+    if result.kind is None:
+        hint = kind_from_name(name if name is not None else pdf_source_name(source))
+        return Classification(hint, "name" if hint else "", result.scores, not text.strip())
+    return result
@@ -0,0 +1,116 @@
+"""Extracted-text corpus: every document's pages in one compact file.
+
+Tuning the regexes shouldn't mean extracting (or OCR'ing) the PDFs again.
+``build_corpus`` extracts the text of a batch once and stores it page by
+page; the pipelines' ``run_corpus_batch`` then re-parse from the corpus
+alone, which takes seconds for thousands of documents.
+
+The file is gzip'd JSON lines: a header line, then one line per document:
+
+    {"corpus": 1, "use_ocr": false}
+    {"name": "80012345.pdf", "sha256": "...", "pages": ["page 1", ...]}
+
+Every page is stored, even the ones a parser's early-stop rules would
+skip, so the corpus stays valid however those rules change.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence
+
+from .batch import failure_tag, map_files
+from .cache import sha256_bytes
+from .pdf_utils import iter_pages
+
+CORPUS_VERSION = 1
+
+
+@dataclass(frozen=True, order=True)
+class CorpusDoc:
+    """One document of a corpus; `name` is its Source_File."""
+
+    name: str
+    sha256: str
+    pages: List[str]
+
+    @property
+    def text(self) -> str:
+        """The text as extract_text returns it for the whole document."""
+        return "\n".join(self.pages)
+
+
+def _extract_doc(item: Any, *, use_ocr: bool, debug: bool, max_ocr_workers: int) -> CorpusDoc:
+    """Read every page of one batch input (module-level for worker processes)."""
+    data = item.read_bytes()  # a Path or a ZipMember
+    pages = [
+        text
+        for _, text in iter_pages(
+            data, debug=debug, use_ocr=use_ocr, max_ocr_workers=max_ocr_workers
+        )
+    ]
+    return CorpusDoc(item.name, sha256_bytes(data), pages)
+
+
+def build_corpus(
+    inputs: Sequence[Any],
+    corpus_path: Path,
+    *,
+    use_ocr: bool = False,
+    debug: bool = False,
+    max_ocr_workers: int = 1,
+    workers: int = 1,
+    timeout: Optional[float] = None,
+) -> int:
+    """Extract the text of `inputs` (see archive.list_batch_inputs) into a
+    corpus file. Files that yield no text, or take longer than `timeout`
+    seconds, are reported and left out.
+
+    Returns the number of documents written.
+    """
+    corpus_path = Path(corpus_path)
+    corpus_path.parent.mkdir(parents=True, exist_ok=True)
+    extract = partial(
+        _extract_doc, use_ocr=use_ocr, debug=debug, max_ocr_workers=max_ocr_workers
+    )
+
+    written = 0
+    fd, tmp = tempfile.mkstemp(dir=corpus_path.parent, suffix=".tmp")
+    try:
+        with gzip.open(os.fdopen(fd, "wb"), "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"corpus": CORPUS_VERSION, "use_ocr": use_ocr}) + "\n")
+            for res in map_files(extract, sorted(inputs), workers=workers, timeout=timeout):
+                if not res.ok:
+                    print(f"[CORPUS] {failure_tag(res)} extracting {res.path.name}: {res.error}")
+                    continue
+                doc = res.value
+                f.write(json.dumps({"name": doc.name, "sha256": doc.sha256, "pages": doc.pages}) + "\n")
+                written += 1
+        os.replace(tmp, corpus_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    print(f"[CORPUS] Wrote {written} document(s) to {corpus_path}")
+    return written
+
+
+def iter_corpus(corpus_path: Path) -> Iterator[CorpusDoc]:
+    """Yield the documents of a corpus file in the order they were written."""
+    with gzip.open(corpus_path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("corpus") != CORPUS_VERSION:
+            raise ValueError(f"{corpus_path} is not a version {CORPUS_VERSION} text corpus")
+        for line in f:
+            raw = json.loads(line)
+            yield CorpusDoc(raw["name"], raw["sha256"], raw["pages"])
+
+
+def read_corpus(corpus_path: Path) -> List[CorpusDoc]:
+    return list(iter_corpus(corpus_path))
@@ -1,6 +1,8 @@
 from __future__ import annotations
 import csv
-from typing import Iterable, Mapping, List
+import os
+from pathlib import Path
+from typing import IO, Iterable, Mapping, List, Optional
 
 
 def write_csv(path: str, rows: Iterable[Mapping[str, str]], columns: List[str]) -> None:
@@ -12,3 +14,52 @@ def write_csv(path: str, rows: Iterable[Mapping[str, str]], columns: List[str])
             # Ensure all keys exist
             row = {col: r.get(col, "") for col in columns}
             w.writerow(row)
+
+
+class CsvStreamWriter:
+    """Write rows to a CSV as they arrive instead of collecting them first.
+
+    Rows go to ``<path>.partial`` with the fixed `columns` header and are
+    flushed after every batch of rows, so memory stays flat and an
+    interrupted run still leaves everything written so far on disk.
+    ``close()`` moves the finished file into place. Nothing is created if
+    no rows were ever written.
+    """
+
+    def __init__(self, path: Path | str, columns: List[str]) -> None:
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(self.path.name + ".partial")
+        self.columns = columns
+        self.rows_written = 0
+        self._file: Optional[IO[str]] = None
+        self._writer: Optional[csv.DictWriter] = None
+
+    def write_rows(self, rows: Iterable[Mapping[str, str]]) -> None:
+        for r in rows:
+            if self._writer is None:
+                self._open()
+            assert self._writer is not None
+            self._writer.writerow({col: r.get(col, "") for col in self.columns})
+            self.rows_written += 1
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> bool:
+        """Finish the file; returns True if a CSV was written."""
+        if self._file is None:
+            return False
+        self._file.close()
+        self._file = None
+        os.replace(self.partial_path, self.path)
+        return True
+
+    def abort(self) -> None:
+        """Stop writing but keep the .partial file for inspection."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self) -> None:
+        self._file = open(self.partial_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore")
+        self._writer.writeheader()
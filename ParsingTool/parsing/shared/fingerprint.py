@@ -0,0 +1,51 @@
+"""Fingerprints of parser code, used to invalidate stored results.
+
+Instead of remembering to bump a version number after every regex tweak,
+a pipeline's fingerprint is the hash of the source of the modules it
+depends on. Change a pattern -> the fingerprint changes -> old results
+are ignored.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import marshal
+from functools import lru_cache
+from typing import Iterable
+
+
+def _module_bytes(name: str) -> bytes:
+    """Source of a module, or its compiled code when no source is shipped
+    (e.g. inside a PyInstaller bundle)."""
+    module = importlib.import_module(name)
+    loader = getattr(module, "__loader__", None)
+    if loader is not None:
+        try:
+            source = loader.get_source(name)
+            if source is not None:
+                return source.encode("utf-8")
+        except Exception:
+            pass
+        try:
+            code = loader.get_code(name)
+            if code is not None:
+                return marshal.dumps(code)
+        except Exception:
+            pass
+    return name.encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _fingerprint(names: tuple[str, ...]) -> str:
+    h = hashlib.sha256()
+    for name in names:
+        h.update(name.encode("utf-8"))
+        h.update(b"\0")
+        h.update(_module_bytes(name))
+    return h.hexdigest()[:16]
+
+
+def modules_fingerprint(module_names: Iterable[str]) -> str:
+    """Short hash of the source of every module in ``module_names``."""
+    return _fingerprint(tuple(sorted(module_names)))
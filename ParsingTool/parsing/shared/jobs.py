@@ -0,0 +1,196 @@
+"""Crash-safe job table, so an interrupted batch picks up where it stopped.
+
+A laptop going to sleep, a power cut or a fatal error half-way through a
+10k-file folder used to mean running the whole folder again. With a
+``JobQueue`` every file of the run has a row in a small SQLite database in
+the output folder:
+
+    name, state, size, mtime, parser version, result (JSON), error, seconds
+
+and its state moves ``pending -> running -> done | failed``. Each finished
+file is committed as soon as it is written, so after a crash the next run
+with the same job file only parses the files that are not done yet and
+streams the stored rows of the others into the combined CSV. Failed files
+(errors, timeouts, crashed workers) are tried again.
+
+Files left ``running`` by a crash go back to ``pending``, as does a file
+that changed on disk or a run with another parser version. Once a run
+completes, the next one starts a fresh job.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Set
+
+JOB_STATES = ("pending", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    parser_version TEXT,
+    result TEXT,
+    error TEXT,
+    error_type TEXT,
+    seconds REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class JobQueue:
+    """Per-file state of one batch job, stored in SQLite at `path`."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        # WAL: a commit per file stays cheap, and a crash never corrupts the table
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # --- planning ------------------------------------------------------
+
+    def plan(self, files: Sequence[Any], parser_version: str = "") -> Set[str]:
+        """Register `files` for a run and return the names already done by an
+        interrupted earlier run of the same job (failed files run again).
+
+        Everything else is (re)set to pending. A completed job is cleared
+        first, so a new run over the same folder parses it all again.
+        """
+        with self._db:
+            if self._meta("complete") == "1":
+                self._db.execute("DELETE FROM jobs")
+            self._set_meta("complete", "0")
+
+            known = {
+                row[0]: row[1:]
+                for row in self._db.execute(
+                    "SELECT name, state, size, mtime, parser_version FROM jobs"
+                )
+            }
+            finished: Set[str] = set()
+            fresh = []
+            for f in files:
+                st = f.stat()
+                stamp = (st.st_size, st.st_mtime, parser_version)
+                prev = known.pop(f.name, None)
+                if prev is not None and prev[0] == "done" and tuple(prev[1:]) == stamp:
+                    finished.add(f.name)
+                else:
+                    fresh.append((f.name, *stamp))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO jobs (name, state, size, mtime, parser_version, updated)"
+                " VALUES (?, 'pending', ?, ?, ?, ?)",
+                [(*row, time.time()) for row in fresh],
+            )
+            # Files no longer in the input aren't part of the job any more
+            self._db.executemany("DELETE FROM jobs WHERE name = ?", [(n,) for n in known])
+        return finished
+
+    # --- state changes -------------------------------------------------
+
+    def start(self, names: Iterable[str]) -> None:
+        """Mark files as handed to the workers."""
+        with self._db:
+            self._db.executemany(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, updated = ?"
+                " WHERE name = ?",
+                [(time.time(), n) for n in names],
+            )
+
+    def finish(
+        self,
+        name: str,
+        value: Any = None,
+        *,
+        error: Optional[str] = None,
+        error_type: Optional[str] = None,
+        seconds: Optional[float] = None,
+    ) -> None:
+        """Store a file's result (JSON-able) or error and commit straight away."""
+        with self._db:
+            self._db.execute(
+                "UPDATE jobs SET state = ?, result = ?, error = ?, error_type = ?,"
+                " seconds = COALESCE(?, seconds), updated = ? WHERE name = ?",
+                (
+                    "failed" if error is not None else "done",
+                    None if error is not None else json.dumps(value),
+                    error,
+                    error_type,
+                    seconds,
+                    time.time(),
+                    name,
+                ),
+            )
+
+    def reopen(self, name: str) -> None:
+        """Put a file back to running, keeping its stored result (e.g. while
+        it waits for OCR); a crash now means it is parsed again."""
+        with self._db:
+            self._db.execute(
+                "UPDATE jobs SET state = 'running', updated = ? WHERE name = ?",
+                (time.time(), name),
+            )
+
+    def settle(self, name: str) -> None:
+        """Mark a reopened file done again with the result it already has."""
+        with self._db:
+            self._db.execute(
+                "UPDATE jobs SET state = 'done', updated = ? WHERE name = ?",
+                (time.time(), name),
+            )
+
+    def complete(self) -> bool:
+        """Mark the job complete if every file is done or failed."""
+        counts = self.counts()
+        if counts["pending"] or counts["running"]:
+            return False
+        with self._db:
+            self._set_meta("complete", "1")
+        return True
+
+    # --- queries -------------------------------------------------------
+
+    def stored(self, name: str) -> Dict[str, Any]:
+        """The stored outcome of a file: value, error, error_type, seconds."""
+        row = self._db.execute(
+            "SELECT result, error, error_type, seconds FROM jobs WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        result, error, error_type, seconds = row
+        value = json.loads(result) if result is not None else None
+        return {"value": value, "error": error, "error_type": error_type, "seconds": seconds}
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(JOB_STATES, 0)
+        for state, n in self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"):
+            counts[state] = n
+        return counts
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
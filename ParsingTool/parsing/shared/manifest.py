@@ -0,0 +1,198 @@
+"""Processed-file manifest for incremental batch runs.
+
+The manifest lives in the output folder next to the combined CSV(s) and
+records, for every PDF that was parsed successfully:
+
+    name, size, mtime, sha256, parser version and how many rows it produced
+
+On the next run a file is skipped when it hasn't changed (same size and
+mtime, or failing that the same content hash) *and* the parser version is
+the same. Its rows are then streamed over from the previous combined CSV
+instead of being parsed again.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import tempfile
+from itertools import groupby
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .cache import sha256_bytes
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    return sha256_bytes(path.read_bytes())
+
+
+class Manifest:
+    """Name -> file/parser stamp for every PDF processed into an output folder."""
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, dict]] = None) -> None:
+        self.path = Path(path)
+        self.entries: Dict[str, dict] = entries or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "Manifest":
+        """Load a manifest, or start an empty one if it's missing or unreadable."""
+        try:
+            raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(path)
+        if raw.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, raw.get("files", {}))
+
+    def save(self) -> None:
+        """Write the manifest atomically (a crash never leaves half a file)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": MANIFEST_VERSION, "files": self.entries}
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def is_unchanged(self, pdf: Path, parser_version: str) -> bool:
+        """True when `pdf` was already parsed by this exact parser version."""
+        entry = self.entries.get(pdf.name)
+        if entry is None or entry.get("parser_version") != parser_version:
+            return False
+
+        st = pdf.stat()
+        if entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime:
+            return True
+
+        # Touched but maybe not edited (copied, re-downloaded...): compare content
+        if entry.get("size") != st.st_size:
+            return False
+        if entry.get("sha256") != file_sha256(pdf):
+            return False
+        entry["mtime"] = st.st_mtime
+        return True
+
+    def record(
+        self,
+        pdf: Path,
+        parser_version: str,
+        rows: Dict[str, int],
+        *,
+        sha256: Optional[str] = None,
+    ) -> None:
+        """Stamp `pdf` as parsed; `rows` is the row count per combined output.
+
+        Pass `sha256` when the content hash is already known.
+        """
+        st = pdf.stat()
+        self.entries[pdf.name] = {
+            "path": str(pdf),
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "sha256": sha256 or file_sha256(pdf),
+            "parser_version": parser_version,
+            "rows": rows,
+        }
+
+    def forget(self, name: str) -> None:
+        self.entries.pop(name, None)
+
+    def prune(self, keep_names: Iterable[str]) -> None:
+        """Drop entries for files that are no longer in the input folder."""
+        keep = set(keep_names)
+        for name in list(self.entries):
+            if name not in keep:
+                del self.entries[name]
+
+
+def count_previous_rows(csv_path: Path, names: Iterable[str]) -> Dict[str, int]:
+    """Count the rows per Source_File in a previous combined CSV.
+
+    Only rows whose Source_File is in `names` are counted.
+    """
+    wanted = set(names)
+    counts: Dict[str, int] = {}
+    if not wanted or not csv_path.exists():
+        return counts
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            src = row.get("Source_File", "")
+            if src in wanted:
+                counts[src] = counts.get(src, 0) + 1
+    return counts
+
+
+class PreviousRows:
+    """Stream last run's rows back out of a combined CSV, one file at a time.
+
+    The old CSV was written in the same sorted file order as the current
+    run, so we can walk both side by side and only ever hold one file's
+    rows in memory.
+    """
+
+    def __init__(self, csv_path: Path, order: List[str]) -> None:
+        self._position = {name: i for i, name in enumerate(order)}
+        self._file: Optional[IO[str]] = None
+        self._groups: Iterator[Tuple[str, Iterator[dict]]] = iter(())
+        self._pending: Optional[Tuple[str, List[dict]]] = None
+        if csv_path.exists():
+            self._file = open(csv_path, newline="", encoding="utf-8")
+            reader = csv.DictReader(self._file)
+            self._groups = groupby(reader, key=lambda row: row.get("Source_File", ""))
+
+    def take(self, name: str) -> List[dict]:
+        """Return the old rows for `name` (an empty list if there are none)."""
+        target = self._position.get(name, -1)
+        while True:
+            if self._pending is None:
+                nxt = next(self._groups, None)
+                if nxt is None:
+                    return []
+                self._pending = (nxt[0], list(nxt[1]))
+
+            src, rows = self._pending
+            pos = self._position.get(src, -1)
+            if pos == target:
+                self._pending = None
+                return rows
+            if pos > target:
+                return []  # belongs to a later file; keep it for then
+            self._pending = None  # file no longer in the folder (or skipped)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def plan_incremental(
+    pdf_files: List[Path],
+    manifest: Manifest,
+    parser_version: str,
+    previous_csvs: Dict[str, Path],
+) -> Tuple[List[Path], Set[str]]:
+    """Split `pdf_files` into files to parse and files whose rows we reuse.
+
+    `previous_csvs` maps an output key (e.g. "batches") to last run's
+    combined CSV. A file is only skipped when every output still holds the
+    number of rows the manifest says it produced (so deleting a combined
+    CSV simply forces those files to be parsed again).
+
+    Returns (todo, reusable_names).
+    """
+    unchanged = [p for p in pdf_files if manifest.is_unchanged(p, parser_version)]
+    names = [p.name for p in unchanged]
+    previous = {key: count_previous_rows(path, names) for key, path in previous_csvs.items()}
+
+    reusable: Set[str] = set()
+    for p in unchanged:
+        counts = manifest.entries[p.name].get("rows", {})
+        if all(previous[key].get(p.name, 0) == counts.get(key, 0) for key in previous_csvs):
+            reusable.add(p.name)
+
+    todo = [p for p in pdf_files if p.name not in reusable]
+    return todo, reusable
@@ -0,0 +1,143 @@
+"""Bounded memoisation for hot per-line parsers.
+
+The same product descriptions repeat across thousands of documents, so
+``LruMemo`` keeps the most recently used results in memory, counts hits
+and misses, and can persist its table so the next run (or every worker of
+a batch run) starts warm.
+
+Batch workers are separate processes and can't share the in-memory table,
+so a worker hands back what it learnt with ``take_new()`` and the parent
+folds it in with ``update()`` before saving.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Set
+
+DEFAULT_MAXSIZE = 4096
+
+
+class LruMemo:
+    """Call ``func(arg)`` at most once per key, keeping `maxsize` results."""
+
+    def __init__(
+        self,
+        func: Callable[[Any], Any],
+        *,
+        maxsize: int = DEFAULT_MAXSIZE,
+        key: Optional[Callable[[Any], Hashable]] = None,
+    ) -> None:
+        self.func = func
+        self.maxsize = maxsize
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._new: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._loaded: Set[str] = set()
+
+    def __call__(self, arg: Any) -> Any:
+        k = self.key(arg) if self.key is not None else arg
+        try:
+            value = self._data[k]
+        except KeyError:
+            self.misses += 1
+            value = self.func(arg)
+            self._store(self._data, k, value)
+            self._store(self._new, k, value)
+            return value
+        self.hits += 1
+        self._data.move_to_end(k)
+        return value
+
+    def _store(self, table: "OrderedDict[Hashable, Any]", k: Hashable, value: Any) -> None:
+        table[k] = value
+        table.move_to_end(k)
+        while len(table) > self.maxsize:
+            table.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, k: Hashable) -> bool:
+        """Whether key `k` (already through `key`) has a stored result."""
+        return k in self._data
+
+    def fill(self, entries: Mapping[Hashable, Any]) -> None:
+        """Store results computed outside the memo (e.g. by a batch form of
+        ``func``) as misses, so ``take_new`` hands them back like any other."""
+        for k, value in entries.items():
+            self.misses += 1
+            self._store(self._data, k, value)
+            self._store(self._new, k, value)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._new.clear()
+        self._loaded.clear()
+        self.reset_stats()
+
+    # --- sharing between processes / runs --------------------------------
+
+    def take_new(self) -> Dict[Hashable, Any]:
+        """Entries computed since the last call (to send back to a parent)."""
+        new = dict(self._new)
+        self._new.clear()
+        return new
+
+    def update(self, entries: Mapping[Hashable, Any]) -> None:
+        """Add precomputed entries without touching the hit/miss counters."""
+        for k, value in entries.items():
+            self._store(self._data, k, value)
+
+    def save(self, path: Path, *, version: str) -> None:
+        """Write the table as JSON (keys must be strings), atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": version, "entries": dict(self._data)}
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    def load(self, path: Path, *, version: str) -> int:
+        """Warm up from a table written by ``save``; once per path per process.
+
+        A missing, unreadable or other-version table is ignored. Returns the
+        number of entries loaded.
+        """
+        marker = f"{Path(path)}|{version}"
+        if marker in self._loaded:
+            return 0
+        self._loaded.add(marker)
+        raw = read_table(path)
+        if raw is None or raw.get("version") != version:
+            return 0
+        entries = raw.get("entries") or {}
+        # Keep whatever this process already learnt as the most recent
+        mine = OrderedDict(self._data)
+        self._data.clear()
+        self.update(entries)
+        self.update(mine)
+        return len(entries)
+
+
+def read_table(path: Path) -> Optional[Dict[str, Any]]:
+    """Raw {"version", "entries"} payload of a saved table, or None."""
+    try:
+        raw = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return raw if isinstance(raw, dict) else None
@@ -0,0 +1,153 @@
+"""OCR helpers: rasterise pages with PyMuPDF and run them through Tesseract.
+
+Pages of one document can be OCR'd concurrently on a small process pool.
+Each Tesseract call is single-threaded inside the pool (OMP_THREAD_LIMIT=1),
+otherwise N workers x M OpenMP threads would fight over the same cores.
+Batch and supervised workers set the same limit (limit_ocr_threads), since
+a worker given one OCR page at a time runs Tesseract itself.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+from .cancel import RunCancelled, check_cancelled
+
+# Resolution used to rasterise pages for Tesseract. 300 dpi is Tesseract's
+# sweet spot for typical printed documents.
+OCR_DPI = 300
+
+# (width, height, 8-bit grayscale samples) - cheap to send to a worker process
+RawPage = Tuple[int, int, bytes]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_pid = 0  # the process that started _pool
+
+
+def default_ocr_workers() -> int:
+    """A sensible pool size for interactive use: every core but one."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def render_page(page: "fitz.Page", dpi: int = OCR_DPI) -> RawPage:
+    """Render one page to raw 8-bit grayscale samples, straight from memory.
+
+    No poppler process, no intermediate image files and no PNG encoding.
+    """
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return pix.width, pix.height, pix.samples
+
+
+def ocr_raw_page(raw: RawPage) -> str:
+    """OCR one rendered page (runs in the caller or in a pool worker)."""
+    from PIL import Image
+    import pytesseract
+
+    width, height, samples = raw
+    image = Image.frombytes("L", (width, height), samples)
+    return pytesseract.image_to_string(image)
+
+
+def limit_ocr_threads() -> None:
+    """Keep every Tesseract this process starts to one OpenMP thread.
+
+    Initializer of every worker process that may OCR: the page pool here
+    and the batch / supervised file workers, which run Tesseract
+    themselves when they OCR one page at a time.
+    """
+    # Read by Tesseract's OpenMP runtime when pytesseract launches it
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Reuse one OCR pool across documents instead of spawning per file."""
+    global _pool, _pool_workers, _pool_pid
+    if _pool is not None and _pool_pid != os.getpid():
+        # Inherited through fork (e.g. by a batch worker): it belongs to the
+        # parent, so leave it alone and start our own
+        _pool, _pool_workers = None, 0
+    if _pool is None or _pool_workers != max_workers:
+        shutdown_ocr_pool()
+        _pool = ProcessPoolExecutor(max_workers=max_workers, initializer=limit_ocr_threads)
+        _pool_workers = max_workers
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def shutdown_ocr_pool() -> None:
+    global _pool, _pool_workers
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(wait=True, cancel_futures=True)
+    _pool = None
+    _pool_workers = 0
+
+
+atexit.register(shutdown_ocr_pool)
+
+
+def ocr_pages(
+    doc: "fitz.Document",
+    page_numbers: Sequence[int],
+    *,
+    dpi: int = OCR_DPI,
+    max_workers: int = 1,
+) -> List[str]:
+    """OCR the given (0-based) pages of an open document, in the same order.
+
+    With max_workers > 1 pages are rendered here and OCR'd on the pool.
+    At most two pages per worker are in flight so memory stays bounded
+    even for long scanned documents.
+
+    The run's RunToken (see cancel.py) is checked before every page.
+    """
+    if max_workers <= 1 or len(page_numbers) <= 1:
+        texts = []
+        for i in page_numbers:
+            check_cancelled()
+            texts.append(ocr_raw_page(render_page(doc[i], dpi)))
+        return texts
+
+    pool = _get_pool(max_workers)
+    results: List[str] = []
+    in_flight: Deque[Future] = deque()
+
+    try:
+        for i in page_numbers:
+            check_cancelled()
+            if len(in_flight) >= 2 * max_workers:
+                results.append(in_flight.popleft().result())
+            in_flight.append(pool.submit(ocr_raw_page, render_page(doc[i], dpi)))
+
+        while in_flight:
+            check_cancelled()
+            results.append(in_flight.popleft().result())
+    except BrokenProcessPool:
+        # A worker died (e.g. Tesseract crashed): start fresh next time
+        shutdown_ocr_pool()
+        raise
+    except RunCancelled:
+        # Don't leave the shared pool busy with pages nobody will read
+        for future in in_flight:
+            future.cancel()
+        raise
+    return results
+
+
+def ocr_document_legacy(data: bytes, dpi: int = OCR_DPI) -> List[str]:
+    """Last resort when PyMuPDF can't open the file: rasterise with poppler.
+
+    Needs the optional pdf2image package and poppler on PATH.
+    """
+    from pdf2image import convert_from_bytes
+    import pytesseract
+
+    images = convert_from_bytes(data, dpi=dpi, grayscale=True)
+    return [pytesseract.image_to_string(im) for im in images]
@@ -1,59 +1,474 @@
 from __future__ import annotations
+import io
+import json
+import os
 from pathlib import Path
-from typing import List, cast
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple, Union, cast
 
 import fitz  # PyMuPDF
 import PyPDF2
 
+from ...common.system import default_cache_dir
+from .cache import DiskCache, make_key, sha256_bytes
+from .cancel import check_cancelled
+from .ocr import OCR_DPI, ocr_document_legacy, ocr_pages
+
 class NoTextError(RuntimeError):
     """Raised when we can't get any usable text from a PDF."""
     pass
 
-def extract_text(path: str, *, debug: bool = False, use_ocr: bool = False) -> str:
-    pdf_path = Path(path)
-    text = ""
+# --- PDF input ---
+#
+# Everything that opens a PDF takes a path or the PDF itself, already in
+# memory (bytes / bytearray / memoryview) or as a binary file object, so a
+# PDF from a queue, archive or upload never has to be written to disk.
+PdfSource = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, BinaryIO]
+
+_Buffer = Union[bytes, bytearray, memoryview]
+
+
+def read_pdf_source(source: PdfSource) -> Tuple[_Buffer, str]:
+    """Return (PDF bytes, display name) for a path, buffer or file object.
+
+    Buffers are used as they are, without a copy. A file object is read
+    from its current position; its name is used when it has one.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source, "<bytes>"
+    if hasattr(source, "read"):
+        data = source.read()
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise TypeError("PDF file objects must be opened in binary mode")
+        return data, pdf_source_name(source)
+    if isinstance(source, (str, os.PathLike)):
+        path = Path(source)
+        return path.read_bytes(), path.name
+    raise TypeError(f"Expected a path, bytes or binary file object, got {type(source).__name__}")
+
+
+def pdf_source_name(source: PdfSource) -> str:
+    """Short name for messages: the file name, or <bytes> / <stream>."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return "<bytes>"
+    if isinstance(source, (str, os.PathLike)):
+        return Path(source).name
+    name = getattr(source, "name", None)
+    return Path(name).name if isinstance(name, str) and name else "<stream>"
+
+# --- Text cache ---
+#
+# Extracting text (and especially OCR) is by far the slowest part of a batch,
+# and the PDFs rarely change between runs. Results are cached on disk, keyed
+# by the SHA-256 of the PDF bytes + EXTRACTOR_ID + the OCR mode (OCR_ID).
+#
+# An entry holds the pages read so far and whether that is all of them:
+# a parser that stops early (early_stop) caches the leading pages it read,
+# and a later read that needs more carries on from there.
+#
+# Bump TEXT_CACHE_VERSION whenever the extraction logic changes in a way
+# that would produce different text; old entries are then discarded.
+TEXT_CACHE_VERSION = "2"
+EXTRACTOR_ID = "pymupdf>pypdf2>tesseract"
+OCR_ID = "per-page>pymupdf-gray"
+
+# A page with less text than this is treated as a scanned image and, when
+# OCR is enabled, run through Tesseract on its own.
+MIN_PAGE_CHARS_FOR_NO_OCR = 100
+
+_text_cache: Optional[DiskCache] = None
+
+
+def get_text_cache() -> Optional[DiskCache]:
+    """Return the shared text cache (None if disabled via PARSINGTOOL_NO_CACHE)."""
+    global _text_cache
+    if os.environ.get("PARSINGTOOL_NO_CACHE"):
+        return None
+    if _text_cache is None:
+        _text_cache = DiskCache(default_cache_dir() / "text", version=TEXT_CACHE_VERSION)
+    return _text_cache
+
+
+def set_text_cache(cache: Optional[DiskCache]) -> None:
+    """Swap the shared text cache (mainly for tests and tools)."""
+    global _text_cache
+    _text_cache = cache
+
+
+def text_cache_key(pdf_sha256: str, use_ocr: bool, ocr_dpi: int = OCR_DPI) -> str:
+    ocr_part = f"ocr={OCR_ID}@{ocr_dpi}" if use_ocr else "ocr=0"
+    return make_key(pdf_sha256, EXTRACTOR_ID, ocr_part)
+
+
+def _is_thin(page_text: str) -> bool:
+    """True when a page's text layer is missing or too thin to trust."""
+    return len(page_text.strip()) < MIN_PAGE_CHARS_FOR_NO_OCR
+
+
+def _ocr_thin_pages(
+    pages: List[str],
+    doc: Optional["fitz.Document"],
+    data: _Buffer,
+    *,
+    dpi: int = OCR_DPI,
+    max_ocr_workers: int = 1,
+    debug: bool = False,
+) -> List[str]:
+    """OCR only the pages whose text layer is thin, keeping page order.
+
+    A mixed PDF (good text page + scanned signature page) only pays for OCR
+    on the scanned page. Pages are rendered from the already-open PyMuPDF
+    document. If PyMuPDF couldn't open the file we don't have a page list
+    to work from, so every page is rasterised and OCR'd.
+    """
+    if doc is None:
+        ocr_text = ocr_document_legacy(bytes(data), dpi)
+        if debug:
+            print(f"[info] OCR'd all {len(ocr_text)} page(s) (pdf2image)")
+        return ocr_text
+
+    thin = [i for i, page_text in enumerate(pages) if _is_thin(page_text)]
+    if not thin:
+        return pages
+
+    merged = list(pages)
+    ocr_results = ocr_pages(doc, thin, dpi=dpi, max_workers=max_ocr_workers)
+    for i, ocr_text in zip(thin, ocr_results):
+        # Keep whichever version of the page has more real text
+        if len(ocr_text.strip()) > len(merged[i].strip()):
+            merged[i] = ocr_text
+
+    if debug:
+        print(f"[info] OCR'd {len(thin)} of {len(pages)} page(s) at {dpi} dpi")
+    return merged
+
+
+def _extract_pages(
+    data: _Buffer,
+    *,
+    debug: bool = False,
+    use_ocr: bool = False,
+    ocr_dpi: int = OCR_DPI,
+    max_ocr_workers: int = 1,
+) -> Tuple[List[str], bool]:
+    """Decode the PDF and return (one text string per page, cacheable).
+
+    The result is not cacheable when OCR was wanted but failed (for example
+    Tesseract isn't installed yet), so a later run can still try again.
+    """
+    pages: List[str] = []
+    cacheable = True
+    doc: Optional[fitz.Document] = None
 
     # Try PyMuPDF first
     try:
-        with fitz.open(str(pdf_path)) as doc:
-            pages = cast(List[str], [page.get_text() or "" for page in doc])
-        text = "\n".join(pages)
+        doc = fitz.open(stream=data, filetype="pdf")
+        for page in doc:
+            check_cancelled()
+            pages.append(cast(str, page.get_text() or ""))
         if debug:
             print("[info] Extracted text with PyMuPDF")
     except Exception as e1:
+        if doc is not None:
+            doc.close()
+            doc = None
         if debug:
             print(f"[warn] PyMuPDF failed: {e1}")
         try:
-            reader = PyPDF2.PdfReader(str(pdf_path))
+            reader = PyPDF2.PdfReader(io.BytesIO(data))
             pages = [p.extract_text() or "" for p in reader.pages]
-            text = "\n".join(pages)
             if debug:
                 print("[info] Extracted text with PyPDF2")
         except Exception as e2:
             if debug:
                 print(f"[warn] PyPDF2 failed: {e2}")
-            text = ""
-    
-    # If we got only a tiny amount of text, treat it as image-only
-    # and run OCR when the user has enabled it.
-    MIN_TEXT_CHARS_FOR_NO_OCR = 200
+            pages = []
+
+    try:
+        if use_ocr:
+            try:
+                pages = _ocr_thin_pages(
+                    pages,
+                    doc,
+                    data,
+                    dpi=ocr_dpi,
+                    max_ocr_workers=max_ocr_workers,
+                    debug=debug,
+                )
+            except Exception as e:
+                cacheable = False
+                if debug:
+                    print(f"[warn] OCR failed: {e}")
+    finally:
+        # Keep the document open for OCR rendering, close it afterwards
+        if doc is not None:
+            doc.close()
+
+    return pages, cacheable
+
+
+def _cached_pages(
+    cache: Optional[DiskCache], key: str, debug: bool
+) -> Optional[Tuple[List[str], bool]]:
+    """(pages, complete) from the text cache, or None."""
+    if cache is None:
+        return None
+    hit = cache.get(key)
+    if hit is None:
+        return None
+    entry = json.loads(hit.decode("utf-8"))
+    if debug:
+        what = "text" if entry["complete"] else f"the first {len(entry['pages'])} page(s)"
+        print(f"[info] Loaded {what} from cache")
+    return entry["pages"], entry["complete"]
+
 
-    if use_ocr and len(text.strip()) < MIN_TEXT_CHARS_FOR_NO_OCR:
+def _cache_pages(cache: Optional[DiskCache], key: str, pages: List[str], complete: bool) -> None:
+    if cache is not None:
+        entry = {"pages": pages, "complete": complete}
+        cache.put(key, json.dumps(entry).encode("utf-8"))
+
+
+def _normalise(text: str) -> str:
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def iter_pages(
+    source: PdfSource,
+    *,
+    debug: bool = False,
+    use_ocr: bool = False,
+    use_cache: bool = True,
+    ocr_dpi: int = OCR_DPI,
+    max_ocr_workers: int = 1,
+) -> Iterator[Tuple[int, str]]:
+    """Yield (page_no, text) one page at a time, page_no starting at 1.
+
+    Pages are pulled from PyMuPDF lazily, so a caller that stops early never
+    pays for the remaining pages (nor for OCR'ing them). With `use_ocr`,
+    thin pages are OCR'd as they come up. The pages read are cached, so a
+    caller that stops at the same place next time doesn't open the PDF;
+    one that reads further continues after the cached pages.
+
+    `source` is a path, the PDF bytes or a binary file object.
+
+    Raises NoTextError at the end if no page had any text and OCR is off.
+    """
+    data, name = read_pdf_source(source)
+    cache = get_text_cache() if use_cache else None
+    key = text_cache_key(sha256_bytes(data), use_ocr, ocr_dpi)
+
+    got_text = False
+    cached, complete = _cached_pages(cache, key, debug) or ([], False)
+    for i, page_text in enumerate(cached):
+        clean = _normalise(page_text)
+        got_text = got_text or bool(clean.strip())
+        yield i + 1, clean
+    if not complete:
+        for page_no, page_text in _read_pages(
+            data, cache, key, debug, use_ocr, ocr_dpi, max_ocr_workers, cached
+        ):
+            clean = _normalise(page_text)
+            got_text = got_text or bool(clean.strip())
+            yield page_no, clean
+
+    if not got_text and not use_ocr:
+        raise NoTextError(f"No extractable text in {name}")
+
+
+def _read_pages(
+    data: _Buffer,
+    cache: Optional[DiskCache],
+    key: str,
+    debug: bool,
+    use_ocr: bool,
+    ocr_dpi: int,
+    max_ocr_workers: int,
+    cached: List[str],
+) -> Iterator[Tuple[int, str]]:
+    """Lazily extract (and OCR) the pages after the `cached` ones. The
+    pages read are cached when the caller stops, or when we get to the end."""
+    try:
+        doc = fitz.open(stream=data, filetype="pdf")
+    except Exception as e:
+        if debug:
+            print(f"[warn] PyMuPDF failed: {e}")
+        # The PyPDF2 / poppler fallbacks work on the whole file anyway
+        fallback, cacheable = _extract_pages(data, debug=debug, use_ocr=use_ocr, ocr_dpi=ocr_dpi)
+        if cacheable:
+            _cache_pages(cache, key, fallback, True)
+        for i, page_text in enumerate(fallback[len(cached):], start=len(cached)):
+            yield i + 1, page_text
+        return
+
+    # With OCR, pages are read in windows of `max_ocr_workers` so the thin
+    # ones in a window can still be OCR'd in parallel; a caller that stops
+    # early wastes at most one window.
+    window = max(1, max_ocr_workers) if use_ocr else 1
+    pages: List[str] = list(cached)
+    cacheable = True
+    complete = False
+    try:
+        for start in range(len(cached), doc.page_count, window):
+            check_cancelled()
+            numbers = range(start, min(start + window, doc.page_count))
+            texts = {i: doc[i].get_text() or "" for i in numbers}
+            thin = [i for i in numbers if _is_thin(texts[i])] if use_ocr else []
+            if thin:
+                try:
+                    ocr_results = ocr_pages(doc, thin, dpi=ocr_dpi, max_workers=max_ocr_workers)
+                    for i, ocr_text in zip(thin, ocr_results):
+                        # Keep whichever version of the page has more real text
+                        if len(ocr_text.strip()) > len(texts[i].strip()):
+                            texts[i] = ocr_text
+                except Exception as e:
+                    cacheable = False
+                    if debug:
+                        print(f"[warn] OCR failed on pages {thin[0] + 1}-{thin[-1] + 1}: {e}")
+            for i in numbers:
+                pages.append(texts[i])
+                yield i + 1, texts[i]
+        complete = True
+    finally:
+        doc.close()
+        # Also when the caller stopped early: next time it won't open the PDF
+        if cacheable and (len(pages) > len(cached) or complete):
+            _cache_pages(cache, key, pages, complete)
+
+
+def extract_text(
+    source: PdfSource,
+    *,
+    debug: bool = False,
+    use_ocr: bool = False,
+    use_cache: bool = True,
+    ocr_dpi: int = OCR_DPI,
+    max_ocr_workers: int = 1,
+    stop_at: Optional[Callable[[str], bool]] = None,
+    until: Optional[Callable[[List[str]], bool]] = None,
+) -> str:
+    """Text of the PDF, pages joined with newlines.
+
+    `source` is a path, the PDF bytes (bytes, bytearray, memoryview) or a
+    binary file object; in-memory PDFs are opened straight from memory.
+
+    Callers that only need the first part of a document can stop early:
+
+    - `stop_at(page_text)`: True for a page that starts the part we don't
+      want (terms and conditions, appendix...); it and every later page
+      are skipped.
+    - `until(pages_so_far)`: True once the pages read so far are enough.
+
+    Either one switches to reading page by page through iter_pages.
+    """
+    if stop_at is not None or until is not None:
+        read = iter_pages(
+            source,
+            debug=debug,
+            use_ocr=use_ocr,
+            use_cache=use_cache,
+            ocr_dpi=ocr_dpi,
+            max_ocr_workers=max_ocr_workers,
+        )
+        kept: List[str] = []
         try:
-            from pdf2image import convert_from_path
-            import pytesseract
+            kept = select_pages((text for _, text in read), stop_at=stop_at, until=until, debug=debug)
+        except NoTextError:
+            pass  # reported below, same as a full read
+        finally:
+            read.close()
+        return _finish_text(kept, pdf_source_name(source), debug=debug, use_ocr=use_ocr)
+
+    data, name = read_pdf_source(source)
+
+    cache = get_text_cache() if use_cache else None
+    key = text_cache_key(sha256_bytes(data), use_ocr, ocr_dpi)
+
+    cached = _cached_pages(cache, key, debug)
+    if cached is not None and cached[1]:
+        pages = cached[0]
+    else:
+        pages, cacheable = _extract_pages(
+            data,
+            debug=debug,
+            use_ocr=use_ocr,
+            ocr_dpi=ocr_dpi,
+            max_ocr_workers=max_ocr_workers,
+        )
+        if cacheable:
+            _cache_pages(cache, key, pages, True)
+
+    return _finish_text(pages, name, debug=debug, use_ocr=use_ocr)
+
 
-            pages = convert_from_path(str(pdf_path))
-            ocr_text = [pytesseract.image_to_string(im) for im in pages]
-            text = "\n".join(ocr_text)
+def select_pages(
+    pages: Iterable[str],
+    *,
+    stop_at: Optional[Callable[[str], bool]] = None,
+    until: Optional[Callable[[List[str]], bool]] = None,
+    debug: bool = False,
+) -> List[str]:
+    """The leading pages a parser wants, by extract_text's stop_at / until
+    rules. `pages` is consumed lazily, so later pages are never produced."""
+    kept: List[str] = []
+    for page_no, page_text in enumerate(pages, start=1):
+        if stop_at is not None and stop_at(page_text):
             if debug:
-                print("[info] Extracted text with OCR")
-        except Exception as e:
+                print(f"[info] Stop marker on page {page_no}; skipping the rest")
+            break
+        kept.append(page_text)
+        if until is not None and until(kept):
             if debug:
-                print(f"[warn] OCR failed: {e}")
+                print(f"[info] Read enough after page {page_no}")
+            break
+    return kept
 
+
+def first_page_text(
+    source: PdfSource,
+    *,
+    use_ocr: bool = False,
+    use_cache: bool = True,
+    ocr_dpi: int = OCR_DPI,
+) -> str:
+    """Text of page 1 only, for a quick look at a document (see shared/classify.py).
+
+    Comes from the text cache when the document was read before (with or
+    without OCR); otherwise only the first page is decoded and, with
+    `use_ocr`, OCR'd if its text layer is thin. Nothing is cached. A PDF
+    that can't be opened gives "".
+    """
+    data, _ = read_pdf_source(source)
+    cache = get_text_cache() if use_cache else None
+    if cache is not None:
+        digest = sha256_bytes(data)
+        for ocr in (False, True):
+            cached = _cached_pages(cache, text_cache_key(digest, ocr, ocr_dpi), False)
+            if cached and cached[0] and cached[0][0].strip():
+                return _normalise(cached[0][0])
+
+    try:
+        doc = fitz.open(stream=data, filetype="pdf")
+    except Exception:
+        return ""
+    try:
+        if doc.page_count == 0:
+            return ""
+        text = doc[0].get_text() or ""
+        if use_ocr and _is_thin(text):
+            try:
+                ocr_text = ocr_pages(doc, [0], dpi=ocr_dpi)[0]
+                if len(ocr_text.strip()) > len(text.strip()):
+                    text = ocr_text
+            except Exception:
+                pass  # keep the thin text layer
+    finally:
+        doc.close()
+    return _normalise(text)
+
+
+def _finish_text(pages: List[str], name: str, *, debug: bool, use_ocr: bool) -> str:
     # Normalise line endings
-    clean = text.replace("\r\n", "\n").replace("\r", "\n")
+    clean = _normalise("\n".join(pages))
 
     # If we still have no text, signal that this file basically
     # needs OCR (image-only or corrupted).
@@ -63,7 +478,6 @@ def extract_text(path: str, *, debug: bool = False, use_ocr: bool = False) -> st
         if not use_ocr:
             # Only raise this special error when OCR is disabled;
             # with OCR enabled it's just a hard failure.
-            raise NoTextError(f"No extractable text in {pdf_path.name}")
+            raise NoTextError(f"No extractable text in {name}")
 
     return clean
-
@@ -0,0 +1,152 @@
+"""Precompiled grade / product-token matching shared by all pipelines.
+
+Product lines are parsed once per document (and once per batch for
+domestic ZAPIs), so the token tables are compiled here at import time
+instead of rebuilding a regex per grade on every call.
+
+A ``TokenMatcher`` answers "which is the highest-priority token that
+occurs anywhere in this text?" with one scan: all tokens go into a single
+alternation inside a lookahead (a trie for plain words), so at each
+position the regex reports the best token starting there.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class TokenMatcher:
+    """Tokens as (regex, normalised value) pairs, in priority order."""
+
+    def __init__(self, tokens: Sequence[Tuple[str, str]], flags: int = re.IGNORECASE) -> None:
+        self.values: List[str] = [value for _, value in tokens]
+        # Individual patterns, for plucking the chosen token out of the text
+        self.patterns: List[re.Pattern] = [re.compile(p, flags) for p, _ in tokens]
+        self._words: Optional[Dict[str, int]] = None
+        alternation = "|".join(f"(?P<t{i}>{p})" for i, (p, _) in enumerate(tokens))
+        # Tokens that start on a word boundary only need trying there
+        anchor = r"\b" if all(p.startswith(r"\b") for p, _ in tokens) else ""
+        self._scan = re.compile(f"{anchor}(?=(?:{alternation}))", flags)
+
+    @classmethod
+    def from_words(cls, words: Sequence[str]) -> "TokenMatcher":
+        """Whole words/phrases matched case-insensitively, longest first
+        (ties keep list order); each one normalises to itself.
+
+        The scan is a trie-shaped regex ("s(?:sr|upr(?:eme)?|...)"), so each
+        word boundary costs one walk down the trie instead of one attempt
+        per token.
+        """
+        ordered = sorted(words, key=len, reverse=True)
+        matcher = cls([(r"\b" + re.escape(w) + r"\b", w) for w in ordered])
+        matcher._words = {w.casefold(): i for i, w in reversed(list(enumerate(ordered)))}
+        matcher._scan = re.compile(rf"\b(?=({_trie_regex(ordered)})\b)", re.IGNORECASE)
+        return matcher
+
+    def _index(self, m: re.Match) -> Optional[int]:
+        if self._words is None:
+            return int(m.lastgroup[1:])
+        return self._words.get(m.group(1).casefold())
+
+    def best(self, text: str) -> Optional[int]:
+        """Index of the highest-priority token found in `text`, or None."""
+        best: Optional[int] = None
+        for m in self._scan.finditer(text):
+            i = self._index(m)
+            if i is None:
+                # Exotic Unicode case folding the lookup table doesn't know
+                return next((j for j, p in enumerate(self.patterns) if p.search(text)), None)
+            if best is None or i < best:
+                best = i
+                if best == 0:
+                    break
+        return best
+
+    def find(self, text: str) -> str:
+        """Normalised value of the best token, or "" if there is none."""
+        i = self.best(text)
+        return "" if i is None else self.values[i]
+
+    def pluck(self, text: str, repl: str = " ") -> Tuple[str, str]:
+        """Find the best token and replace every occurrence of it with `repl`.
+
+        Returns (value, remaining text); value is "" if nothing matched.
+        """
+        i = self.best(text)
+        if i is None:
+            return "", text
+        return self.values[i], self.patterns[i].sub(repl, text)
+
+
+def _trie_regex(words: Sequence[str]) -> str:
+    """One regex matching any of `words`, greedy so longer words win."""
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w.casefold():
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end of a word
+
+    def build(node: Dict[str, dict]) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# ---------------------------------------------------------------------------
+# Export / PI product lines
+# ---------------------------------------------------------------------------
+
+KNOWN_GRADES = [
+    "SSR", "Supr", "XNo1", "XNo.1", "X No 1", "X No.1",
+    "Premium", "Supreme", "Select", "Std", "Standard",
+    "Mfr", "Manufacturing", "H&S", "Rejects", "Mixed",
+    "Carm", "Nonpareil"
+]
+
+# Longest grade wins ("Standard" before "Std"), ties keep list order
+EXPORT_GRADE_MATCHER = TokenMatcher.from_words(KNOWN_GRADES)
+
+# Phrases that are a grade on their own. Each one found is plucked out of
+# the line in this order and the last one wins.
+SPECIAL_GRADES: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"splits\s*&\s*broken|splits&broken", re.IGNORECASE), "Splits & Broken"),
+    (re.compile(r"\bmfg\s*gr\b", re.IGNORECASE), "Mfg Gr"),
+    (re.compile(r"\bsatake\b", re.IGNORECASE), "H&S Satake"),
+    (re.compile(r"\bhelius\b", re.IGNORECASE), "H&S Helius"),
+]
+_ANY_SPECIAL_GRADE = re.compile("|".join(p.pattern for p, _ in SPECIAL_GRADES), re.IGNORECASE)
+
+
+def pluck_special_grade(text: str) -> Tuple[str, str]:
+    """Remove special grade phrases; returns (grade or "", remaining text)."""
+    grade = ""
+    # Nearly every line has none, so check all of them in one scan first
+    if not _ANY_SPECIAL_GRADE.search(text):
+        return grade, text
+    for pattern, name in SPECIAL_GRADES:
+        if pattern.search(text):
+            grade = name
+            text = pattern.sub(" ", text)
+    return grade, text
+
+
+# ---------------------------------------------------------------------------
+# Domestic ZAPI product lines
+# ---------------------------------------------------------------------------
+
+# Explicit patterns first (case-insensitive), normalised to one spelling
+DOMESTIC_GRADE_MATCHER = TokenMatcher([
+    (r"\bSSR\b", "SSR"),
+    (r"\bSUPR\b", "Supr"),
+    (r"\bSupr\b", "Supr"),
+    # XNo1 forms: XNO1, X No1, X No.1, Xno1
+    (r"\bX\s*NO\.?\s*1\b", "XNo1"),
+    (r"\bXNO1\b", "XNo1"),
+    (r"\bXno1\b", "XNo1"),
+])
@@ -0,0 +1,166 @@
+"""Structured progress events for batch runs, delivered in batches.
+
+Batch drivers report what happens to each file as a ``ProgressEvent``
+(file started / finished / failed, rows produced, worker seconds, stage).
+A ``ProgressTracker`` folds the events into a ``ProgressSnapshot`` with
+throughput and an ETA.
+
+A UI shouldn't pay for every event: a 10k-file batch produces tens of
+thousands of them. ``CoalescingEmitter`` buffers events and hands them
+over, together with the latest snapshot, at most every `interval` seconds
+from a timer thread, so a Tk GUI schedules a few redraws a second however
+fast the files go by.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+# Event kinds
+RUN_STARTED = "run_started"
+STAGE_STARTED = "stage_started"  # `total` more files to go through `stage` (e.g. the OCR pass)
+FILE_STARTED = "file_started"  # the run is now waiting on this file
+FILE_FINISHED = "file_finished"  # `rows` written, `seconds` of worker time
+FILE_FAILED = "file_failed"  # `error` / `error_type`
+LOG = "log"  # a human-readable `message`
+RUN_FINISHED = "run_finished"
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    kind: str
+    name: str = ""  # the file (Source_File name), if any
+    stage: str = ""  # "parse", "ocr", "reused", "resumed", ...
+    rows: int = 0
+    seconds: Optional[float] = None
+    total: int = 0
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    message: str = ""
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    total: int
+    done: int
+    failed: int
+    rows: int
+    elapsed: float
+    files_per_second: float
+    eta: Optional[float]  # seconds left, None until there's a rate to go by
+    stage_seconds: Dict[str, float] = field(default_factory=dict)  # worker time per stage
+
+    @property
+    def finished(self) -> int:
+        return self.done + self.failed
+
+
+class ProgressTracker:
+    """Running totals of a batch, updated from its events."""
+
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._started = clock()
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.rows = 0
+        self.stage_seconds: Dict[str, float] = {}
+
+    def update(self, event: ProgressEvent) -> None:
+        if event.kind == STAGE_STARTED:
+            self.total += event.total
+        elif event.kind == FILE_FINISHED:
+            self.done += 1
+            self.rows += event.rows
+        elif event.kind == FILE_FAILED:
+            self.failed += 1
+        if event.seconds is not None and event.stage:
+            self.stage_seconds[event.stage] = self.stage_seconds.get(event.stage, 0.0) + event.seconds
+
+    def snapshot(self) -> ProgressSnapshot:
+        elapsed = self._clock() - self._started
+        finished = self.done + self.failed
+        rate = finished / elapsed if elapsed > 0 else 0.0
+        left = max(0, self.total - finished)
+        eta = left / rate if rate > 0 else None
+        return ProgressSnapshot(
+            total=self.total,
+            done=self.done,
+            failed=self.failed,
+            rows=self.rows,
+            elapsed=elapsed,
+            files_per_second=rate,
+            eta=eta,
+            stage_seconds=dict(self.stage_seconds),
+        )
+
+
+ProgressCallback = Callable[[List[ProgressEvent], ProgressSnapshot], None]
+
+
+class CoalescingEmitter:
+    """Collect events from any thread and deliver them in batches.
+
+    ``deliver(events, snapshot)`` is called from a timer thread every
+    `interval` seconds while there is something new, and once more by
+    ``close()`` with whatever is left. Use it as a context manager.
+    """
+
+    def __init__(self, deliver: ProgressCallback, *, interval: float = 0.25) -> None:
+        self.deliver = deliver
+        self.interval = interval
+        self.tracker = ProgressTracker()
+        self._events: List[ProgressEvent] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "CoalescingEmitter":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def emit(self, event: ProgressEvent) -> None:
+        with self._lock:
+            self.tracker.update(event)
+            self._events.append(event)
+
+    def flush(self) -> None:
+        with self._lock:
+            events, self._events = self._events, []
+            snapshot = self.tracker.snapshot()
+        if events:
+            self.deliver(events, snapshot)
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+def format_progress(snap: ProgressSnapshot) -> str:
+    """One status line, e.g. '120/1000 files (2 failed) - 45.1 files/s - ETA 0:19'."""
+    text = f"{snap.finished}/{snap.total} files"
+    if snap.failed:
+        text += f" ({snap.failed} failed)"
+    text += f" - {snap.files_per_second:.1f} files/s"
+    if snap.eta is not None and snap.finished < snap.total:
+        minutes, seconds = divmod(int(round(snap.eta)), 60)
+        text += f" - ETA {minutes}:{seconds:02d}"
+    return text
@@ -0,0 +1,119 @@
+"""Cache of parsed rows, keyed by the extracted text and the parser code.
+
+The text cache (pdf_utils) saves re-reading and re-OCR'ing a PDF; this
+one saves re-parsing the text. An entry's key is:
+
+    pipeline name + fingerprint of the parser modules + SHA-256 of the text
+
+The fingerprint is taken over the modules that turn text into rows (see
+each pipeline's PARSER_MODULES), so editing the domestic regexes leaves
+cached export results valid, and a re-run with no code changes is just a
+cache read. The text extractor itself is left out of the fingerprint: a
+change there changes the text, and with it the key.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+from ...common.system import default_cache_dir
+from .cache import DiskCache, make_key, sha256_bytes
+from .fingerprint import modules_fingerprint
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RESULT_CACHE_VERSION = "1"
+
+# Only the code that parses text into rows counts for the fingerprint
+_EXTRACTOR_MODULES = ("ParsingTool.parsing.shared.pdf_utils",)
+
+_result_cache: Optional[DiskCache] = None
+
+
+def get_result_cache() -> Optional[DiskCache]:
+    """Return the shared result cache (None if disabled via PARSINGTOOL_NO_CACHE)."""
+    global _result_cache
+    if os.environ.get("PARSINGTOOL_NO_CACHE"):
+        return None
+    if _result_cache is None:
+        _result_cache = DiskCache(default_cache_dir() / "results", version=RESULT_CACHE_VERSION)
+    return _result_cache
+
+
+def set_result_cache(cache: Optional[DiskCache]) -> None:
+    """Swap the shared result cache (mainly for tests and tools)."""
+    global _result_cache
+    _result_cache = cache
+
+
+def text_parser_fingerprint(parser_modules: Iterable[str]) -> str:
+    """Fingerprint of a pipeline's parsing code, minus the text extractor."""
+    return modules_fingerprint(m for m in parser_modules if m not in _EXTRACTOR_MODULES)
+
+
+def result_key(pipeline: str, fingerprint: str, text: str) -> str:
+    return make_key(pipeline, fingerprint, sha256_bytes(text.encode("utf-8")))
+
+
+def cached_json(
+    pipeline: str,
+    fingerprint: str,
+    text: str,
+    parse: Callable[[str], Any],
+    *,
+    debug: bool = False,
+) -> Any:
+    """parse(text), or its cached result; the result must be JSON-able.
+
+    A cached result comes back as decoded JSON (tuples become lists).
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return parse(text)
+
+    key = result_key(pipeline, fingerprint, text)
+    hit = cache.get(key)
+    if hit is not None:
+        try:
+            value = json.loads(hit.decode("utf-8"))
+        except ValueError:
+            pass  # damaged entry: parse again and overwrite it
+        else:
+            if debug:
+                print(f"[info] Loaded parsed {pipeline} rows from cache")
+            return value
+
+    value = parse(text)
+    cache.put(key, json.dumps(value).encode("utf-8"))
+    return value
+
+
+def cached_frame(
+    pipeline: str,
+    fingerprint: str,
+    text: str,
+    parse: Callable[[str], "pd.DataFrame"],
+    *,
+    debug: bool = False,
+) -> "pd.DataFrame":
+    """Like cached_json for a parser that returns a DataFrame."""
+    # Imported here so the pandas-free domestic pipeline can share this module
+    import pandas as pd
+
+    if get_result_cache() is None:
+        return parse(text)
+
+    parsed = []
+
+    def parse_to_json(t: str) -> dict:
+        df = parse(t)
+        parsed.append(df)
+        return {"columns": list(df.columns), "records": df.to_dict("records")}
+
+    value = cached_json(pipeline, fingerprint, text, parse_to_json, debug=debug)
+    if parsed:
+        return parsed[0]
+    return pd.DataFrame(value["records"], columns=value["columns"])
@@ -0,0 +1,279 @@
+"""A process pool that can kill and replace a single hung or crashed worker.
+
+Some corrupt PDFs send PyMuPDF or PyPDF2 into a loop for minutes, and some
+scans make Tesseract hang. ``ProcessPoolExecutor`` can't stop one task: a
+hung worker holds its slot forever, and a worker that segfaults breaks the
+whole pool. ``SupervisedPool`` keeps one task per worker process and
+watches the clock:
+
+* a task that runs past `timeout` seconds fails with ``FileTimeoutError``;
+  its worker (with any OCR / Tesseract processes it started) is killed and
+  a fresh one takes its place;
+* a worker that dies mid-task fails that task with ``WorkerCrashedError``
+  and is replaced the same way.
+
+Every other task carries on, so one bad file costs one slot for at most
+`timeout` seconds. ``submit`` returns an ordinary Future, so callers use it
+like any other executor.
+
+Workers are not daemon processes: a parse that OCRs its pages starts the
+page pool from ocr.py inside the worker, and daemon processes can't have
+children. Instead the pool stops its workers on shutdown, and any still
+alive when the interpreter exits are killed with their process group.
+"""
+
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Executor, Future
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+
+class FileTimeoutError(Exception):
+    """A file took longer than its wall-clock budget; its worker was killed."""
+
+
+class WorkerCrashedError(Exception):
+    """The worker process died (e.g. a segfault in a PDF library) mid-file."""
+
+
+def _worker_loop(conn: Connection) -> None:
+    """Run tasks sent by the pool until told to stop (None)."""
+    if hasattr(os, "setpgrp"):
+        # Own process group, so a timeout kills Tesseract and page-OCR
+        # pools started by this worker along with it
+        os.setpgrp()
+    from .ocr import limit_ocr_threads, shutdown_ocr_pool
+
+    limit_ocr_threads()
+    parent = os.getppid()
+    try:
+        while True:
+            # Forked siblings hold copies of our pipe, so a dead pool doesn't
+            # always mean EOF: check on the parent while idle
+            if not conn.poll(1.0):
+                if os.getppid() != parent:
+                    return
+                continue
+            try:
+                task = conn.recv()
+            except EOFError:
+                return
+            if task is None:
+                return
+            fn, args = task
+            try:
+                outcome: Tuple[bool, Any] = (True, fn(*args))
+            except BaseException as e:
+                outcome = (False, e)
+            try:
+                conn.send(outcome)
+            except Exception as e:  # the result or exception didn't pickle
+                conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+    finally:
+        # A Process target's exit skips atexit, so stop the page-OCR pool here
+        shutdown_ocr_pool()
+
+
+# Workers not stopped yet, killed at exit (they aren't daemons, and
+# multiprocessing would otherwise wait for them forever)
+_live_workers: "weakref.WeakSet[_Worker]" = weakref.WeakSet()
+
+
+@atexit.register
+def _kill_live_workers() -> None:
+    for worker in list(_live_workers):
+        worker.kill()
+
+
+class _Worker:
+    def __init__(self, ctx: Any) -> None:
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_loop, args=(child,), daemon=False)
+        self.process.start()
+        child.close()
+        _live_workers.add(self)
+        self.future: Optional[Future] = None
+        self.started = 0.0
+
+    def kill(self) -> None:
+        pid = self.process.pid
+        if pid is not None and hasattr(os, "killpg"):
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        _live_workers.discard(self)
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+            _live_workers.discard(self)
+
+
+class SupervisedPool(Executor):
+    """Executor running each task in a worker process with a time limit.
+
+    `timeout` is the wall-clock budget of one task in seconds (None: no
+    limit, but crashed workers are still replaced). Functions and arguments
+    must be picklable, as for ProcessPoolExecutor.
+    """
+
+    def __init__(self, max_workers: int = 1, *, timeout: Optional[float] = None) -> None:
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._ctx = multiprocessing.get_context()
+        self._pending: Deque[Tuple[Future, Callable[..., Any], tuple]] = deque()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = self._ctx.Pipe(duplex=False)
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        if kwargs:
+            raise TypeError("SupervisedPool.submit takes positional arguments only")
+        future: Future = Future()
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("cannot submit to a pool that has been shut down")
+            self._pending.append((future, fn, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._supervise, daemon=True)
+                self._thread.start()
+        self._wake()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._closing = True
+            if cancel_futures:
+                while self._pending:
+                    self._pending.popleft()[0].cancel()
+            thread = self._thread
+        self._wake()
+        if thread is not None and wait:
+            thread.join()
+
+    # --- supervisor thread ---------------------------------------------
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send_bytes(b"")
+        except OSError:
+            pass
+
+    def _next_task(self) -> Optional[Tuple[Future, Callable[..., Any], tuple]]:
+        with self._lock:
+            while self._pending:
+                task = self._pending.popleft()
+                if task[0].set_running_or_notify_cancel():
+                    return task
+        return None
+
+    def _dispatch(self) -> None:
+        """Hand pending tasks to idle workers, starting workers as needed."""
+        while True:
+            idle = next((w for w in self._workers if w.future is None), None)
+            if idle is None and len(self._workers) >= self.max_workers:
+                return
+            task = self._next_task()
+            if task is None:
+                return
+            if idle is not None and not idle.process.is_alive():
+                self._replace(idle)  # died while idle
+                idle = None
+            if idle is None:
+                idle = _Worker(self._ctx)
+                self._workers.append(idle)
+            future, fn, args = task
+            try:
+                idle.conn.send((fn, args))
+            except Exception as e:  # fn or args don't pickle, or a broken pipe
+                future.set_exception(e)
+                continue
+            idle.future = future
+            idle.started = time.monotonic()
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        self._workers.remove(worker)
+
+    def _finish(self, worker: _Worker, ok: bool, value: Any) -> None:
+        future, worker.future = worker.future, None
+        if future is None:
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def _supervise(self) -> None:
+        try:
+            while True:
+                self._dispatch()
+                busy = [w for w in self._workers if w.future is not None]
+                with self._lock:
+                    if self._closing and not busy and not self._pending:
+                        break
+                wait_for: Optional[float] = None
+                if self.timeout is not None and busy:
+                    first_deadline = min(w.started for w in busy) + self.timeout
+                    wait_for = max(0.0, first_deadline - time.monotonic())
+                ready = wait(
+                    [self._wake_r]
+                    + [w.conn for w in busy]
+                    + [w.process.sentinel for w in busy],
+                    timeout=wait_for,
+                )
+
+                if self._wake_r in ready:
+                    while self._wake_r.poll():
+                        self._wake_r.recv_bytes()
+
+                for w in busy:
+                    if w.conn in ready or w.process.sentinel in ready:
+                        try:
+                            ok, value = w.conn.recv()
+                        except (EOFError, OSError):
+                            code = w.process.exitcode
+                            self._finish(w, False, WorkerCrashedError(
+                                f"worker process died (exit code {code})"
+                            ))
+                            self._replace(w)
+                        else:
+                            self._finish(w, ok, value)
+                    elif self.timeout is not None and time.monotonic() - w.started >= self.timeout:
+                        self._finish(w, False, FileTimeoutError(
+                            f"timed out after {self.timeout:g}s"
+                        ))
+                        self._replace(w)
+        finally:
+            for w in list(self._workers):
+                if w.future is not None:
+                    self._finish(w, False, WorkerCrashedError("pool was shut down"))
+                    w.kill()
+                else:
+                    w.stop()
+            self._workers.clear()
+            with self._lock:
+                while self._pending:
+                    self._pending.popleft()[0].cancel()
@@ -12,28 +12,40 @@ BASE_TEST_DIR = Path("pdf_csv_test_folders")
 class ModeConfig:
     help: str
     input_subdir: str
-    run_batch: Callable[[Path, Path, bool, bool], None]
+    run_batch: Callable[[Path, Path, bool, bool, int, bool], None]
 
 
 # --- Thin wrappers that lazy-import the real pipeline code ---
 
 
-def _run_export(input_dir: Path, output_dir: Path, use_ocr: bool, debug: bool) -> None:
+def _run_export(
+    input_dir: Path, output_dir: Path, use_ocr: bool, debug: bool, workers: int, incremental: bool
+) -> None:
     from ParsingTool.parsing.export_orders.pipeline import run_batch as export_run_batch
 
-    export_run_batch(input_dir, output_dir, use_ocr=use_ocr, debug=debug)
+    export_run_batch(
+        input_dir, output_dir, use_ocr=use_ocr, debug=debug, workers=workers, incremental=incremental
+    )
 
 
-def _run_domestic(input_dir: Path, output_dir: Path, use_ocr: bool, debug: bool) -> None:
+def _run_domestic(
+    input_dir: Path, output_dir: Path, use_ocr: bool, debug: bool, workers: int, incremental: bool
+) -> None:
     from ParsingTool.parsing.domestic_zapi.pipeline import run_batch as domestic_run_batch
 
-    domestic_run_batch(input_dir, output_dir, use_ocr=use_ocr, debug=debug)
+    domestic_run_batch(
+        input_dir, output_dir, use_ocr=use_ocr, debug=debug, workers=workers, incremental=incremental
+    )
 
 
-def _run_pi(input_dir: Path, output_dir: Path, use_ocr: bool, debug: bool) -> None:
+def _run_pi(
+    input_dir: Path, output_dir: Path, use_ocr: bool, debug: bool, workers: int, incremental: bool
+) -> None:
     from ParsingTool.parsing.packing_list.pipeline import run_batch as pi_run_batch
 
-    pi_run_batch(input_dir, output_dir, use_ocr=use_ocr, debug=debug)
+    pi_run_batch(
+        input_dir, output_dir, use_ocr=use_ocr, debug=debug, workers=workers, incremental=incremental
+    )
 
 
 MODES: dict[str, ModeConfig] = {
@@ -60,6 +72,8 @@ def main() -> None:
     parser.add_argument("mode", choices=sorted(MODES.keys()))
     parser.add_argument("--ocr", action="store_true", help="Enable OCR fallback")
     parser.add_argument("--debug", action="store_true", help="Verbose debug logging")
+    parser.add_argument("--workers", type=int, default=1, help="Parse PDFs on N processes")
+    parser.add_argument("--incremental", action="store_true", help="Skip PDFs unchanged since the last run")
     args = parser.parse_args()
 
     mode_cfg = MODES[args.mode]
@@ -72,7 +86,7 @@ def main() -> None:
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    mode_cfg.run_batch(input_dir, output_dir, args.ocr, args.debug)
+    mode_cfg.run_batch(input_dir, output_dir, args.ocr, args.debug, args.workers, args.incremental)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+"""Benchmark: per-field re.search loop vs EXPORT_FIELD_EXTRACTOR.
+
+Usage:
+    python dev_workbench/bench_field_extractor.py [PDF or .txt ...]
+
+Without arguments a synthetic two-page export order is used. Both methods
+are checked to give identical results before timing.
+"""
+import re
+import sys
+import os
+import timeit
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ParsingTool.parsing.shared.export_patterns import (
+    EXPORT_FIELD_EXTRACTOR,
+    EXPORT_FIELD_PATTERNS,
+    FLAGS,
+)
+
+HEADER = """EXPORT ORDER
+Date Requested: 10/02/2025
+OLAM Ref No.: OR-1234
+Delivery Number: 80012345
+Sale Order Number: 3001234
+Packer : Seaway Intermodal Pty Ltd
+Vessel ETD
+:
+16.07.2025
+Final Destination : Singapore
+Container Size : Container (40ft) X 1 Food Quality
+26132 Alm Kern NP SSR 25/27 22.68KG ctn
+20 PAL
+Batch : F013561001
+"""
+
+TERMS = "\n".join(
+    f"{i}. The goods shall be shipped in accordance with the terms agreed "
+    "between buyer and seller, inspected at the port of loading." for i in range(1, 120)
+)
+
+
+def load_texts(args):
+    if not args:
+        return {"synthetic": HEADER + TERMS + "\n" + HEADER + TERMS}
+
+    from ParsingTool.parsing.shared.pdf_utils import extract_text
+
+    texts = {}
+    for arg in args:
+        path = Path(arg)
+        if path.suffix.lower() == ".pdf":
+            texts[path.name] = extract_text(str(path))
+        else:
+            texts[path.name] = path.read_text(encoding="utf-8")
+    return texts
+
+
+def search_each(text):
+    return {f: re.search(p, text, FLAGS) for f, p in EXPORT_FIELD_PATTERNS.items()}
+
+
+def same(a, b):
+    return all(
+        (a[f] is None and b[f] is None)
+        or (a[f] is not None and b[f] is not None and a[f].span() == b[f].span())
+        for f in EXPORT_FIELD_PATTERNS
+    )
+
+
+def main():
+    for name, text in load_texts(sys.argv[1:]).items():
+        assert same(search_each(text), EXPORT_FIELD_EXTRACTOR.first_matches(text)), name
+
+        n = 200
+        old = min(timeit.repeat(lambda: search_each(text), number=n, repeat=5)) / n
+        new = min(timeit.repeat(lambda: EXPORT_FIELD_EXTRACTOR.first_matches(text), number=n, repeat=5)) / n
+        print(
+            f"{name}: {len(text):,} chars  "
+            f"re.search x{len(EXPORT_FIELD_PATTERNS)}: {old * 1e6:8.1f} us  "
+            f"extractor: {new * 1e6:8.1f} us  "
+            f"speedup: {old / new:4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
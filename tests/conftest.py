@@ -0,0 +1,49 @@
+import fitz
+import pytest
+
+from ParsingTool.parsing.shared import pdf_utils, result_cache
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep the on-disk caches of every test in its own tmp_path, never in
+    the user's real cache folder."""
+    monkeypatch.setenv("PARSINGTOOL_CACHE_DIR", str(tmp_path / "cache"))
+    # The shared caches open lazily, so drop any a previous test opened
+    monkeypatch.setattr(pdf_utils, "_text_cache", None)
+    monkeypatch.setattr(result_cache, "_result_cache", None)
+
+
+def _make_pdf(*pages, path=None):
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        if text:
+            page.insert_textbox(fitz.Rect(36, 36, 560, 800), text)
+    if path is None:
+        data = doc.tobytes()
+        doc.close()
+        return data
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def _order_page(delivery):
+    return (
+        f"Delivery Number: {delivery}\nBatch : F01356{delivery}\n"
+        "26132 Alm Kern NP SSR 25/27 22.68KG ctn\n20 PAL\n"
+    )
+
+
+@pytest.fixture
+def make_pdf():
+    """make_pdf(*pages, path=None): a PDF with one page per text ("" gives a
+    blank page), saved to `path` if given, else returned as bytes."""
+    return _make_pdf
+
+
+@pytest.fixture
+def order_page():
+    """order_page(delivery): a one-page order both batch pipelines parse."""
+    return _order_page
@@ -0,0 +1,149 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from ParsingTool.parsing.shared.batch import (
+    CombinedOutput,
+    map_files,
+    map_files_tiered,
+    ocr_workers_per_file,
+    plan_cpu_budget,
+    run_combined_batch,
+)
+
+
+def test_map_files_keeps_input_order_and_collects_errors():
+    inputs = ["3", "oops", "1", "2"]
+
+    results = list(map_files(int, inputs, workers=2))
+
+    assert [r.path for r in results] == inputs
+    assert [r.value for r in results] == [3, None, 1, 2]
+    assert results[1].error and not results[1].ok
+    assert all(r.ok for i, r in enumerate(results) if i != 1)
+
+
+def test_map_files_serial_matches_parallel():
+    inputs = [str(i) for i in range(40)]
+    serial = [r.value for r in map_files(int, inputs, workers=1)]
+    parallel = [r.value for r in map_files(int, inputs, workers=3)]
+    assert serial == parallel == list(range(40))
+
+
+def test_ocr_budget_is_split_across_batch_workers():
+    assert ocr_workers_per_file(8, 1) == 8
+    assert ocr_workers_per_file(8, 4) == 2
+    assert ocr_workers_per_file(2, 8) == 1
+
+
+def test_cpu_budget_never_oversubscribes():
+    for cores in range(1, 33):
+        for per_file in (1, 2, 4, 8):
+            b = plan_cpu_budget(cores, max_ocr_workers=per_file)
+            assert b.parse_workers >= 1 and b.ocr_workers >= 1
+            if cores > 1:
+                assert b.parse_workers + b.ocr_workers * b.ocr_pages_per_file <= cores
+
+    b = plan_cpu_budget(8, max_ocr_workers=2)
+    assert (b.parse_workers, b.ocr_workers, b.ocr_pages_per_file) == (4, 2, 2)
+    assert plan_cpu_budget(8, use_ocr=False).parse_workers == 8
+
+
+def _omp_thread_limit(_):
+    return os.environ.get("OMP_THREAD_LIMIT")
+
+
+@pytest.mark.parametrize("timeout", [None, 30])
+def test_batch_workers_run_tesseract_single_threaded(monkeypatch, timeout):
+    # A worker given one OCR page runs Tesseract itself, not on the page pool
+    monkeypatch.delenv("OMP_THREAD_LIMIT", raising=False)
+
+    results = list(map_files(_omp_thread_limit, ["a", "b"], workers=2, timeout=timeout))
+
+    assert [r.value for r in results] == ["1", "1"]
+    assert "OMP_THREAD_LIMIT" not in os.environ
+
+
+def _text_layer(value):
+    if value.startswith("scan"):
+        return None
+    return value.upper()
+
+
+def _ocr(value):
+    return f"ocr:{value}"
+
+
+def test_tiered_map_escalates_slow_files_and_keeps_order():
+    inputs = ["a", "scan1", "b", "scan2", "c"]
+
+    results = list(map_files_tiered(
+        _text_layer, _ocr, inputs,
+        escalate=lambda res: res.value is None,
+        workers=2, slow_workers=1,
+    ))
+
+    assert [r.path for r in results] == inputs
+    assert [r.value for r in results] == ["A", "ocr:scan1", "B", "ocr:scan2", "C"]
+
+
+def _rows_or_crash(path):
+    if path.name == "stop.pdf":
+        raise KeyboardInterrupt
+    return {"rows": [{"A": path.stem, "Source_File": path.name}]}
+
+
+def test_combined_batch_streams_rows_and_keeps_partial_on_interrupt(tmp_path):
+    out = CombinedOutput("rows", tmp_path / "combined.csv", ["A", "B", "Source_File"])
+    files = [Path("b.pdf"), Path("a.pdf")]
+
+    run_combined_batch("T", files, _rows_or_crash, [out])
+    assert out.path.read_text(encoding="utf-8").splitlines() == [
+        "A,B,Source_File", "a,,a.pdf", "b,,b.pdf",
+    ]
+
+    # Interrupted half-way: the old CSV is untouched, rows so far are in .partial
+    with pytest.raises(KeyboardInterrupt):
+        run_combined_batch("T", files + [Path("c.pdf"), Path("stop.pdf")], _rows_or_crash, [out])
+    assert out.path.read_text(encoding="utf-8").count("\n") == 3
+    partial = (tmp_path / "combined.csv.partial").read_text(encoding="utf-8")
+    assert partial.splitlines() == ["A,B,Source_File", "a,,a.pdf", "b,,b.pdf", "c,,c.pdf"]
+
+
+def _rows_for(path):
+    return {"rows": [{"A": path.read_text(), "Source_File": path.name}]}
+
+
+def test_identical_files_are_parsed_once(tmp_path, capsys):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    for name, body in [("a.pdf", "x"), ("a (1).pdf", "x"), ("b.pdf", "y"), ("c.pdf", "x")]:
+        (in_dir / name).write_text(body)
+    files = sorted(in_dir.iterdir())
+    out = CombinedOutput("rows", tmp_path / "combined.csv", ["A", "Source_File"])
+
+    parsed = []
+
+    def parse(path):
+        parsed.append(path.name)
+        return _rows_for(path)
+
+    run_combined_batch("T", files, parse, [out])
+    assert parsed == ["a (1).pdf", "b.pdf"]
+    assert out.path.read_text(encoding="utf-8").splitlines() == [
+        "A,Source_File", "x,a (1).pdf", "x,a.pdf", "y,b.pdf", "x,c.pdf",
+    ]
+    assert "Duplicate: a.pdf has the same content as a (1).pdf" in capsys.readouterr().out
+
+    run_combined_batch("T", files, _rows_for, [out], duplicates="collapse")
+    assert out.path.read_text(encoding="utf-8").splitlines() == [
+        "A,Source_File", "x,a (1).pdf", "y,b.pdf",
+    ]
+
+    parsed.clear()
+    run_combined_batch("T", files, parse, [out], duplicates="off")
+    assert len(parsed) == 4
+
+    with pytest.raises(ValueError):
+        run_combined_batch("T", files, parse, [out], duplicates="merge")
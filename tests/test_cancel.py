@@ -0,0 +1,73 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ParsingTool.parsing.shared.batch import CombinedOutput, map_files, run_combined_batch
+from ParsingTool.parsing.shared.cancel import (
+    RunCancelled,
+    RunToken,
+    check_cancelled,
+    using_token,
+)
+
+
+def test_pause_waits_until_resume():
+    with RunToken() as token:
+        token.pause()
+        threading.Timer(0.3, token.resume).start()
+        started = time.monotonic()
+        with using_token(token):
+            check_cancelled()
+        assert time.monotonic() - started >= 0.25
+        assert not token.paused
+
+
+def test_cancel_releases_a_paused_check():
+    with RunToken() as token:
+        token.pause()
+        threading.Timer(0.2, token.cancel).start()
+        with using_token(token), pytest.raises(RunCancelled):
+            check_cancelled()
+    # Outside a run there is nothing to check
+    check_cancelled()
+
+
+def test_cancelled_run_stops_between_files():
+    token = RunToken()
+    seen = []
+    try:
+        with pytest.raises(RunCancelled):
+            for res in map_files(str, ["a", "b", "c"], token=token):
+                seen.append(res.value)
+                token.cancel()
+    finally:
+        token.close()
+    assert seen == ["a"]
+
+
+class _CancelAfter:
+    """parse_one that cancels the run once `n` files are parsed."""
+
+    def __init__(self, token, n):
+        self.token, self.n = token, n
+
+    def __call__(self, path):
+        self.n -= 1
+        if self.n < 0:
+            self.token.cancel()
+            self.token.check()
+        return {"rows": [{"A": path.stem, "Source_File": path.name}]}
+
+
+def test_cancelled_combined_batch_keeps_partial_output(tmp_path):
+    out = CombinedOutput("rows", tmp_path / "combined.csv", ["A", "Source_File"])
+    files = [Path(f"{c}.pdf") for c in "abcd"]
+
+    with RunToken() as token, pytest.raises(RunCancelled):
+        run_combined_batch("T", files, _CancelAfter(token, 2), [out], duplicates="off", token=token)
+
+    assert not out.path.exists()
+    partial = out.path.with_name(out.path.name + ".partial")
+    assert partial.read_text(encoding="utf-8").splitlines() == ["A,Source_File", "a,a.pdf", "b,b.pdf"]
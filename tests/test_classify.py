@@ -0,0 +1,105 @@
+import json
+import os
+
+from ParsingTool.core.controller import ProcessingController
+from ParsingTool.parsing.shared import pdf_utils
+from ParsingTool.parsing.shared.cache import DiskCache
+from ParsingTool.parsing.shared.classify import classify_pdf, classify_text
+
+
+EXPORT_PAGE = (
+    "EXPORT ORDER\nOLAM Ref No.: OR-1234\nDelivery Number: 80012345\n"
+    "Sale Order Number: 3001234\nVessel ETD : 16.07.2025\nFinal Destination : Singapore\n"
+    "20 PAL"
+)
+DOMESTIC_PAGE = (
+    "Delivery 80054321\nPicking request 987654\nOlam Reference OL-777\n"
+    "Customer Delivery Date 10.02.2025\nGross weight 22,680.00 KG"
+)
+PI_PAGE = (
+    "PACKING INSTRUCTION\nPacker :\nSeaway Intermodal\nFinal Destination : Jebel Ali\n"
+    "22.000 PAL\nTo be loaded on PLASTIC export pallets"
+)
+
+
+def test_anchor_scores_pick_the_layout():
+    assert classify_text(EXPORT_PAGE).kind == "export"
+    assert classify_text(DOMESTIC_PAGE).kind == "domestic"
+    assert classify_text(PI_PAGE).kind == "packinglist"
+
+    # Not enough to go on
+    unsure = classify_text("Delivery Number: 80012345\n20 PAL")
+    assert unsure.kind is None
+    assert unsure.scores == {"export": 0, "domestic": 0, "packinglist": 1}
+
+
+def test_classify_pdf_reads_page_one_or_the_cache(tmp_path, monkeypatch, make_pdf):
+    cache = DiskCache(tmp_path / "cache", version="t")
+    monkeypatch.setattr(pdf_utils, "_text_cache", cache)
+
+    # Named like an export order, but it's a PI; page 2 doesn't count
+    pdf = tmp_path / "0080605769_ZAPA.pdf"
+    make_pdf(PI_PAGE, DOMESTIC_PAGE, path=pdf)
+    found = classify_pdf(str(pdf))
+    assert (found.kind, found.by) == ("packinglist", "content")
+
+    # A scanned PDF read (OCR'd) before is classified from the text cache
+    scan = tmp_path / "scan.pdf"
+    make_pdf("", path=scan)
+    assert classify_pdf(str(scan)).blank
+    key = pdf_utils.text_cache_key(pdf_utils.sha256_bytes(scan.read_bytes()), True)
+    cache.put(key, json.dumps({"pages": [DOMESTIC_PAGE], "complete": True}).encode("utf-8"))
+    assert classify_pdf(str(scan)).kind == "domestic"
+
+    # Nothing on the page: the file name decides, as before
+    assert classify_pdf(str(scan), name="order_PI.pdf", use_cache=False).kind == "packinglist"
+
+
+def test_auto_mode_routes_a_mixed_folder(tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setenv("PARSINGTOOL_NO_CACHE", "1")
+    src = tmp_path / "in"
+    src.mkdir()
+    make_pdf(EXPORT_PAGE, path=src / "a.pdf")
+    make_pdf(DOMESTIC_PAGE, path=src / "b.pdf")
+    make_pdf("Nothing to see here", path=src / "c.pdf")
+    out = tmp_path / "out"
+    out.mkdir()
+
+    logs = []
+    controller = ProcessingController(logs.append, timeout=None, resume=False)
+    controller.run(sorted(src.glob("*.pdf")), out, "auto", False, False, False, False, None)
+
+    assert logs[1].startswith("[OK][EXPORT] a.pdf")
+    assert logs[2].startswith("[OK][DOMESTIC] b.pdf")
+    assert logs[3].startswith("[ERROR] c.pdf")
+    assert (out / "a.csv").exists() and (out / "b_batches.csv").exists()
+
+
+def test_auto_combined_mode_classifies_in_the_workers(tmp_path, monkeypatch, make_pdf):
+    from ParsingTool.core import controller as ctl
+
+    monkeypatch.setenv("PARSINGTOOL_NO_CACHE", "1")
+    parent = os.getpid()
+    real_classify = ctl.classify_pdf
+
+    def worker_only_classify(*args, **kwargs):
+        assert os.getpid() != parent, "classified in the parent process"
+        return real_classify(*args, **kwargs)
+
+    # Workers are forked, so they see the patched function too
+    monkeypatch.setattr(ctl, "classify_pdf", worker_only_classify)
+    src = tmp_path / "in"
+    src.mkdir()
+    make_pdf(EXPORT_PAGE, path=src / "a.pdf")
+    make_pdf(DOMESTIC_PAGE, path=src / "b.pdf")
+    make_pdf("Nothing to see here", path=src / "c.pdf")
+    out = tmp_path / "out"
+    out.mkdir()
+
+    logs = []
+    controller = ProcessingController(logs.append, workers=2, timeout=None, resume=False)
+    controller.run(sorted(src.glob("*.pdf")), out, "auto", False, False, False, True, str(src))
+
+    assert "[SKIP] c.pdf: could not tell the document type" in logs
+    assert "[AUTO] 1 EXPORT, 1 DOMESTIC, 0 PI" in logs
+    assert (out / "export_combined.csv").exists()
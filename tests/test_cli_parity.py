@@ -31,7 +31,8 @@ class TestCLIParity(unittest.TestCase):
             out_batches='batches.csv',
             out_sscc='sscc.csv',
             use_ocr=True,
-            debug=True
+            debug=True,
+            max_ocr_workers=1
         )
 
     @patch('ParsingTool.parsing.cli.run_export')
@@ -50,7 +51,8 @@ class TestCLIParity(unittest.TestCase):
             out='output.csv',
             use_ocr=True,
             debug=True,
-            generate_qc=True
+            generate_qc=True,
+            max_ocr_workers=1
         )
 
     @patch('ParsingTool.parsing.export_orders.pipeline.parse_export_pdf')
@@ -0,0 +1,77 @@
+"""The single-pass batch/SSCC scanner must produce the same blocks as the
+original look-ahead window implementation (kept here as the reference)."""
+import random
+import re
+from typing import List
+
+from ParsingTool.parsing.domestic_zapi import pipeline as dom
+from ParsingTool.parsing.shared.text_utils import lines
+
+
+def _legacy_parse_batches_and_sscc(text: str) -> List[dict]:
+    ls = lines(text)
+    blocks: List[dict] = []
+
+    for idx, ln in enumerate(ls):
+        m = dom.BATCH_RE.search(ln)
+        if not m:
+            continue
+        batch = m.group(1)
+        ssccs: List[str] = []
+        product_lines: List[str] = []
+
+        for j in range(idx + 1, min(idx + 60, len(ls))):
+            nxt = ls[j]
+            if dom.BATCH_RE.search(nxt):
+                break
+            for mss in dom.SSCC_RE.finditer(nxt):
+                ssccs.append(mss.group(1))
+            if re.search(r"Gross\s*weight", nxt, flags=re.IGNORECASE):
+                continue
+            if re.match(r"\s*SSCC\b", nxt, flags=re.IGNORECASE):
+                continue
+            if (dom.SIZE_RE.search(nxt) or
+                dom.PACK_RE.search(nxt) or
+                re.search(r"\b(?:Alm|Almonds|Kern|NON VAR|Variety|Grade|Packaging)\b", nxt, re.IGNORECASE)):
+                product_lines.append(nxt)
+
+        blocks.append({
+            "Batch_Number": batch,
+            "sscc_list": ssccs,
+            "product_lines": product_lines[-4:],
+        })
+
+    return blocks
+
+
+LINE_KINDS = [
+    "Batch: F0135{:04d}",
+    "F0135{:04d} 22 PAL 00393012345678901234",
+    "SSCC: 003931234567{:06d}",
+    "SSCC 39312345678901{:04d} Gross weight 1.000 KG",
+    "00393012345678{:06d}",
+    "26132 Alm Kern NP SSR 25/27 22.68KG ctn",
+    "Almonds Kern Supr 23/25 {}",
+    "1T bag",
+    "Gross weight 21,000 KG",
+    "Terms and conditions apply {}",
+    "",
+]
+
+
+def test_scanner_matches_legacy_window_scan():
+    rng = random.Random(42)
+    texts = [
+        "",
+        "no batches here\nSSCC: 003931234567890123",
+        # SSCCs on the batch line itself are not collected; duplicates are kept
+        "F0135001 003931234567890123\nSSCC: 003931234567890124\nF0135001\n1T bag",
+        # A block only sees the 59 lines after its batch line
+        "F0135002\n" + "filler\n" * 58 + "SSCC: 003931234567890125\nSSCC: 003931234567890126\n",
+    ]
+    for _ in range(300):
+        n = rng.randint(0, 250)
+        texts.append("\n".join(rng.choice(LINE_KINDS).format(rng.randint(0, 9999)) for _ in range(n)))
+
+    for text in texts:
+        assert dom._parse_batches_and_sscc(text) == _legacy_parse_batches_and_sscc(text)
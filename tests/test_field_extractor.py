@@ -0,0 +1,36 @@
+import re
+
+from ParsingTool.parsing.shared.export_patterns import (
+    EXPORT_FIELD_EXTRACTOR,
+    EXPORT_FIELD_PATTERNS,
+    FLAGS,
+    FieldExtractor,
+)
+
+SAMPLES = [
+    "",
+    "Date Requested: 10/02/2025\nDelivery Number: 555555\nVariety: Gala\n  Grade: Supr\n",
+    "Update notes\nOLAM Ref No.: OR-1\nVessel ETD\n:\n16.07.2025\nFinal Destination : Singapore\n",
+    "Container Size\n: Container (40ft) X 1\n\n   Packaging : 25kg ctn\nSSCC Qty: 22\nPallet PAL-1\n",
+    # Non-ASCII text falls back to plain searches ("ſ" case-folds to "s")
+    "ſscc qty 5\nİ Fumigation: none\n3rd Party Storage: RJN\n",
+]
+
+
+def test_extractor_matches_a_search_per_field():
+    for text in SAMPLES:
+        found = EXPORT_FIELD_EXTRACTOR.first_matches(text)
+        assert list(found) == list(EXPORT_FIELD_PATTERNS)
+        for field, pattern in EXPORT_FIELD_PATTERNS.items():
+            expected = re.search(pattern, text, FLAGS)
+            got = found[field]
+            if expected is None:
+                assert got is None, (field, text)
+            else:
+                assert got is not None and got.span() == expected.span(), (field, text)
+
+
+def test_prefix_shortcut_is_skipped_for_top_level_alternation():
+    extractor = FieldExtractor({"a": r"Vessel|(SSCC)", "b": r"^\s*(x)"})
+    assert extractor.first_matches("SSCC then Vessel")["a"].start() == 0
+    assert extractor.extract("\n  x") == {"a": "", "b": "x"}
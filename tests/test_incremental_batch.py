@@ -0,0 +1,38 @@
+from ParsingTool.parsing.export_orders import pipeline as exp
+
+
+def test_incremental_run_only_parses_new_or_changed_files(tmp_path, monkeypatch, make_pdf, order_page):
+    monkeypatch.setenv("PARSINGTOOL_NO_CACHE", "1")
+    in_dir = tmp_path / "in"
+    out_dir = tmp_path / "out"
+    in_dir.mkdir()
+    out_dir.mkdir()
+    for n in ("111111", "222222"):
+        make_pdf(order_page(n), path=in_dir / f"{n}.pdf")
+
+    parsed = []
+    real_parse = exp.parse_export_pdf
+
+    def counting_parse(path, **kwargs):
+        parsed.append(path)
+        return real_parse(path, **kwargs)
+
+    monkeypatch.setattr(exp, "parse_export_pdf", counting_parse)
+
+    exp.run_batch(in_dir, out_dir, incremental=True)
+    first = (out_dir / "export_combined.csv").read_text(encoding="utf-8")
+    assert len(parsed) == 2
+
+    # Nothing changed: nothing is parsed, output is identical
+    parsed.clear()
+    exp.run_batch(in_dir, out_dir, incremental=True)
+    assert parsed == []
+    assert (out_dir / "export_combined.csv").read_text(encoding="utf-8") == first
+
+    # One new file: only that file is parsed, old rows are kept in order
+    make_pdf(order_page("000000"), path=in_dir / "000000.pdf")
+    exp.run_batch(in_dir, out_dir, incremental=True)
+    assert [p.endswith("000000.pdf") for p in parsed] == [True]
+
+    lines = (out_dir / "export_combined.csv").read_text(encoding="utf-8").splitlines()
+    assert [line.split(",")[-1] for line in lines[1:]] == ["000000.pdf", "111111.pdf", "222222.pdf"]
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import pytest
+
+from ParsingTool.parsing.shared.batch import CombinedOutput, run_combined_batch
+from ParsingTool.parsing.shared.jobs import JobQueue
+
+
+def _pdfs(folder, *names):
+    for name in names:
+        (folder / name).write_bytes(name.encode())
+    return [folder / name for name in names]
+
+
+def test_job_states_and_fresh_start_after_completion(tmp_path):
+    a, b = _pdfs(tmp_path, "a.pdf", "b.pdf")
+    with JobQueue(tmp_path / "t.jobs.sqlite") as jobs:
+        assert jobs.plan([a, b], "v1") == set()
+        jobs.start(["a.pdf", "b.pdf"])
+        jobs.finish("a.pdf", {"rows": [{"A": "1"}]}, seconds=0.5)
+        assert jobs.counts() == {"pending": 0, "running": 1, "done": 1, "failed": 0}
+        assert not jobs.complete()
+
+    # Reopened after a crash: b was still running, so it's pending again
+    with JobQueue(tmp_path / "t.jobs.sqlite") as jobs:
+        assert jobs.plan([a, b], "v1") == {"a.pdf"}
+        assert jobs.stored("a.pdf")["value"] == {"rows": [{"A": "1"}]}
+        jobs.finish("b.pdf", error="timed out", error_type="FileTimeoutError")
+        assert jobs.counts() == {"pending": 0, "running": 0, "done": 1, "failed": 1}
+
+    # Interrupted again: the failed file is tried again, not counted as finished
+    with JobQueue(tmp_path / "t.jobs.sqlite") as jobs:
+        assert jobs.plan([a, b], "v1") == {"a.pdf"}
+        assert jobs.counts()["pending"] == 1
+        jobs.finish("b.pdf", {"rows": []})
+        assert jobs.complete()
+
+        # A completed job starts over
+        assert jobs.plan([a, b], "v1") == set()
+
+
+_parsed = []
+
+
+def _rows_or_crash(path):
+    if path.name == "stop.pdf":
+        raise KeyboardInterrupt
+    _parsed.append(path.name)
+    return {"rows": [{"A": path.stem, "Source_File": path.name}]}
+
+
+def test_interrupted_batch_resumes_where_it_stopped(tmp_path):
+    src = tmp_path / "in"
+    src.mkdir()
+    files = _pdfs(src, "a.pdf", "b.pdf", "stop.pdf", "z.pdf")
+    out = CombinedOutput("rows", tmp_path / "combined.csv", ["A", "Source_File"])
+    job_path = tmp_path / "combined.jobs.sqlite"
+
+    with JobQueue(job_path) as jobs, pytest.raises(KeyboardInterrupt):
+        run_combined_batch("T", files, _rows_or_crash, [out], jobs=jobs)
+    assert _parsed == ["a.pdf", "b.pdf"]
+
+    # The culprit is fixed; the restart only parses what didn't finish
+    (src / "stop.pdf").rename(src / "c.pdf")
+    files = sorted(src.glob("*.pdf"))
+    _parsed.clear()
+    with JobQueue(job_path) as jobs:
+        run_combined_batch("T", files, _rows_or_crash, [out], jobs=jobs)
+        assert jobs.counts()["done"] == 4
+    assert _parsed == ["c.pdf", "z.pdf"]
+    assert out.path.read_text(encoding="utf-8").splitlines() == [
+        "A,Source_File", "a,a.pdf", "b,b.pdf", "c,c.pdf", "z,z.pdf",
+    ]
+
+
+def test_per_file_job_version_tracks_the_parser_code(monkeypatch):
+    from ParsingTool.core import controller
+
+    seen = []
+    monkeypatch.setattr(controller, "modules_fingerprint", lambda names: seen.append(set(names)) or "fp")
+    assert controller._files_job_version("export", True) == "export-fp-ocr1"
+    assert "ParsingTool.parsing.export_orders.pipeline" in seen[0]
+
+    controller._files_job_version("auto", False)
+    assert {
+        "ParsingTool.parsing.domestic_zapi.pipeline",
+        "ParsingTool.parsing.packing_list.pipeline",
+        "ParsingTool.parsing.shared.classify",
+    } <= seen[1]
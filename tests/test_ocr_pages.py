@@ -0,0 +1,26 @@
+import pytesseract
+
+from ParsingTool.parsing.shared import pdf_utils
+
+GOOD_PAGE = "Delivery Number: 555555 " + "Almonds Kern SSR 23/25 22.68KG ctn " * 5
+
+
+def test_only_thin_pages_are_ocrd(tmp_path, monkeypatch, make_pdf):
+    pdf = tmp_path / "mixed.pdf"
+    make_pdf(GOOD_PAGE, "", path=pdf)
+
+    seen = []
+
+    def fake_image_to_string(image):
+        seen.append((image.mode, image.size))
+        return f"OCR TEXT {len(seen)}"
+
+    monkeypatch.setattr(pytesseract, "image_to_string", fake_image_to_string)
+
+    text = pdf_utils.extract_text(str(pdf), use_ocr=True, use_cache=False, ocr_dpi=72)
+
+    # Only page 2 (the scanned one) went through OCR, rendered in grayscale
+    # straight from PyMuPDF at the requested DPI (A4 at 72 dpi = 595x842) ...
+    assert seen == [("L", (595, 842))]
+    # ... and it was merged back after page 1
+    assert text.index("555555") < text.index("OCR TEXT 1")
@@ -0,0 +1,91 @@
+import json
+
+import fitz
+
+from ParsingTool.parsing.export_orders.pipeline import is_stop_page, parse_export_pdf
+from ParsingTool.parsing.shared import pdf_utils
+from ParsingTool.parsing.shared.cache import DiskCache
+
+
+ORDER_PAGES = [
+    "EXPORT ORDER\nDelivery Number: 80012345\nFinal Destination : Singapore",
+    "Terms and Conditions\n1. Goods remain our property until paid.\n7 days Fumigation with Profume",
+    "Appendix A\nNothing of interest",
+]
+
+
+def test_iter_pages_is_lazy_and_caches_the_pages_read(tmp_path, monkeypatch, make_pdf):
+    pdf = tmp_path / "order.pdf"
+    make_pdf(*ORDER_PAGES, path=pdf)
+    cache = DiskCache(tmp_path / "cache", version="t")
+    monkeypatch.setattr(pdf_utils, "_text_cache", cache)
+    key = pdf_utils.text_cache_key(pdf_utils.sha256_bytes(pdf.read_bytes()), False)
+
+    pages = pdf_utils.iter_pages(str(pdf))
+    page_no, text = next(pages)
+    pages.close()
+    assert page_no == 1 and "80012345" in text
+    assert json.loads(cache.get(key)) == {"pages": [text], "complete": False}
+
+    # Reading on continues after the cached page
+    numbers = [n for n, _ in pdf_utils.iter_pages(str(pdf))]
+    assert numbers == [1, 2, 3]
+    assert json.loads(cache.get(key))["complete"]
+
+    # Served from the cache now, with the same page numbering
+    assert [n for n, _ in pdf_utils.iter_pages(str(pdf))] == [1, 2, 3]
+
+
+def test_early_stopped_document_is_served_from_the_cache(tmp_path, monkeypatch, make_pdf):
+    pdf = tmp_path / "order.pdf"
+    make_pdf(*ORDER_PAGES, path=pdf)
+    monkeypatch.setattr(pdf_utils, "_text_cache", DiskCache(tmp_path / "cache", version="t"))
+    opened = []
+    real_open = fitz.open
+    monkeypatch.setattr(pdf_utils.fitz, "open", lambda *a, **k: opened.append(1) or real_open(*a, **k))
+
+    texts = [pdf_utils.extract_text(str(pdf), stop_at=is_stop_page) for _ in range(3)]
+
+    assert texts[0] == texts[1] == texts[2] and "Terms" not in texts[0]
+    assert len(opened) == 1
+
+
+def test_extract_text_skips_pages_from_the_stop_marker(tmp_path, monkeypatch, make_pdf):
+    pdf = tmp_path / "order.pdf"
+    make_pdf(*ORDER_PAGES, path=pdf)
+    monkeypatch.setattr(pdf_utils, "_text_cache", None)
+    monkeypatch.setenv("PARSINGTOOL_NO_CACHE", "1")
+
+    text = pdf_utils.extract_text(str(pdf), stop_at=is_stop_page)
+    assert "80012345" in text
+    assert "Terms and Conditions" not in text
+
+    first_only = pdf_utils.extract_text(str(pdf), until=lambda pages: len(pages) == 1)
+    assert first_only == text
+
+    # The fumigation line in the terms only leaks in when reading everything
+    assert parse_export_pdf(pdf, early_stop=True)["Fumigation"].iloc[0] == ""
+    assert "7 days" in parse_export_pdf(pdf, early_stop=False)["Fumigation"].iloc[0]
+
+
+FULL_HEADER_PAGE = (
+    "EXPORT ORDER\nDate Requested: 01.07.2025\nOLAM Ref No.: OR-1234\nDelivery Number: 80012345\n"
+    "Sale Order Number: 3001234\nBatch No.: 2 lots\nVessel ETD : 16.07.2025\n"
+    "Final Destination : Singapore\nPacker : Seaway Intermodal Pty Ltd\n"
+    "Almonds Kern NP SSR 25/27 22.68KG ctn\n20 PAL\nTo be loaded on PLASTIC export pallets\n"
+    "2 days Fumigation with Profume\nContainer Size : Container (40ft) X 1 Food Quality"
+)
+
+
+def test_early_stop_waits_for_the_batch_lines(tmp_path, monkeypatch, make_pdf):
+    # Page 1 fills every column on its own; the batches are on page 2
+    monkeypatch.setenv("PARSINGTOOL_NO_CACHE", "1")
+    pdf = make_pdf(
+        FULL_HEADER_PAGE,
+        "Batch : F013561001\n10 PAL\nBatch : F013561002\n10 PAL",
+        path=tmp_path / "order.pdf",
+    )
+
+    df = parse_export_pdf(pdf, early_stop=True)
+
+    assert list(df["Batch Number"]) == ["F013561001", "F013561002"]
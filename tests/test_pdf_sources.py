@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from ParsingTool.parsing.domestic_zapi.pipeline import parse_domestic_pdf
+from ParsingTool.parsing.export_orders.pipeline import parse_export_pdf
+from ParsingTool.parsing.shared import pdf_utils
+
+
+@pytest.fixture(autouse=True)
+def no_text_cache(monkeypatch):
+    monkeypatch.setenv("PARSINGTOOL_NO_CACHE", "1")
+
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview, io.BytesIO])
+def test_extract_text_accepts_in_memory_pdfs(wrap, tmp_path, make_pdf):
+    data = make_pdf("Delivery Number: 80012345")
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(data)
+
+    expected = pdf_utils.extract_text(path)
+    assert "80012345" in expected
+    assert pdf_utils.extract_text(wrap(data)) == expected
+    assert [n for n, _ in pdf_utils.iter_pages(wrap(data))] == [1]
+
+
+def test_file_object_name_is_used_in_errors(tmp_path, make_pdf):
+    path = make_pdf("", path=tmp_path / "blank.pdf")
+
+    with open(path, "rb") as f, pytest.raises(pdf_utils.NoTextError, match="blank.pdf"):
+        pdf_utils.extract_text(f)
+    with pytest.raises(pdf_utils.NoTextError, match="<bytes>"):
+        pdf_utils.extract_text(path.read_bytes())
+
+
+def test_unsupported_source_type():
+    with pytest.raises(TypeError):
+        pdf_utils.extract_text(12345)
+
+
+def test_pipelines_parse_bytes(make_pdf):
+    data = make_pdf("Delivery Number: 80012345\nSale Order Number: 3001234")
+    df = parse_export_pdf(memoryview(data))
+    assert df["Delivery Number"].iloc[0] == "80012345"
+
+    batches, _ = parse_domestic_pdf(io.BytesIO(data))
+    assert isinstance(batches, list)
@@ -0,0 +1,113 @@
+from ParsingTool.parsing.export_orders import pipeline as exp
+from ParsingTool.parsing.shared.memo import LruMemo
+
+
+def test_lru_memo_counts_and_evicts():
+    calls = []
+    memo = LruMemo(lambda s: calls.append(s) or s.upper(), maxsize=2, key=str.strip)
+
+    assert memo("a") == "A"
+    assert memo(" a ") == "A"  # same key
+    memo("b")
+    memo("c")  # evicts "a", the least recently used
+    memo("a")
+
+    assert calls == ["a", "b", "c", "a"]
+    assert memo.stats() == {"hits": 1, "misses": 4, "size": 2, "maxsize": 2}
+
+
+def test_lru_memo_persists_and_merges_worker_entries(tmp_path):
+    table = tmp_path / "table.json"
+    worker = LruMemo(str.upper)
+    worker("x")
+    parent = LruMemo(str.upper)
+    parent.update(worker.take_new())
+    assert worker.take_new() == {}
+    parent.save(table, version="v1")
+
+    fresh = LruMemo(lambda s: "recomputed")
+    assert fresh.load(table, version="v2") == 0  # other parser version: ignored
+    assert fresh.load(table, version="v1") == 1
+    assert fresh.load(table, version="v1") == 0  # only once per process
+    assert fresh("x") == "X"
+    assert fresh.stats()["hits"] == 1
+
+
+def test_parse_product_line_is_memoised():
+    line = "26132 Alm Kern NP SSR 25/27 22.68KG ctn"
+    exp.PRODUCT_LINE_MEMO.clear()
+
+    first = exp.parse_product_line(line)
+    first["Grade"] = "changed by caller"
+    second = exp.parse_product_line("  " + line)
+
+    assert second["Grade"] == "SSR"
+    assert exp.PRODUCT_LINE_MEMO.stats()["hits"] == 1
+
+
+PRODUCT_LINES = [
+    "26132 Alm Kern NP SSR 25/27 22.68KG ctn",
+    "Almonds Kern Non Var H&S Bulk Bags",
+    "9054 / Almonds Kern Supr 23/25 50lb ctn",
+    "Almonds Kern Carmel Ext No 1 50b ctn 27 / 30",
+    "0802.12.00 Inshell Nonpareil 25/27 25/27 1000 kg bag",
+    "Alm Kern Mfg Gr Splits & Broken bulk bags X",
+    "Almonds Kern Satake H&S Helius 12345",
+    "  ",
+    "",
+]
+
+
+def test_vectorised_product_parse_matches_row_by_row():
+    import pandas as pd
+
+    lines = pd.Series(PRODUCT_LINES + [None, "  " + PRODUCT_LINES[0]], index=range(10, 21))
+    exp.PRODUCT_LINE_MEMO.clear()
+
+    df = exp.parse_product_lines(lines)
+
+    assert list(df.index) == list(lines.index)
+    assert list(df.columns) == exp.PRODUCT_FIELDS
+    for idx, line in lines.items():
+        assert df.loc[idx].to_dict() == exp._parse_product_line("" if pd.isna(line) else line), line
+    # Each distinct line was parsed once, and the memo now serves it
+    assert exp.PRODUCT_LINE_MEMO.stats()["misses"] == len(set(l.strip() for l in PRODUCT_LINES))
+    assert exp.parse_product_line(PRODUCT_LINES[2])["Grade"] == "Supr"
+    assert exp.parse_product_lines(pd.Series([], dtype=object)).empty
+
+
+def test_corpus_batch_parses_its_product_lines_up_front(tmp_path, monkeypatch, make_pdf, order_page):
+    from ParsingTool.parsing.shared.corpus import build_corpus
+
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    for n in ("111111", "222222"):
+        make_pdf(order_page(n), path=in_dir / f"{n}.pdf")
+    corpus = tmp_path / "corpus.jsonl.gz"
+    build_corpus(sorted(in_dir.glob("*.pdf")), corpus)
+    exp.PRODUCT_LINE_MEMO.clear()
+
+    def one_at_a_time(line):
+        raise AssertionError(f"parsed on its own: {line!r}")
+
+    monkeypatch.setattr(exp.PRODUCT_LINE_MEMO, "func", one_at_a_time)
+    exp.run_corpus_batch(corpus, tmp_path)
+
+    rows = (tmp_path / "export_combined.csv").read_text(encoding="utf-8")
+    assert "Alm Kern Np" in rows and "SSR" in rows
+
+
+def test_stale_product_table_is_reparsed_in_one_step(tmp_path):
+    import json
+
+    line = "Almonds Kern Supr 23/25 50lb ctn"
+    table = tmp_path / "product_lines.json"
+    table.write_text(json.dumps({"version": "old", "entries": {line: {"Grade": "stale"}}}))
+    exp.PRODUCT_LINE_MEMO.clear()
+
+    exp.prepare_product_table(table)
+
+    saved = json.loads(table.read_text())
+    assert saved["version"] != "old"
+    assert saved["entries"][line]["Grade"] == "Supr"
+    assert exp.parse_product_line(line)["Grade"] == "Supr"
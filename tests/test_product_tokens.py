@@ -0,0 +1,77 @@
+"""The precompiled product-token engine must give the same answers as the
+per-call regex loops it replaced (kept here as references)."""
+import random
+import re
+from typing import Dict
+
+from ParsingTool.parsing.domestic_zapi import pipeline as dom
+from ParsingTool.parsing.export_orders.pipeline import parse_product_line
+from ParsingTool.parsing.shared.product_tokens import KNOWN_GRADES
+
+
+def _legacy_parse_product_line(line: str) -> Dict[str, str]:
+    row = {"Variety": "", "Grade": "", "Size": "N/A", "Packaging": ""}
+    remainder = re.sub(r"^\s*\d+[\s/]+", "", line.strip())
+
+    size_match = re.search(r"\b(\d{2}\s*/\s*\d{2})\b", remainder)
+    if size_match:
+        row["Size"] = size_match.group(1).replace(" ", "")
+        remainder = remainder.replace(size_match.group(0), " ")
+
+    pack_match = re.search(r"\b(\d+(?:[.,]\d+)?)\s*(lb|kg|g|oz|T|b)\b\s*([a-zA-Z]*)", remainder, re.IGNORECASE)
+    if pack_match:
+        full_pack = pack_match.group(0).strip()
+        if "50b" in full_pack.lower() and "ctn" in full_pack.lower():
+            full_pack = full_pack.replace("50b", "50lb")
+        row["Packaging"] = full_pack
+        remainder = remainder.replace(pack_match.group(0), " ")
+    elif "bulk bags" in remainder.lower():
+        row["Packaging"] = "Bulk Bags"
+        remainder = re.sub(r"\bBulk Bags\b", " ", remainder, flags=re.IGNORECASE)
+
+    for pat, grade in [
+        (r"splits\s*&\s*broken|splits&broken", "Splits & Broken"),
+        (r"\bmfg\s*gr\b", "Mfg Gr"),
+        (r"\bsatake\b", "H&S Satake"),
+        (r"\bhelius\b", "H&S Helius"),
+    ]:
+        p = re.compile(pat, re.IGNORECASE)
+        if p.search(remainder):
+            row["Grade"] = grade
+            remainder = p.sub(" ", remainder)
+
+    if not row["Grade"]:
+        for grade in sorted(KNOWN_GRADES, key=len, reverse=True):
+            pattern = r"\b" + re.escape(grade) + r"\b"
+            if re.search(pattern, remainder, re.IGNORECASE):
+                row["Grade"] = grade
+                remainder = re.sub(pattern, " ", remainder, flags=re.IGNORECASE)
+                break
+
+    remainder = re.sub(r"\b\d{2,}\.\d+\.\d+\b", " ", remainder)
+    remainder = re.sub(r"\b\d{3,}\b", " ", remainder)
+    remainder = re.sub(r"\bX\b", " ", remainder, flags=re.IGNORECASE)
+    cleaned_var = re.sub(r"\s+", " ", remainder).strip(" ,.-")
+    row["Variety"] = cleaned_var.title() if cleaned_var else ""
+    return row
+
+
+WORDS = KNOWN_GRADES + [
+    "Almonds", "Kern", "Alm", "NP", "Non Var", "23/25", "27 / 30", "50lb", "ctn", "50b",
+    "22.68KG", "1T", "bag", "Bulk Bags", "Splits & Broken", "splits&broken", "Mfg Gr",
+    "Satake", "helius", "0802.12.00", "9054 /", "26132", "X", "xno1", "std", "STANDARD",
+    "H&S", "supreme", "-", ",",
+]
+
+
+def test_parse_product_line_matches_legacy():
+    rng = random.Random(7)
+    for _ in range(3000):
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 9)))
+        assert parse_product_line(line) == _legacy_parse_product_line(line), line
+
+
+def test_domestic_grade_priority_and_fallback():
+    assert dom._parse_product_fields(["Alm Kern NP xno1 SSR 25/27"])["Grade"] == "SSR"
+    assert dom._parse_product_fields(["Alm Kern X No.1 23/25 12.5KG ctn"])["Grade"] == "XNo1"
+    assert dom._parse_product_fields(["26132 Alm Kern NP 25/27 22.68KG ctn"])["Grade"] == "NP"
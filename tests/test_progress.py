@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from ParsingTool.parsing.shared.batch import CombinedOutput, run_combined_batch
+from ParsingTool.parsing.shared.progress import (
+    FILE_FAILED,
+    FILE_FINISHED,
+    STAGE_STARTED,
+    CoalescingEmitter,
+    ProgressEvent,
+    ProgressTracker,
+    format_progress,
+)
+
+
+def test_tracker_throughput_and_eta():
+    now = [100.0]
+    tracker = ProgressTracker(clock=lambda: now[0])
+    tracker.update(ProgressEvent(STAGE_STARTED, stage="parse", total=10))
+    for i in range(4):
+        tracker.update(ProgressEvent(FILE_FINISHED, f"{i}.pdf", "parse", rows=2, seconds=0.5))
+    tracker.update(ProgressEvent(FILE_FAILED, "bad.pdf", "parse", error="boom"))
+    now[0] += 5.0
+
+    snap = tracker.snapshot()
+    assert (snap.done, snap.failed, snap.rows) == (4, 1, 8)
+    assert snap.files_per_second == 1.0
+    assert snap.eta == 5.0
+    assert snap.stage_seconds == {"parse": 2.0}
+    assert format_progress(snap) == "5/10 files (1 failed) - 1.0 files/s - ETA 0:05"
+
+
+def test_emitter_coalesces_events():
+    batches = []
+    with CoalescingEmitter(lambda events, snap: batches.append((events, snap)), interval=60) as em:
+        for i in range(1000):
+            em.emit(ProgressEvent(FILE_FINISHED, f"{i}.pdf", rows=1))
+
+    assert len(batches) == 1
+    events, snap = batches[0]
+    assert [e.name for e in events] == [f"{i}.pdf" for i in range(1000)]
+    assert snap.done == snap.rows == 1000
+
+
+def _rows(path):
+    if path.name == "bad.pdf":
+        raise ValueError("broken")
+    return {"rows": [{"A": path.stem, "Source_File": path.name}] * 2}
+
+
+def test_combined_batch_reports_each_file(tmp_path):
+    out = CombinedOutput("rows", tmp_path / "combined.csv", ["A", "Source_File"])
+    events = []
+
+    run_combined_batch("T", [Path("b.pdf"), Path("a.pdf"), Path("bad.pdf")], _rows, [out],
+                       duplicates="off", progress=events.append)
+
+    assert events[0] == ProgressEvent(STAGE_STARTED, stage="parse", total=3)
+    done = [(e.kind, e.name, e.rows) for e in events if e.kind in (FILE_FINISHED, FILE_FAILED)]
+    assert done == [
+        (FILE_FINISHED, "a.pdf", 2), (FILE_FINISHED, "b.pdf", 2), (FILE_FAILED, "bad.pdf", 0),
+    ]
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from ParsingTool.parsing.domestic_zapi import pipeline as dom
+from ParsingTool.parsing.export_orders import pipeline as exp
+from ParsingTool.parsing.shared import fingerprint, pdf_utils, result_cache
+from ParsingTool.parsing.shared.cache import DiskCache
+
+
+def _use_tmp_caches(tmp_path, monkeypatch):
+    monkeypatch.delenv("PARSINGTOOL_NO_CACHE", raising=False)
+    monkeypatch.setattr(pdf_utils, "_text_cache", DiskCache(tmp_path / "text", version="t"))
+    monkeypatch.setattr(result_cache, "_result_cache", DiskCache(tmp_path / "results", version="t"))
+
+
+def test_rerun_is_served_from_the_result_cache(tmp_path, monkeypatch, make_pdf, order_page):
+    _use_tmp_caches(tmp_path, monkeypatch)
+    pdf = tmp_path / "order.pdf"
+    make_pdf(order_page("80012345"), path=pdf)
+
+    calls = []
+    real_rows = exp._export_rows
+
+    def counting_rows(*args, **kwargs):
+        calls.append(1)
+        return real_rows(*args, **kwargs)
+
+    monkeypatch.setattr(exp, "_export_rows", counting_rows)
+
+    first = exp.parse_export_pdf(pdf)
+    second = exp.parse_export_pdf(pdf)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+    fresh_batches, fresh_sscc = dom.parse_domestic_pdf(pdf)
+    cached_batches, cached_sscc = dom.parse_domestic_pdf(pdf)
+    assert (cached_batches, cached_sscc) == (fresh_batches, fresh_sscc)
+
+
+def test_fingerprints_only_cover_their_own_pipeline(monkeypatch):
+    before_export = result_cache.text_parser_fingerprint(exp.PARSER_MODULES)
+    before_domestic = result_cache.text_parser_fingerprint(dom.PARSER_MODULES)
+
+    real_bytes = fingerprint._module_bytes
+
+    def edited(name):
+        data = real_bytes(name)
+        return data + b"\n# tweak" if name == dom.__name__ else data
+
+    monkeypatch.setattr(fingerprint, "_module_bytes", edited)
+    fingerprint._fingerprint.cache_clear()
+    try:
+        assert result_cache.text_parser_fingerprint(exp.PARSER_MODULES) == before_export
+        assert result_cache.text_parser_fingerprint(dom.PARSER_MODULES) != before_domestic
+    finally:
+        fingerprint._fingerprint.cache_clear()
@@ -0,0 +1,84 @@
+import os
+import time
+from pathlib import Path
+
+import pytesseract
+
+from ParsingTool.parsing.qc import processing_failure, write_report
+from ParsingTool.parsing.shared import pdf_utils
+from ParsingTool.parsing.shared.batch import CombinedOutput, map_files, run_combined_batch
+
+
+def _parse(path):
+    name = Path(path).stem
+    if name == "hang":
+        time.sleep(60)
+    if name == "crash":
+        os._exit(3)
+    if name == "bad":
+        raise ValueError("not a PDF")
+    return name.upper()
+
+
+def test_hung_and_crashed_files_are_isolated():
+    inputs = ["a", "hang", "b", "crash", "bad", "c"]
+    started = time.monotonic()
+
+    results = list(map_files(_parse, inputs, workers=2, timeout=1))
+
+    assert time.monotonic() - started < 20
+    assert [r.path for r in results] == inputs
+    assert [r.value for r in results] == ["A", None, "B", None, None, "C"]
+    assert results[1].error_type == "FileTimeoutError"
+    assert "timed out after 1s" in results[1].error
+    assert results[3].error_type == "WorkerCrashedError"
+    assert results[4].error_type == "ValueError"
+
+
+def _rows(path):
+    return {"rows": [{"A": _parse(path), "Source_File": path.name}]}
+
+
+def test_batch_reports_timeout_and_keeps_going(tmp_path, capsys):
+    out = CombinedOutput("rows", tmp_path / "combined.csv", ["A", "Source_File"])
+    files = [Path("a.pdf"), Path("hang.pdf"), Path("z.pdf")]
+
+    run_combined_batch("T", files, _rows, [out], duplicates="off", workers=2, timeout=1)
+
+    assert out.path.read_text(encoding="utf-8").splitlines() == [
+        "A,Source_File", "A,a.pdf", "Z,z.pdf",
+    ]
+    assert "[T] TIMEOUT processing hang.pdf: timed out after 1s" in capsys.readouterr().out
+
+
+def test_qc_report_lists_files_that_timed_out(tmp_path):
+    report = tmp_path / "qc_report.md"
+    write_report([processing_failure("hang.pdf", "timed out after 300s", "timeout")], report)
+    text = report.read_text(encoding="utf-8")
+    assert "## hang.pdf" in text
+    assert "### Not processed (timeout)" in text
+    assert "- timed out after 300s" in text
+
+
+def _fake_tesseract(image):
+    return f"OCR by {os.getpid()}"
+
+
+def _ocr_in_worker(path):
+    text = pdf_utils.extract_text(path, use_ocr=True, use_cache=False, ocr_dpi=72, max_ocr_workers=2)
+    return os.getpid(), text
+
+
+def test_supervised_worker_can_ocr_pages_on_its_own_pool(tmp_path, monkeypatch, make_pdf):
+    # Workers are forked, so they (and their page pool) see the fake Tesseract
+    monkeypatch.setattr(pytesseract, "image_to_string", _fake_tesseract)
+    scan = make_pdf("", "", "", path=tmp_path / "scan.pdf")
+
+    (res,) = map_files(_ocr_in_worker, [str(scan)], timeout=60)
+
+    assert res.ok, res.error
+    worker_pid, text = res.value
+    pages = text.split("\n")
+    assert len(pages) == 3 and all(p.startswith("OCR by ") for p in pages)
+    # OCR'd on the worker's page pool, not serially in the worker itself
+    assert f"OCR by {worker_pid}" not in pages
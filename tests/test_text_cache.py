@@ -0,0 +1,57 @@
+import os
+import time
+
+from ParsingTool.parsing.shared import pdf_utils
+from ParsingTool.parsing.shared.cache import DiskCache
+
+
+def test_disk_cache_roundtrip(tmp_path):
+    cache = DiskCache(tmp_path, version="1")
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, b"hello")
+    assert cache.get("ab" * 32) == b"hello"
+
+
+def test_disk_cache_version_change_invalidates(tmp_path):
+    DiskCache(tmp_path, version="1").put("cd" * 32, b"old")
+    assert DiskCache(tmp_path, version="1").get("cd" * 32) == b"old"
+    assert DiskCache(tmp_path, version="2").get("cd" * 32) is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, version="1", max_bytes=350)
+    keys = [f"{i:02d}" * 32 for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, b"x" * 100)
+        # Give each entry a distinct, increasing mtime
+        stamp = time.time() - 100 + i
+        os.utime(cache._entry_path(key), (stamp, stamp))
+
+    # Touch the oldest so it becomes the most recently used
+    cache.get(keys[0])
+    cache.put("ff" * 32, b"x" * 100)
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+
+
+def test_extract_text_second_call_is_served_from_cache(tmp_path, monkeypatch, make_pdf):
+    pdf = tmp_path / "doc.pdf"
+    make_pdf("Delivery Number: 555555", path=pdf)
+    monkeypatch.setattr(pdf_utils, "_text_cache", DiskCache(tmp_path / "cache", version="t"))
+
+    calls = []
+    real_extract_pages = pdf_utils._extract_pages
+
+    def counting_extract_pages(*args, **kwargs):
+        calls.append(1)
+        return real_extract_pages(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_utils, "_extract_pages", counting_extract_pages)
+
+    first = pdf_utils.extract_text(str(pdf))
+    second = pdf_utils.extract_text(str(pdf))
+
+    assert "555555" in first
+    assert first == second
+    assert len(calls) == 1
@@ -0,0 +1,48 @@
+import sys
+
+import pytest
+
+from ParsingTool.parsing import cli
+from ParsingTool.parsing.export_orders import pipeline as exp
+from ParsingTool.parsing.shared import pdf_utils
+from ParsingTool.parsing.shared.corpus import build_corpus, read_corpus
+
+TERMS_PAGE = "Terms and Conditions\n7 days Fumigation with Profume"
+
+
+def test_reparse_from_corpus_matches_a_pdf_run(tmp_path, monkeypatch, make_pdf, order_page):
+    monkeypatch.setenv("PARSINGTOOL_NO_CACHE", "1")
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    for n in ("111111", "222222"):
+        make_pdf(order_page(n), TERMS_PAGE, path=in_dir / f"{n}.pdf")
+
+    (tmp_path / "pdf_run").mkdir()
+    exp.run_batch(in_dir, tmp_path / "pdf_run")
+    corpus = tmp_path / "corpus.jsonl.gz"
+    assert build_corpus(sorted(in_dir.glob("*.pdf")), corpus) == 2
+
+    docs = read_corpus(corpus)
+    assert [d.name for d in docs] == ["111111.pdf", "222222.pdf"]
+    assert len(docs[0].pages) == 2  # every page is kept
+
+    def no_pdfs(*args, **kwargs):
+        raise AssertionError("re-parse must not read PDFs")
+
+    monkeypatch.setattr(pdf_utils, "extract_text", no_pdfs)
+    monkeypatch.setattr(exp, "extract_text", no_pdfs)
+    monkeypatch.setattr(sys, "argv", ["parsingtool", "reparse", str(corpus), "--out-dir", str(tmp_path / "corpus_run")])
+    cli.main()
+
+    expected = (tmp_path / "pdf_run" / "export_combined.csv").read_text(encoding="utf-8")
+    assert (tmp_path / "corpus_run" / "export_combined.csv").read_text(encoding="utf-8") == expected
+    assert (tmp_path / "corpus_run" / "pi_combined.csv").exists()
+    assert (tmp_path / "corpus_run" / "domestic_batches_combined.csv").exists()
+
+
+def test_reparse_rejects_unknown_pipelines(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        sys, "argv", ["parsingtool", "reparse", "c.jsonl.gz", "--out-dir", str(tmp_path), "--pipelines", "nope"]
+    )
+    with pytest.raises(SystemExit):
+        cli.main()
@@ -0,0 +1,82 @@
+import pytest
+
+from ParsingTool.parsing.shared.batch import CombinedOutput, FileResult, needs_ocr, run_two_phase_batch
+from ParsingTool.parsing.shared.cancel import RunCancelled, RunToken, check_cancelled, current_token
+from ParsingTool.parsing.shared.manifest import Manifest
+from ParsingTool.parsing.shared.pdf_utils import NoTextError
+
+COLUMNS = ["Delivery Number", "Variety", "Source_File"]
+
+
+def _parse_text_layer(path):
+    body = path.read_text()
+    if not body:
+        raise NoTextError(f"No extractable text in {path.name}")
+    delivery, _, variety = body.partition(",")
+    return {"rows": [{"Delivery Number": delivery, "Variety": variety, "Source_File": path.name}]}
+
+
+def _parse_with_ocr(path):
+    return {"rows": [{"Delivery Number": f"ocr-{path.stem}", "Variety": "Nonpareil", "Source_File": path.name}]}
+
+
+def test_needs_ocr():
+    ok = {"rows": [{"Delivery Number": "1", "Variety": "NP"}]}
+    assert not needs_ocr(FileResult("a", ok), "rows")
+    assert needs_ocr(FileResult("a", {"rows": [{"Delivery Number": "1", "Variety": ""}]}), "rows")
+    assert needs_ocr(FileResult("a", {"rows": []}), "rows")
+    assert needs_ocr(FileResult("a", error="no text", error_type="NoTextError"), "rows")
+    assert not needs_ocr(FileResult("a", error="broken", error_type="ValueError"), "rows")
+
+
+def test_only_files_missing_text_or_key_fields_are_ocrd(tmp_path):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    for name, body in [("a.pdf", "1,NP"), ("b.pdf", ""), ("c.pdf", "3,"), ("d.pdf", "4,Carmel"), ("e.pdf", "")]:
+        (in_dir / name).write_text(body)
+    out = CombinedOutput("rows", tmp_path / "combined.csv", COLUMNS)
+
+    run_two_phase_batch(
+        "T", sorted(in_dir.iterdir()), _parse_text_layer, _parse_with_ocr, [out], workers=2, ocr_workers=2
+    )
+
+    assert out.path.read_text(encoding="utf-8").splitlines() == [
+        "Delivery Number,Variety,Source_File",
+        "1,NP,a.pdf",
+        "ocr-b,Nonpareil,b.pdf",
+        "ocr-c,Nonpareil,c.pdf",
+        "4,Carmel,d.pdf",
+        "ocr-b,Nonpareil,e.pdf",  # same content as b.pdf: OCR'd once, rows fanned out
+    ]
+    assert not (tmp_path / "combined.csv.partial").exists()
+
+
+def _cancel_during_ocr(path):
+    current_token().cancel()
+    check_cancelled()
+
+
+def test_files_cancelled_during_ocr_are_ocrd_by_the_next_run(tmp_path):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    for name, body in [("a.pdf", "1,NP"), ("b.pdf", "2,")]:
+        (in_dir / name).write_text(body)
+    files = sorted(in_dir.iterdir())
+    out = CombinedOutput("rows", tmp_path / "combined.csv", COLUMNS)
+    manifest_path = tmp_path / "manifest.json"
+
+    with RunToken() as token, pytest.raises(RunCancelled):
+        run_two_phase_batch("T", files, _parse_text_layer, _cancel_during_ocr, [out],
+                            manifest=Manifest.load(manifest_path), token=token)
+    # The text pass kept b.pdf out of the manifest: it never got its OCR rows
+    assert set(Manifest.load(manifest_path).entries) == {"a.pdf"}
+
+    run_two_phase_batch("T", files, _parse_text_layer, _parse_with_ocr, [out],
+                        manifest=Manifest.load(manifest_path))
+
+    assert out.path.read_text(encoding="utf-8").splitlines() == [
+        "Delivery Number,Variety,Source_File",
+        "1,NP,a.pdf",
+        "ocr-b,Nonpareil,b.pdf",
+    ]
+    assert set(Manifest.load(manifest_path).entries) == {"a.pdf", "b.pdf"}
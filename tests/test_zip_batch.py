@@ -0,0 +1,110 @@
+import csv
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from ParsingTool.parsing.export_orders import pipeline as exp
+from ParsingTool.parsing.shared.archive import (
+    ZipMember,
+    batch_source,
+    list_batch_inputs,
+    output_stem,
+)
+from ParsingTool.parsing.shared import archive as archive_mod
+from ParsingTool.parsing.shared.batch import find_duplicates, map_files
+
+
+@pytest.fixture
+def make_zip(make_pdf, order_page):
+    def make(path):
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("orders/222222.pdf", make_pdf(order_page("222222")))
+            zf.writestr("111111.PDF", make_pdf(order_page("111111")))
+            zf.writestr("readme.txt", "not a pdf")
+            zf.writestr("__MACOSX/orders/._222222.pdf", b"resource fork")
+
+    return make
+
+
+def test_list_batch_inputs_lists_pdf_members(tmp_path, make_zip):
+    archive = tmp_path / "orders.zip"
+    make_zip(archive)
+
+    members = list_batch_inputs(archive)
+    assert [m.name for m in members] == ["111111.PDF", "orders/222222.pdf"]
+    assert members[1].stem == "222222"
+    assert batch_source(members[1]).startswith(b"%PDF")
+    assert members[1].stat().st_size == len(members[1].read_bytes())
+
+
+def test_run_batch_reads_zip_members_in_memory(tmp_path, monkeypatch, make_zip):
+    monkeypatch.setenv("PARSINGTOOL_NO_CACHE", "1")
+    archive = tmp_path / "orders.zip"
+    make_zip(archive)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+
+    exp.run_batch(archive, out_dir, incremental=True)
+    with open(out_dir / "export_combined.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["Source_File"], r["Delivery Number"]) for r in rows] == [
+        ("111111.PDF", "111111"),
+        ("orders/222222.pdf", "222222"),
+    ]
+
+    # Unchanged members are reused on the next incremental run
+    parsed = []
+    monkeypatch.setattr(exp, "parse_export_pdf", lambda *a, **k: parsed.append(a))
+    exp.run_batch(archive, out_dir, incremental=True)
+    assert parsed == []
+
+
+def test_zip_members_survive_pickling(tmp_path):
+    import pickle
+
+    member = ZipMember(tmp_path / "a.zip", "x.pdf")
+    assert pickle.loads(pickle.dumps(member)) == member
+
+
+def _member_size(member):
+    return len(member.read_bytes())
+
+
+def test_forked_workers_dont_share_the_parents_archive_handle(tmp_path):
+    archive = tmp_path / "many.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(60):
+            zf.writestr(f"{i:03d}.pdf", bytes([i]) * (20000 + i))
+    members = list_batch_inputs(archive)
+    members[0].read_bytes()  # the parent has the archive open before the workers fork
+
+    results = list(map_files(_member_size, members, workers=4))
+
+    assert [r.error for r in results] == [None] * 60
+    assert [r.value for r in results] == [20000 + i for i in range(60)]
+
+
+def test_members_are_hashed_in_the_workers(tmp_path):
+    archive = tmp_path / "dupes.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(8):
+            zf.writestr(f"{i}.pdf", bytes([i % 3]) * 5000)
+    members = list_batch_inputs(archive)
+    archive_mod._open_archives.clear()
+
+    copies, digests = find_duplicates(members, workers=2)
+
+    assert {name: f.name for name, f in copies.items()} == {
+        "3.pdf": "0.pdf", "4.pdf": "1.pdf", "5.pdf": "2.pdf",
+        "6.pdf": "0.pdf", "7.pdf": "1.pdf",
+    }
+    assert len(digests) == 8
+    assert not archive_mod._open_archives  # the parent never opened the archive
+
+
+def test_output_stems_keep_member_folders():
+    a = ZipMember(Path("x.zip"), "north/123.pdf")
+    b = ZipMember(Path("x.zip"), "south/123.pdf")
+    assert (output_stem(a), output_stem(b)) == ("north__123", "south__123")
+    assert output_stem(ZipMember(Path("x.zip"), "123.PDF")) == output_stem(Path("in/123.PDF")) == "123"